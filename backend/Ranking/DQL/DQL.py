@@ -7,7 +7,8 @@ from config import *
 
 
 class QNetwork(nn.Module):
-    def __init__(self, state_size, action_size, analytics=None, create_target=False):
+    def __init__(self, state_size, action_size, analytics=None, create_target=False,
+                 telemetry_interval=QNETWORK_TELEMETRY_INTERVAL):
         """
         Initialize Q-Network.
 
@@ -16,6 +17,8 @@ class QNetwork(nn.Module):
             action_size (int): Dimension of action space
             analytics (Analytics, optional): Analytics instance
             create_target (bool): Whether to create a target network
+            telemetry_interval (int): Report Q-values and gradients to analytics every N
+                training forward passes; 0 disables the hook
         """
         super(QNetwork, self).__init__()
         self.fc1 = nn.Linear(state_size, 128)
@@ -38,7 +41,7 @@ class QNetwork(nn.Module):
         self.target_update_frequency = TARGET_UPDATE_FREQUENCY
 
         self.optimizer = optim.Adam(self.parameters(), lr=LEARNING_RATE)
-        self.memory = ReplayBuffer(BUFFER_SIZE, BATCH_SIZE)
+        self.memory = make_replay_buffer(BUFFER_SIZE, BATCH_SIZE)
         self.analytics = analytics
 
         # Only create target network if this is the main network
@@ -47,6 +50,12 @@ class QNetwork(nn.Module):
             # Copy weights manually
             self.copy_weights_to_target()
 
+        self.telemetry_interval = 0
+        self.forward_calls = 0
+        self._telemetry_handle = None
+        if analytics is not None and not create_target:
+            self.set_telemetry_interval(telemetry_interval)
+
         debug_print(f"Initialized QNetwork with state_size: {state_size}, action_size: {action_size}")
 
 
@@ -62,29 +71,48 @@ class QNetwork(nn.Module):
         """
         x = F.relu(self.fc1(state))
         x = F.relu(self.fc2(x))
-        q_values = self.fc3(x)
-
-        # Track Q-values for analytics
-        if self.analytics and self.training:
-            if hasattr(self, 'target_network'):  # Only track if this is online network
-                online_q = q_values.mean().item()
-                with torch.no_grad():
-                    target_q = self.target_network(state).mean().item()
-
-                self.online_q_values.append(online_q)
-                self.target_q_values.append(target_q)
-
-                self.analytics.track_dql_training(
-                    q_values=q_values,
-                    online_q=online_q,
-                    target_q=target_q,
-                    loss=self.last_loss if hasattr(self, 'last_loss') else None,
-                    gradients={name: param.grad for name, param in self.named_parameters() if param.grad is not None},
-                    network_state={name: param.data for name, param in self.named_parameters()},
-                    action_taken=torch.argmax(q_values).item()
-                )
-
-        return q_values
+        return self.fc3(x)
+
+    def set_telemetry_interval(self, interval):
+        """
+        Enable, change or disable the sampled telemetry hook.
+
+        Args:
+            interval (int): Report every N training forward passes; 0 removes the hook
+        """
+        if self._telemetry_handle is not None:
+            self._telemetry_handle.remove()
+            self._telemetry_handle = None
+        self.telemetry_interval = interval
+        if interval > 0 and self.analytics is not None and hasattr(self, 'target_network'):
+            self._telemetry_handle = self.register_forward_hook(QNetwork._telemetry_hook)
+
+    @staticmethod
+    def _telemetry_hook(network, inputs, q_values):
+        """Forward hook that reports Q-value and gradient telemetry on a sample of training calls."""
+        if not network.training:
+            return
+        network.forward_calls += 1
+        if network.forward_calls % network.telemetry_interval:
+            return
+
+        (state,) = inputs
+        with torch.no_grad():
+            online_q = q_values.mean().item()
+            target_q = network.target_network(state).mean().item()
+
+        network.online_q_values.append(online_q)
+        network.target_q_values.append(target_q)
+
+        network.analytics.track_dql_training(
+            q_values=q_values,
+            online_q=online_q,
+            target_q=target_q,
+            loss=network.last_loss if hasattr(network, 'last_loss') else None,
+            gradients={name: param.grad for name, param in network.named_parameters() if param.grad is not None},
+            network_state={name: param.data for name, param in network.named_parameters()},
+            action_taken=torch.argmax(q_values).item()
+        )
 
     def remember(self, state, action, reward, next_state, done):
         """
@@ -120,16 +148,18 @@ class QNetwork(nn.Module):
         if self.memory.size() < batch_size:
             return
 
-        states, actions, rewards, next_states, dones = self.memory.sample()
+        (states, actions, rewards, next_states, dones), indices, weights = self.memory.sample_batch()
 
-        states = torch.FloatTensor(states)
-        actions = torch.LongTensor(actions)
-        rewards = torch.FloatTensor(rewards)
-        next_states = torch.FloatTensor(next_states)
-        dones = torch.FloatTensor(dones)
+        # The buffer hands out contiguous float32/int64 arrays, so these don't copy
+        states = torch.from_numpy(states)
+        actions = torch.from_numpy(actions)
+        rewards = torch.from_numpy(rewards)
+        next_states = torch.from_numpy(next_states)
+        dones = torch.from_numpy(dones)
+        weights = torch.from_numpy(weights)
 
         # Current Q values
-        current_q_values = self(states).gather(1, actions.unsqueeze(1)).squeeze()
+        current_q_values = self(states).gather(1, actions.unsqueeze(1)).squeeze(1)
 
         # Double DQN modification
         with torch.no_grad():
@@ -137,12 +167,14 @@ class QNetwork(nn.Module):
             next_actions = self(next_states).argmax(dim=1, keepdim=True)
 
             # Use target network to EVALUATE action
-            next_q_values = self.target_network(next_states).gather(1, next_actions).squeeze()
+            next_q_values = self.target_network(next_states).gather(1, next_actions).squeeze(1)
             target_q_values = rewards + (GAMMA * next_q_values * (1 - dones))
 
-        # Compute loss and update
-        loss = F.mse_loss(current_q_values, target_q_values)
+        # Importance-weighted MSE; the weights are all 1 with uniform replay
+        td_errors = target_q_values - current_q_values
+        loss = (weights * td_errors.pow(2)).mean()
         self.last_loss = loss.item()
+        self.memory.update_priorities(indices, td_errors.detach().numpy())
 
         self.optimizer.zero_grad()
         loss.backward()
@@ -175,29 +207,51 @@ class QNetwork(nn.Module):
 
 class ReplayBuffer:
     """
-    Replay buffer for experience replay.
+    Replay buffer for experience replay, stored as a preallocated ring buffer.
+
+    Each field lives in its own NumPy array, so inserting is O(1) and a batch is
+    gathered with one fancy-index per field. Sampled arrays are contiguous
+    float32 (int64 for actions) and can be wrapped with torch.from_numpy
+    without copying.
 
     Attributes:
-        buffer (deque): Buffer to store experiences
+        buffer_size (int): Maximum number of experiences kept
         batch_size (int): Size of training batches
     """
 
-    def __init__(self, buffer_size, batch_size):
+    def __init__(self, buffer_size, batch_size, seed=None):
         """
         Initialize replay buffer.
 
         Args:
             buffer_size (int): Maximum size of buffer
             batch_size (int): Size of training batches
+            seed (int, optional): Seed for batch sampling
         """
-        self.buffer = deque(maxlen=BUFFER_SIZE)
-        self.batch_size = BATCH_SIZE  # From config
-        self.buffer_size = BUFFER_SIZE  # From config
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.position = 0
+        self.count = 0
+        # Allocated on the first add, once the state shape is known
+        self.states = None
+        self.actions = None
+        self.rewards = None
+        self.next_states = None
+        self.dones = None
         debug_print(f"Initialized ReplayBuffer with size: {buffer_size}, batch_size: {batch_size}")
 
+    def _allocate(self, state):
+        state_shape = np.shape(state)
+        self.states = np.zeros((self.buffer_size, *state_shape), dtype=np.float32)
+        self.next_states = np.zeros((self.buffer_size, *state_shape), dtype=np.float32)
+        self.actions = np.zeros(self.buffer_size, dtype=np.int64)
+        self.rewards = np.zeros(self.buffer_size, dtype=np.float32)
+        self.dones = np.zeros(self.buffer_size, dtype=np.float32)
+
     def add(self, state, action, reward, next_state, done):
         """
-        Add experience to buffer.
+        Add experience to buffer, overwriting the oldest one when full.
 
         Args:
             state (np.array): Current state
@@ -205,16 +259,78 @@ class ReplayBuffer:
             reward (float): Reward received
             next_state (np.array): Next state
             done (bool): Whether episode is done
+
+        Returns:
+            int: Slot the experience was written to, or None if it was dropped
         """
         if next_state is None and not done:
-            next_state = np.zeros_like(state)
             debug_print("Warning: Got None next_state in non-terminal state")
-            return
+            return None
         if next_state is None:
             next_state = state
+        if self.states is None:
+            self._allocate(state)
+
+        index = self.position
+        self.states[index] = state
+        self.actions[index] = action
+        self.rewards[index] = reward
+        self.next_states[index] = next_state
+        self.dones[index] = float(done)
+        self.position = (index + 1) % self.buffer_size
+        self.count = min(self.count + 1, self.buffer_size)
+        return index
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        """
+        Add one experience per row, e.g. from a vectorized environment step.
 
-        experience = (state, action, reward, next_state, done)
-        self.buffer.append(experience)
+        Args:
+            states (np.ndarray): (B, state_size) current states
+            actions (np.ndarray): (B,) actions taken
+            rewards (np.ndarray): (B,) rewards received
+            next_states (np.ndarray): (B, state_size) next states
+            dones (np.ndarray): (B,) done flags
+
+        Returns:
+            np.ndarray: Slots the experiences were written to
+        """
+        states = np.asarray(states, dtype=np.float32)
+        if self.states is None:
+            self._allocate(states[0])
+        count = min(len(states), self.buffer_size)
+        indices = (self.position + np.arange(len(states))[-count:]) % self.buffer_size
+        self.states[indices] = states[-count:]
+        self.actions[indices] = np.asarray(actions)[-count:]
+        self.rewards[indices] = np.asarray(rewards)[-count:]
+        self.next_states[indices] = np.asarray(next_states, dtype=np.float32)[-count:]
+        self.dones[indices] = np.asarray(dones, dtype=np.float32)[-count:]
+        self.position = (self.position + len(states)) % self.buffer_size
+        self.count = min(self.count + len(states), self.buffer_size)
+        return indices
+
+    def sample_indices(self, batch_size=None):
+        """
+        Draw distinct buffer slots uniformly.
+
+        Args:
+            batch_size (int, optional): Defaults to the buffer's batch size
+
+        Returns:
+            np.ndarray: Slot indices
+        """
+        batch_size = min(batch_size or self.batch_size, self.count)
+        return self.rng.choice(self.count, size=batch_size, replace=False)
+
+    def gather(self, indices):
+        """
+        Collect the experiences stored at the given slots.
+
+        Returns:
+            tuple: Batch of (states, actions, rewards, next_states, dones)
+        """
+        return (self.states[indices], self.actions[indices], self.rewards[indices],
+                self.next_states[indices], self.dones[indices])
 
     def sample(self):
         """
@@ -223,10 +339,20 @@ class ReplayBuffer:
         Returns:
             tuple: Batch of (states, actions, rewards, next_states, dones)
         """
-        batch_size = min(self.batch_size, len(self.buffer))
-        batch = random.sample(self.buffer, batch_size)
-        states, actions, rewards, next_states, dones = zip(*batch)
-        return np.array(states), np.array(actions), np.array(rewards), np.array(next_states), np.array(dones)
+        return self.gather(self.sample_indices())
+
+    def sample_batch(self):
+        """
+        Sample a batch along with its slots and importance-sampling weights.
+
+        Returns:
+            tuple: (batch, indices, weights); weights are all 1 for uniform sampling
+        """
+        indices = self.sample_indices()
+        return self.gather(indices), indices, np.ones(len(indices), dtype=np.float32)
+
+    def update_priorities(self, indices, td_errors):
+        """Uniform sampling ignores TD errors."""
 
     def size(self):
         """
@@ -235,9 +361,165 @@ class ReplayBuffer:
         Returns:
             int: Current buffer size
         """
-        return len(self.buffer)
+        return self.count
+
+    def __len__(self):
+        return self.count
 
     def clear(self):
         """Clear the replay buffer"""
-        self.buffer.clear()
+        self.position = 0
+        self.count = 0
+
+
+class SumTree:
+    """
+    Binary tree whose leaves hold priorities and whose inner nodes hold the sum of their children.
+
+    Stored as one flat array with the root at index 1 and leaves at
+    [capacity, 2 * capacity). Updates and prefix-sum lookups are O(log n) and
+    both run for a whole batch at once, one tree level per NumPy operation.
+    """
+
+    def __init__(self, capacity):
+        """
+        Args:
+            capacity (int): Number of leaves; rounded up to a power of two
+        """
+        self.capacity = 1 << max(0, int(capacity - 1).bit_length())
+        self.depth = self.capacity.bit_length() - 1
+        self.tree = np.zeros(2 * self.capacity, dtype=np.float64)
+
+    @property
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices, priorities):
+        """
+        Set leaf priorities and refresh their ancestors.
+
+        Args:
+            indices (np.ndarray): Leaf indices
+            priorities (np.ndarray): New priorities, same length as indices
+        """
+        nodes = np.asarray(indices, dtype=np.int64) + self.capacity
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values):
+        """
+        Leaf index whose cumulative priority range contains each value.
+
+        Only subtrees holding priority mass are entered, so rounding in the
+        running remainder can never land on an empty leaf.
+
+        Args:
+            values (np.ndarray): Points in [0, total)
+
+        Returns:
+            tuple: (leaf indices, leaf priorities)
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = (values >= left_sum) & (self.tree[left + 1] > 0)
+            values = np.where(go_right, values - left_sum, values)
+            nodes = left + go_right
+        return nodes - self.capacity, self.tree[nodes]
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer that samples transitions in proportion to their TD error.
+
+    New transitions get the highest priority seen so far so they are replayed
+    at least once. Sampling is stratified over the priority mass and returns
+    importance-sampling weights that correct for the non-uniform draw; beta is
+    annealed towards 1 as training progresses.
+    """
+
+    def __init__(self, buffer_size, batch_size, alpha=PER_ALPHA, beta_start=PER_BETA_START,
+                 beta_steps=PER_BETA_STEPS, epsilon=PER_EPSILON, seed=None):
+        """
+        Args:
+            buffer_size (int): Maximum size of buffer
+            batch_size (int): Size of training batches
+            alpha (float): Priority exponent
+            beta_start (float): Initial importance-sampling exponent
+            beta_steps (int): Number of sampled batches over which beta reaches 1
+            epsilon (float): Added to every |TD error|
+            seed (int, optional): Seed for batch sampling
+        """
+        super().__init__(buffer_size, batch_size, seed=seed)
+        self.alpha = alpha
+        self.beta_start = beta_start
+        self.beta_steps = beta_steps
+        self.epsilon = epsilon
+        self.tree = SumTree(buffer_size)
+        self.max_priority = 1.0
+        self.sampled_batches = 0
+
+    @property
+    def beta(self):
+        progress = min(1.0, self.sampled_batches / max(1, self.beta_steps))
+        return self.beta_start + (1.0 - self.beta_start) * progress
+
+    def add(self, state, action, reward, next_state, done):
+        index = super().add(state, action, reward, next_state, done)
+        if index is not None:
+            self.tree.update([index], [self.max_priority ** self.alpha])
+        return index
+
+    def add_batch(self, states, actions, rewards, next_states, dones):
+        indices = super().add_batch(states, actions, rewards, next_states, dones)
+        self.tree.update(indices, np.full(len(indices), self.max_priority ** self.alpha))
+        return indices
+
+    def sample_batch(self):
+        """
+        Sample a batch in proportion to priority.
+
+        Returns:
+            tuple: (batch, indices, weights) with weights normalised to a maximum of 1
+        """
+        batch_size = min(self.batch_size, self.count)
+        total = self.tree.total
+        # One draw per equal slice of the priority mass
+        bounds = np.linspace(0.0, total, batch_size + 1)
+        values = self.rng.uniform(bounds[:-1], bounds[1:])
+        indices, priorities = self.tree.find(np.minimum(values, np.nextafter(total, 0)))
+
+        probabilities = np.maximum(priorities, 1e-12) / total
+        weights = (self.count * probabilities) ** -self.beta
+        weights = (weights / weights.max()).astype(np.float32)
+        self.sampled_batches += 1
+        return self.gather(indices), indices, weights
+
+    def update_priorities(self, indices, td_errors):
+        """
+        Re-prioritise sampled transitions from their latest TD errors.
+
+        Args:
+            indices (np.ndarray): Slots returned by sample_batch
+            td_errors (np.ndarray): TD error per slot
+        """
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def clear(self):
+        super().clear()
+        self.tree = SumTree(self.buffer_size)
+        self.max_priority = 1.0
+        self.sampled_batches = 0
+
 
+def make_replay_buffer(buffer_size, batch_size):
+    """Replay buffer selected by USE_PRIORITIZED_REPLAY."""
+    if USE_PRIORITIZED_REPLAY:
+        return PrioritizedReplayBuffer(buffer_size, batch_size)
+    return ReplayBuffer(buffer_size, batch_size)
@@ -68,6 +68,21 @@ DECAY_EPISODES = int(NUM_EPISODES * TRAINING_PROGRESS)
 
 
 EPSILON_DECAY = 0.999
+
+# Prioritized experience replay (off by default: uniform sampling)
+USE_PRIORITIZED_REPLAY = False
+PER_ALPHA = 0.6  # How strongly TD error shapes sampling (0 = uniform)
+PER_BETA_START = 0.4  # Importance-sampling correction, annealed to 1
+PER_BETA_STEPS = 100000  # Batches sampled before beta reaches 1
+PER_EPSILON = 1e-5  # Keeps every transition sampleable
+
+# Q-value/gradient telemetry from QNetwork's forward hook: every N training forwards, 0 = off
+QNETWORK_TELEMETRY_INTERVAL = 0
+# Training steps between the recommender's extra diagnostics (target-network Q-values, DDQN batch metrics), 0 = off
+TRAINING_DIAGNOSTICS_INTERVAL = 100
+# Serving export of the Q-network (inference.py): 'script', 'compile' or 'eager'
+INFERENCE_EXPORT_MODE = 'script'
+INFERENCE_BENCHMARK_BATCH_SIZES = (1, 64, 4096)
 # Base directory (project root)
 BASE_DIR = Path(__file__).parent
 
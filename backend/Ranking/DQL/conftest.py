@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Event_Ranking_Environment lives next to the service; appended so DQL/config.py still wins
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
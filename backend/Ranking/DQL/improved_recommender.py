@@ -5,9 +5,9 @@ Implements an improved DQN-based event recommender with hybrid rewards.
 
 from config import *
 from DQL import QNetwork
-from Event_Ranking_Environment import EventRecommendationEnv
+from Event_Ranking_Environment import EventContext, EventRecommendationEnv, VectorizedEventRecommendationEnv
 from user_simulator import HybridRewardSystem
-from DQL import ReplayBuffer
+from DQL import make_replay_buffer
 from training_analytics import TrainingAnalytics
 
 
@@ -27,11 +27,12 @@ class ImprovedEventRecommenderDQN:
         # Initialize optimizer
         self.optimizer = optim.Adam(self.dqn.parameters(), lr=LEARNING_RATE)
         # Initialize replay buffer
-        self.memory = ReplayBuffer(10000, self.batch_size)
+        self.memory = make_replay_buffer(10000, self.batch_size)
 
-        # Initialize environment and reward system
-        self.env = EventRecommendationEnv(events_df, user)
-        self.reward_system = HybridRewardSystem(user, events_df)
+        # Initialize environment and reward system over one shared event context
+        self.context = EventContext(events_df, user)
+        self.env = EventRecommendationEnv(events_df, user, context=self.context)
+        self.reward_system = HybridRewardSystem(user, events_df, context=self.context)
         # Training parameters
         self.epsilon = INITIAL_EPSILON
         self.epsilon_decay = EPSILON_DECAY
@@ -40,6 +41,9 @@ class ImprovedEventRecommenderDQN:
         self.gamma = GAMMA
         self.target_update_frequency = TARGET_UPDATE_FREQUENCY
 
+        self.diagnostics_interval = TRAINING_DIAGNOSTICS_INTERVAL
+        self.total_steps = 0
+
         # Analytics
         self.reward_history = []
         self.episode_analytics = []  # Add this
@@ -48,15 +52,27 @@ class ImprovedEventRecommenderDQN:
         debug_print(
             f"Initialized ImprovedEventRecommenderDQN with state_size: {state_size}, action_size: {action_size}")
 
-    def select_action(self, state):
-        """Select action using epsilon-greedy with temperature scaling."""
+    def evaluate_state(self, state):
+        """Online network Q-values for a single state, shape (1, action_size)."""
+        with torch.no_grad():
+            return self.dqn(torch.from_numpy(np.asarray(state, dtype=np.float32)).unsqueeze(0))
+
+    def select_action(self, state, q_values=None):
+        """Select action using epsilon-greedy with temperature scaling.
+
+        Args:
+            state (np.array): Current state
+            q_values (torch.Tensor, optional): Q-values already computed for `state`,
+                so the training loop doesn't evaluate the same state twice
+        """
         if random.random() < self.epsilon:
             action = random.randint(0, self.action_size - 1)
             debug_print(f"Random action selected: {action}")
             return action
 
         with torch.no_grad():
-            q_values = self.dqn(torch.FloatTensor(state).unsqueeze(0))
+            if q_values is None:
+                q_values = self.evaluate_state(state)
 
             # Handle NaN/Inf values
             if torch.isnan(q_values).any() or torch.isinf(q_values).any():
@@ -94,6 +110,97 @@ class ImprovedEventRecommenderDQN:
                 debug_print("Error in multinomial sampling, defaulting to random action")
                 return random.randint(0, self.action_size - 1)
 
+    def select_actions(self, q_values, action_limit=None):
+        """Batched select_action: epsilon-greedy with temperature-scaled softmax sampling.
+
+        Args:
+            q_values (torch.Tensor): (B, action_size) Q-values, one row per episode
+            action_limit (int, optional): Only sample actions below this index
+
+        Returns:
+            np.ndarray: (B,) actions
+        """
+        q_values = q_values[:, :action_limit] if action_limit is not None else q_values
+        num_envs, num_actions = q_values.shape
+        explore = np.random.random(num_envs) < self.epsilon
+        actions = np.random.randint(0, num_actions, size=num_envs)
+        if explore.all():
+            return actions
+
+        with torch.no_grad():
+            logits = torch.nan_to_num(q_values, nan=0.0, posinf=1.0, neginf=-1.0) / max(TEMPERATURE, 1e-8)
+            probs = torch.softmax(logits, dim=1)
+            # Rows that still aren't a valid distribution fall back to a random action
+            valid = torch.isfinite(probs).all(dim=1) & (probs.sum(dim=1) > 0)
+            exploit = torch.from_numpy(~explore) & valid
+            if exploit.any():
+                sampled = torch.multinomial(probs[exploit], 1).squeeze(1)
+                actions[exploit.numpy()] = sampled.numpy()
+        return actions
+
+    def train_vectorized(self, num_episodes, num_envs=8, users=None, seed=None):
+        """Train on B episodes in lockstep, with one batched forward per step.
+
+        Args:
+            num_episodes (int): Stop after this many episodes have finished
+            num_envs (int): Episodes run side by side (ignored when `users` is given)
+            users (list, optional): One user per episode; by default every episode
+                is this recommender's user over a differently shuffled event order
+            seed (int, optional): Seed for the shuffled orders
+
+        Returns:
+            list: (reward, length) of each finished episode
+        """
+        if users is not None:
+            # Episodes of this recommender's own user reuse its context
+            venv = VectorizedEventRecommendationEnv.from_users(self.events_df, users, context=self.context)
+        else:
+            venv = VectorizedEventRecommendationEnv.shuffled(self.events_df, self.env.user, num_envs, seed=seed,
+                                                             context=self.context)
+        action_limit = min(self.action_size, venv.action_space)
+
+        finished = []
+        # Actions of each slot's running episode, for analytics
+        episode_actions = [[] for _ in range(venv.num_envs)]
+        states = venv.reset()
+        pbar = tqdm(total=num_episodes, desc="Training Episodes (vectorized)")
+        while len(finished) < num_episodes:
+            # Every episode's state evaluated in one forward
+            with torch.no_grad():
+                q_values = self.dqn(torch.from_numpy(states))
+            actions = self.select_actions(q_values, action_limit)
+            next_states, rewards, dones = venv.step(actions)
+            for slot_actions, action in zip(episode_actions, actions.tolist()):
+                slot_actions.append(action)
+
+            self.memory.add_batch(states, actions, rewards, next_states, dones)
+            loss = self.replay()
+            self.total_steps += venv.num_envs
+
+            finished_slots = np.flatnonzero(dones).tolist()
+            states, (episode_rewards, episode_lengths) = venv.reset_done(next_states, dones)
+            for slot, episode_reward, episode_length in zip(finished_slots, episode_rewards.tolist(),
+                                                            episode_lengths.tolist()):
+                episode = len(finished)
+                finished.append((episode_reward, episode_length))
+                self.decay_epsilon(episode)
+                if episode % self.target_update_frequency == 0:
+                    self.update_target_network()
+                if self.analytics:
+                    self.analytics.add_episode_data(
+                        reward=episode_reward,
+                        loss=loss,
+                        epsilon=self.epsilon,
+                        q_values=q_values.mean().item(),
+                        actions=episode_actions[slot],
+                        episode_length=episode_length
+                    )
+                episode_actions[slot] = []
+                pbar.update(1)
+            pbar.set_postfix({'Epsilon': f'{self.epsilon:.2f}', 'Finished': len(finished)})
+        pbar.close()
+        return finished[:num_episodes]
+
     def remember(self, state, action, reward, next_state, done):
         """Store experience in replay buffer."""
         if next_state is not None:  # Only remember valid transitions
@@ -104,14 +211,15 @@ class ImprovedEventRecommenderDQN:
         if self.memory.size() < self.batch_size:
             return 0.0
 
-        states, actions, rewards, next_states, dones = self.memory.sample()
+        (states, actions, rewards, next_states, dones), indices, weights = self.memory.sample_batch()
 
-        # Convert to tensors
-        state_batch = torch.FloatTensor(states)
-        action_batch = torch.LongTensor(actions)
-        reward_batch = torch.FloatTensor(rewards)
-        next_state_batch = torch.FloatTensor(next_states)
-        done_batch = torch.FloatTensor(dones)
+        # Zero-copy views over the buffer's float32/int64 batch arrays
+        state_batch = torch.from_numpy(states)
+        action_batch = torch.from_numpy(actions)
+        reward_batch = torch.from_numpy(rewards)
+        next_state_batch = torch.from_numpy(next_states)
+        done_batch = torch.from_numpy(dones)
+        weight_batch = torch.from_numpy(weights).unsqueeze(1)
 
         # DDQN: Use online network to SELECT actions
         with torch.no_grad():
@@ -127,8 +235,9 @@ class ImprovedEventRecommenderDQN:
         # Get current Q-values from online network
         current_q = self.dqn(state_batch).gather(1, action_batch.unsqueeze(1))
 
-        # Compute loss and update
-        loss = F.smooth_l1_loss(current_q, target_q)
+        # Importance-weighted Huber loss (weights are 1 with uniform replay)
+        loss = (weight_batch * F.smooth_l1_loss(current_q, target_q, reduction='none')).mean()
+        self.memory.update_priorities(indices, (target_q - current_q).detach().squeeze(1).numpy())
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
@@ -159,18 +268,20 @@ class ImprovedEventRecommenderDQN:
             episode_reward = 0
             episode_loss = 0
             episode_actions = []
-            episode_q_values = []
+            # Last 1000 Q-values plus the current step's
+            episode_q_values = deque(maxlen=1000 + self.action_size)
             steps = 0
 
             while not done:
-                action = self.select_action(state)
+                # One forward per state, shared by action selection and analytics
+                q_values = self.evaluate_state(state)
+                action = self.select_action(state, q_values)
                 self.update_action_history(action)
                 episode_actions.append(action)
+                episode_q_values.extend(q_values.numpy().ravel().tolist())
+                diagnostics_due = self.diagnostics_due()
+                self.total_steps += 1
 
-                # Get Q-values for analytics
-                with torch.no_grad():
-                    q_values = self.dqn(torch.FloatTensor(state).unsqueeze(0))
-                    episode_q_values = episode_q_values[-1000:] + q_values.numpy().flatten().tolist()
                 next_state, reward, done = self.env.step(action)
 
                 if hasattr(self.env, 'last_reward_components'):
@@ -190,11 +301,12 @@ class ImprovedEventRecommenderDQN:
                     loss = self.replay()
                     episode_loss += loss if loss is not None else 0
 
-                    # Track DDQN metrics
-                    self.track_ddqn_metrics()
+                    # Target-network diagnostics cost extra forwards, so they run on a cadence
+                    if diagnostics_due:
+                        self.track_ddqn_metrics()
 
                     # Track DQL metrics after replay (where loss is defined)
-                    if self.analytics:
+                    if self.analytics and diagnostics_due:
                         # Get Q-values from both networks
                         with torch.no_grad():
                             online_q = q_values.mean().item()
@@ -230,7 +342,7 @@ class ImprovedEventRecommenderDQN:
                     reward=episode_reward,
                     loss=episode_loss / steps if steps > 0 else 0,
                     epsilon=self.epsilon,
-                    q_values=episode_q_values,
+                    q_values=list(episode_q_values),
                     actions=episode_actions,
                     episode_length=steps,
                     reward_components=self.last_reward_components if hasattr(self, 'last_reward_components') else None
@@ -311,6 +423,11 @@ class ImprovedEventRecommenderDQN:
 
         return self.analytics  # Return the class-level analytics instance
 
+    def diagnostics_due(self):
+        """Whether the current training step should run the extra diagnostics."""
+        return (self.analytics is not None and self.diagnostics_interval > 0
+                and self.total_steps % self.diagnostics_interval == 0)
+
     def track_ddqn_metrics(self):
         """Track metrics specific to Double DQN performance"""
         if self.analytics:
@@ -318,7 +435,7 @@ class ImprovedEventRecommenderDQN:
                 # Sample some states
                 if self.memory.size() >= self.batch_size:
                     states, _, _, _, _ = self.memory.sample()
-                    state_batch = torch.FloatTensor(states)
+                    state_batch = torch.from_numpy(states)
 
                     # Get Q-values from both networks
                     online_q = self.dqn(state_batch)
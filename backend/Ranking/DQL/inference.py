@@ -0,0 +1,167 @@
+"""
+inference.py
+Eval-only export of a trained QNetwork for serving.
+
+QNetwork carries an optimizer, a replay buffer, a target network and an
+analytics hook; none of that belongs behind an endpoint. This module copies
+just the three linear layers into a plain module and freezes it as a
+TorchScript graph (or wraps it with torch.compile), so a ranking request is
+a single call with no autograd or Python-level layer dispatch.
+
+    python inference.py best_recommender.pth   # benchmark eager vs scripted vs compiled
+"""
+
+import argparse
+
+from config import *
+
+EXPORT_MODES = ('eager', 'script', 'compile')
+
+
+class InferenceQNetwork(nn.Module):
+    """The QNetwork forward pass and nothing else."""
+
+    def __init__(self, state_size, action_size):
+        super(InferenceQNetwork, self).__init__()
+        self.fc1 = nn.Linear(state_size, 128)
+        self.fc2 = nn.Linear(128, 64)
+        self.fc3 = nn.Linear(64, action_size)
+
+    def forward(self, state):
+        x = F.relu(self.fc1(state))
+        x = F.relu(self.fc2(x))
+        return self.fc3(x)
+
+    @classmethod
+    def from_state_dict(cls, state_dict):
+        """
+        Build from a QNetwork state dict, ignoring the target network's weights.
+
+        Args:
+            state_dict (dict): As written by QNetwork.save_model or ImprovedEventRecommenderDQN.save_model
+
+        Returns:
+            InferenceQNetwork: In eval mode with gradients disabled
+        """
+        layers = {k: v for k, v in state_dict.items() if k.split('.')[0] in ('fc1', 'fc2', 'fc3')}
+        network = cls(layers['fc1.weight'].shape[1], layers['fc3.weight'].shape[0])
+        network.load_state_dict(layers)
+        network.eval()
+        network.requires_grad_(False)
+        return network
+
+
+def _state_dict(source):
+    if isinstance(source, (str, Path)):
+        return torch.load(source, map_location='cpu')
+    if isinstance(source, nn.Module):
+        return source.state_dict()
+    return source
+
+
+def export_inference_model(source, mode=INFERENCE_EXPORT_MODE):
+    """
+    Export a trained Q-network as an eval-only module.
+
+    Args:
+        source: A QNetwork, a state dict, or a path to a saved state dict
+        mode (str): 'script' freezes and optimizes a TorchScript graph, 'compile' wraps the
+            module with torch.compile (compiled lazily on the first call per shape),
+            'eager' returns the plain module
+
+    Returns:
+        Callable mapping a (batch, state_size) float32 tensor to (batch, action_size) Q-values
+    """
+    if mode not in EXPORT_MODES:
+        raise ValueError(f"Unknown export mode {mode!r}, expected one of {EXPORT_MODES}")
+    network = InferenceQNetwork.from_state_dict(_state_dict(source))
+
+    if mode == 'script':
+        # Freezes the weights into the graph, then applies CPU inference passes
+        return torch.jit.optimize_for_inference(torch.jit.script(network))
+    if mode == 'compile':
+        return torch.compile(network, dynamic=True)
+    return network
+
+
+def save_inference_model(model, path):
+    """Write a scripted export so serving can load it with torch.jit.load and no project code."""
+    if not isinstance(model, torch.jit.ScriptModule):
+        raise TypeError(f"save_inference_model needs a model exported with mode='script', "
+                        f"got {type(model).__name__}")
+    torch.jit.save(model, path)
+    debug_print(f"Inference model saved to {path}")
+
+
+def load_inference_model(path):
+    """Load a model written by save_inference_model."""
+    model = torch.jit.load(path, map_location='cpu')
+    model.eval()
+    return model
+
+
+def predict(model, states):
+    """
+    Q-values for a batch of states.
+
+    Args:
+        model: An exported model
+        states (np.ndarray): (batch, state_size) states
+
+    Returns:
+        np.ndarray: (batch, action_size) Q-values
+    """
+    with torch.inference_mode():
+        return model(torch.from_numpy(np.asarray(states, dtype=np.float32))).numpy()
+
+
+def benchmark_inference(source, batch_sizes=INFERENCE_BENCHMARK_BATCH_SIZES, repeats=200, modes=EXPORT_MODES):
+    """
+    Median latency of each export mode per batch size.
+
+    Args:
+        source: Anything export_inference_model accepts
+        batch_sizes (tuple): Batch sizes to time
+        repeats (int): Timed calls per batch size (fewer for the largest batches)
+        modes (tuple): Export modes to compare
+
+    Returns:
+        dict: {mode: {batch_size: median seconds per call}}
+    """
+    source = _state_dict(source)
+    models = {mode: export_inference_model(source, mode) for mode in modes}
+    state_size = source['fc1.weight'].shape[1]
+
+    results = {mode: {} for mode in modes}
+    for batch_size in batch_sizes:
+        states = torch.randn(batch_size, state_size)
+        calls = max(10, repeats * 64 // max(batch_size, 64))
+        for mode, model in models.items():
+            with torch.inference_mode():
+                # Warm-up covers TorchScript profiling runs and torch.compile's first compilation
+                for _ in range(5):
+                    model(states)
+                timings = []
+                for _ in range(calls):
+                    start = time.perf_counter()
+                    model(states)
+                    timings.append(time.perf_counter() - start)
+            results[mode][batch_size] = float(np.median(timings))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Q-network inference exports")
+    parser.add_argument("model", nargs="?", help="Saved QNetwork state dict; a random network if omitted")
+    parser.add_argument("--state-size", type=int, default=5)
+    parser.add_argument("--action-size", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=1, help="torch intra-op threads")
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    source = args.model or InferenceQNetwork(args.state_size, args.action_size).state_dict()
+    results = benchmark_inference(source)
+
+    print(f"{'batch':>8}" + "".join(f"{mode:>14}" for mode in results))
+    for batch_size in INFERENCE_BENCHMARK_BATCH_SIZES:
+        print(f"{batch_size:>8}" + "".join(f"{results[mode][batch_size] * 1e6:>12.1f}us" for mode in results))
@@ -0,0 +1,210 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from config import PRICE_RANGES, get_current_time
+from Event_Ranking_Environment import (REWARD_COMPONENTS, REWARD_SCORES, EventContext, EventRecommendationEnv,
+                                      VectorizedEventRecommendationEnv)
+
+EVENT_TYPES = ['Concert', 'Sports', 'Comedy', 'Theater', 'Festival', 'Workshop', 'Film', 'Art']
+
+
+def make_events(n, seed=0):
+    """n upcoming events over the next two months, with some missing prices and popularities."""
+    rng = np.random.default_rng(seed)
+    now = pd.Timestamp(get_current_time())
+    start = (now + pd.to_timedelta(rng.integers(1, 24 * 60, n), unit='h')).astype('datetime64[ns]')
+    events = pd.DataFrame({
+        'Event ID': np.arange(1, n + 1),
+        'Event Type': rng.choice(EVENT_TYPES, n),
+        'Price ($)': np.round(rng.uniform(0, 250, n), 2),
+        'Distance (km)': np.round(rng.uniform(0, 80, n), 2),
+        'Popularity': rng.integers(10, 2000, n),
+        'Date/Time': start,
+    })
+    events.loc[rng.random(n) < 0.05, 'Price ($)'] = np.nan
+    events.loc[rng.random(n) < 0.05, 'Popularity'] = np.nan
+    events['timestamp'] = events['Date/Time'].astype('int64') // 10 ** 9
+    return events
+
+
+def make_user(i=0):
+    return pd.Series({
+        'User ID': i,
+        'Preferred Events': ['Concert', 'Comedy'],
+        'Undesirable Events': ['Sports'],
+        'Price Range': ['$', '$$', '$$$', 'irrelevant'][i % 4],
+        'Preferred Crowd Size': ['Small', 'Medium', 'Large', 'irrelevant'][i % 4],
+        'Max Distance (km)': 25 + 10 * i
+    })
+
+
+def edge_case_events():
+    """Events on and around every scoring boundary, with missing values in each field."""
+    now = pd.Timestamp(get_current_time())
+    rows = [
+        # type, price, distance, popularity, hours from now
+        ('Concert', 0.0, 5.0, 50, 2),           # free
+        ('Concert', np.nan, 20.0, 300, 30),     # missing price
+        ('Comedy', 25.0, np.nan, 120, 100),     # missing distance
+        ('Sports', 31.0, 40.0, np.nan, 200),    # missing popularity
+        ('Sports', 95.0, 60.0, 90, 400),        # beyond the preferred time window
+        ('Theater', 120.0, 0.0, 510, 700),
+        ('Theater', 150.0, 90.0, 5000, 12),
+        ('Film', 350.0, 120.0, 700, 48),
+        ('Film', 500.0, 10.0, 2, -5),           # already started
+        (np.nan, 45.0, 15.0, 101, 72),          # missing type
+        ('Art', 22.0, 35.0, 80, 336),
+        ('Art', 101.0, 25.0, 650, 1),
+        ('Workshop', 70.0, 8.0, 130, 5),
+        ('Workshop', np.nan, np.nan, np.nan, 20),
+    ]
+    events = pd.DataFrame(rows, columns=['Event Type', 'Price ($)', 'Distance (km)', 'Popularity', 'hours'])
+    events.insert(0, 'Event ID', np.arange(1, len(rows) + 1))
+    events['Date/Time'] = (now + pd.to_timedelta(events.pop('hours'), unit='h')).astype('datetime64[ns]')
+    events['timestamp'] = events['Date/Time'].astype('int64') // 10 ** 9
+    return events
+
+
+def scalar_features(context, event):
+    """get_event_features as computed per event before the feature matrix existed."""
+    user = context.user
+    price, popularity = event['Price ($)'], event['Popularity']
+    if not pd.isna(price) and user['Price Range'] != 'irrelevant':
+        if price > context.get_price_range(user['Price Range'])['max']:
+            return [-1.0] * 5
+    if not pd.isna(popularity) and user['Preferred Crowd Size'] != 'irrelevant':
+        pop_range = context.get_popularity_range(user['Preferred Crowd Size'])
+        if popularity < pop_range['min'] or popularity > pop_range['max']:
+            return [-0.5] * 5
+
+    event_type = event['Event Type']
+    stats = context.event_type_stats_cache.get(event_type, context.global_stats) if pd.notna(event_type) \
+        else context.global_stats
+
+    def filled(value, stat):
+        return value if not pd.isna(value) else stats[stat]['mean']
+
+    hours = event['Time Until Event (hrs)']
+    hours = hours if not pd.isna(hours) and hours >= 0 else stats['time_stats']['mean']
+    return [
+        context.score_event_type(event),
+        context.score_minimize(filled(event['Distance (km)'], 'distance_stats'), 0, context.max_distance * 2),
+        context.score_minimize(hours, 0, context.max_time_difference),
+        context.score_popularity(filled(popularity, 'popularity_stats')),
+        context.score_price_relative(filled(price, 'price_stats'), event_type),
+    ]
+
+
+def random_actions(steps, num_envs, action_space, seed=0):
+    return np.random.default_rng(seed).integers(0, action_space, size=(steps, num_envs))
+
+
+def rollout_vectorized(venv, actions):
+    """(next_states, rewards, dones) of every step, restarting finished episodes as training does."""
+    trajectory = []
+    states = venv.reset()
+    trajectory.append((states.copy(), None, None))
+    for step_actions in actions:
+        next_states, rewards, dones = venv.step(step_actions)
+        trajectory.append((next_states.copy(), rewards, dones))
+        venv.reset_done(next_states, dones)
+    return trajectory
+
+
+def rollout_single(envs, actions):
+    """rollout_vectorized for separate single-episode environments."""
+    trajectory = [(np.stack([env.reset() for env in envs]).astype(np.float32), None, None)]
+    for step_actions in actions:
+        results = [env.step(action) for env, action in zip(envs, step_actions.tolist())]
+        for env, (_, _, done) in zip(envs, results):
+            if done:
+                env.reset()
+        trajectory.append((
+            np.stack([np.asarray(state, dtype=np.float32) for state, _, _ in results]),
+            np.array([reward for _, reward, _ in results], dtype=np.float32),
+            np.array([done for _, _, done in results])
+        ))
+    return trajectory
+
+
+def assert_same_trajectory(actual, expected):
+    # Contexts built separately read the clock a moment apart, so time scores may differ in float32's last bits
+    for (states, rewards, dones), (want_states, want_rewards, want_dones) in zip(actual, expected):
+        np.testing.assert_allclose(states, want_states, rtol=1e-6, atol=1e-6)
+        if want_rewards is not None:
+            np.testing.assert_allclose(rewards, want_rewards, rtol=1e-6, atol=1e-6)
+            np.testing.assert_array_equal(dones, want_dones)
+
+
+def test_vectorized_users_step_like_separate_environments():
+    events = make_events(120)
+    users = [make_user(i) for i in range(4)]
+    venv = VectorizedEventRecommendationEnv.from_users(events, users)
+    actions = random_actions(60, len(users), venv.action_space)
+
+    expected = rollout_single([EventRecommendationEnv(events, user) for user in users], actions)
+    assert_same_trajectory(rollout_vectorized(venv, actions), expected)
+
+
+
+def test_repeated_users_share_one_context():
+    events = make_events(120)
+    user, other = make_user(2), make_user(3)
+    context = EventContext(events, user)
+
+    mixed = VectorizedEventRecommendationEnv.from_users(events, [user, other, other, user], context=context)
+    assert [env.context for env in mixed.envs[::3]] == [context, context]
+    assert mixed.envs[1].context is mixed.envs[2].context is not context
+    assert mixed.context is None
+
+    # Short episodes, so the rollout restarts finished ones too
+    events = make_events(30)
+    context = EventContext(events, user)
+    venv = VectorizedEventRecommendationEnv.from_users(events, [user] * 4, context=context)
+    assert venv.context is context
+    actions = random_actions(80, 4, venv.action_space, seed=1)
+    # Same trajectories as four environments that each built their own context
+    expected = rollout_single([EventRecommendationEnv(events, user) for _ in range(4)], actions)
+    assert_same_trajectory(rollout_vectorized(venv, actions), expected)
+
+
+
+def test_shared_context_step_matches_single_environments():
+    events = make_events(30)
+    venv = VectorizedEventRecommendationEnv.shuffled(events, make_user(1), num_envs=6, seed=3)
+    assert venv.context is not None  # takes the batched _step_shared path
+    actions = random_actions(120, 6, venv.action_space, seed=2)
+    # Some out-of-range actions, which end the episode with -1
+    actions[::17, 1] = len(venv.context.events) + 3
+
+    singles = [EventRecommendationEnv(events, env.user, context=venv.context, order=env.order) for env in venv.envs]
+    expected = rollout_single(singles, actions)
+    actual = rollout_vectorized(venv, actions)
+    assert sum(dones.sum() for _, _, dones in actual[1:]) > 10
+    for (states, rewards, dones), (want_states, want_rewards, want_dones) in zip(actual, expected):
+        np.testing.assert_array_equal(states, want_states)
+        if want_rewards is not None:
+            np.testing.assert_array_equal(rewards, want_rewards)
+            np.testing.assert_array_equal(dones, want_dones)
+
+
+@pytest.mark.parametrize("price_range", ['$', '$$', '$$$', 'irrelevant', 'unbounded'])
+@pytest.mark.parametrize("crowd_size", ['Small', 'Medium', 'Large', 'irrelevant'])
+def test_precomputed_arrays_match_the_scalar_scoring(price_range, crowd_size, monkeypatch):
+    # Price bands without an upper bound (max == inf), like the 'Large' crowd size
+    monkeypatch.setitem(PRICE_RANGES, 'unbounded', {'min': 40, 'max': float('inf')})
+    user = make_user(1)
+    user['Price Range'], user['Preferred Crowd Size'] = price_range, crowd_size
+    context = EventContext(edge_case_events(), user)
+
+    for index, event in context.events.iterrows():
+        expected = context._reward_info(event)
+        np.testing.assert_allclose(context.rewards[index], expected['total'], rtol=1e-12)
+        np.testing.assert_allclose(context.reward_scores[index], [expected['scores'][k] for k in REWARD_SCORES],
+                                   rtol=1e-12)
+        np.testing.assert_allclose(context.reward_components[index],
+                                   [expected['components'][k] for k in REWARD_COMPONENTS], rtol=1e-12)
+        assert context.reward_info(index)['scores'] == pytest.approx(expected['scores'])
+        np.testing.assert_allclose(context.features[index], np.float32(scalar_features(context, event)),
+                                   rtol=1e-6)
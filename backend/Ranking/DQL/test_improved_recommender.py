@@ -0,0 +1,33 @@
+import random
+
+import numpy as np
+import torch
+
+from improved_recommender import ImprovedEventRecommenderDQN
+from test_environment import make_events, make_user
+
+
+class RecordingAnalytics:
+    def __init__(self):
+        self.episodes = []
+
+    def add_episode_data(self, **episode):
+        self.episodes.append(episode)
+
+
+def test_vectorized_training_reports_each_episodes_actions():
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+    events = make_events(60)
+    recommender = ImprovedEventRecommenderDQN(5, 40, make_user(1), events)
+    recommender.analytics = RecordingAnalytics()
+
+    finished = recommender.train_vectorized(12, num_envs=4, seed=0)
+
+    episodes = recommender.analytics.episodes
+    assert len(episodes) >= 12
+    for (reward, length), episode in zip(finished, episodes):
+        assert (episode['reward'], episode['episode_length']) == (reward, length)
+        assert len(episode['actions']) == length
+        assert all(0 <= action < 40 for action in episode['actions'])
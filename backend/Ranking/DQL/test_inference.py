@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+import torch
+
+from DQL import QNetwork
+from inference import export_inference_model, load_inference_model, predict, save_inference_model
+
+
+@pytest.fixture
+def network():
+    torch.manual_seed(0)
+    network = QNetwork(5, 40)
+    network.eval()
+    return network
+
+
+@pytest.fixture
+def states():
+    return np.random.default_rng(0).uniform(-1, 1, size=(17, 5)).astype(np.float32)
+
+
+def expected_q_values(network, states):
+    with torch.no_grad():
+        return network(torch.from_numpy(states)).numpy()
+
+
+@pytest.mark.parametrize("mode", ['eager', 'script'])
+def test_exports_predict_like_the_trained_network(network, states, mode):
+    model = export_inference_model(network, mode)
+    q_values = predict(model, states)
+    assert q_values.shape == (17, 40) and q_values.dtype == np.float32
+    np.testing.assert_allclose(q_values, expected_q_values(network, states), rtol=1e-5, atol=1e-6)
+    # A single state works as a batch of one
+    np.testing.assert_allclose(predict(model, states[:1]), expected_q_values(network, states[:1]),
+                               rtol=1e-5, atol=1e-6)
+
+
+def test_saved_model_round_trips(network, states, tmp_path):
+    # Exported from the saved state dict, as serving does
+    weights = tmp_path / "q_network.pth"
+    torch.save(network.state_dict(), weights)
+    path = str(tmp_path / "q_network.pt")
+    save_inference_model(export_inference_model(weights, 'script'), path)
+
+    loaded = load_inference_model(path)
+    np.testing.assert_allclose(predict(loaded, states), expected_q_values(network, states), rtol=1e-5, atol=1e-6)
+
+
+@pytest.mark.parametrize("mode", ['eager', 'compile'])
+def test_only_scripted_exports_can_be_saved(network, tmp_path, mode):
+    with pytest.raises(TypeError, match="mode='script'"):
+        save_inference_model(export_inference_model(network, mode), str(tmp_path / "q_network.pt"))
+    assert not (tmp_path / "q_network.pt").exists()
+
+
+def test_unknown_export_mode_is_rejected(network):
+    with pytest.raises(ValueError):
+        export_inference_model(network, 'onnx')
@@ -0,0 +1,123 @@
+import numpy as np
+import torch
+
+from DQL import PrioritizedReplayBuffer, ReplayBuffer, SumTree
+
+STATE_SIZE = 5
+
+
+def transitions(start, count):
+    """Rows whose every field encodes the transition number, so slots can be traced."""
+    ids = np.arange(start, start + count)
+    states = np.repeat(ids[:, None], STATE_SIZE, axis=1).astype(np.float64)
+    return states, ids, ids * 0.5, states + 0.25, ids % 2 == 0
+
+
+def test_add_batch_wraps_around():
+    buffer = ReplayBuffer(buffer_size=5, batch_size=2, seed=0)
+    buffer.add_batch(*transitions(0, 3))
+    indices = buffer.add_batch(*transitions(3, 4))
+
+    assert indices.tolist() == [3, 4, 0, 1]
+    assert (buffer.position, len(buffer)) == (2, 5)
+    assert buffer.actions.tolist() == [5, 6, 2, 3, 4]
+    assert buffer.states[:, 0].tolist() == [5, 6, 2, 3, 4]
+    assert buffer.next_states[:, 0].tolist() == [5.25, 6.25, 2.25, 3.25, 4.25]
+    assert buffer.dones.tolist() == [0.0, 1.0, 1.0, 0.0, 1.0]
+
+
+def test_add_batch_larger_than_the_buffer_keeps_the_newest_rows():
+    buffer = ReplayBuffer(buffer_size=4, batch_size=2, seed=0)
+    buffer.add(*(field[0] for field in transitions(0, 1)))
+    buffer.add_batch(*transitions(1, 6))
+
+    assert (buffer.position, len(buffer)) == (3, 4)
+    assert sorted(buffer.actions.tolist()) == [3, 4, 5, 6]
+    assert buffer.actions[buffer.position - 1] == 6
+
+
+def test_sample_indices_stay_within_filled_slots():
+    buffer = ReplayBuffer(buffer_size=100, batch_size=8, seed=0)
+    buffer.add_batch(*transitions(0, 10))
+    for _ in range(200):
+        indices = buffer.sample_indices()
+        assert len(indices) == 8 and len(set(indices.tolist())) == 8
+        assert indices.min() >= 0 and indices.max() < 10
+    # Never more than what's stored
+    assert len(buffer.sample_indices(batch_size=50)) == 10
+
+
+def test_gather_returns_training_ready_arrays():
+    buffer = ReplayBuffer(buffer_size=16, batch_size=4, seed=0)
+    buffer.add_batch(*transitions(0, 6))
+    states, actions, rewards, next_states, dones = buffer.sample()
+
+    assert states.shape == next_states.shape == (4, STATE_SIZE)
+    assert actions.shape == rewards.shape == dones.shape == (4,)
+    assert states.dtype == next_states.dtype == rewards.dtype == dones.dtype == np.float32
+    assert actions.dtype == np.int64
+    for array in (states, actions, rewards, next_states, dones):
+        assert array.flags['C_CONTIGUOUS']
+    # Each row still belongs to the same transition
+    assert np.array_equal(states[:, 0], actions.astype(np.float32))
+    assert np.array_equal(rewards, actions * np.float32(0.5))
+    assert torch.from_numpy(actions).dtype == torch.int64
+
+
+def test_sum_tree_prefix_sum_lookup():
+    tree = SumTree(5)
+    assert tree.capacity == 8
+    tree.update(np.arange(5), [1.0, 2.0, 3.0, 4.0, 0.5])
+    assert tree.total == 10.5
+
+    indices, priorities = tree.find([0.0, 0.99, 1.0, 2.5, 3.0, 5.99, 6.0, 9.99, 10.0, 10.49])
+    assert indices.tolist() == [0, 0, 1, 1, 2, 2, 3, 3, 4, 4]
+    assert priorities.tolist() == [1.0, 1.0, 2.0, 2.0, 3.0, 3.0, 4.0, 4.0, 0.5, 0.5]
+
+
+def test_sum_tree_update_refreshes_ancestors():
+    tree = SumTree(4)
+    tree.update(np.arange(4), [1.0, 1.0, 1.0, 1.0])
+    tree.update([2, 0], [5.0, 0.5])
+
+    assert tree.total == 7.5
+    assert tree.tree[2:4].tolist() == [1.5, 6.0]
+    assert tree.find([1.49, 1.5, 6.49, 6.5])[0].tolist() == [1, 2, 2, 3]
+
+
+def test_sum_tree_never_lands_on_an_empty_leaf():
+    # Subtracting the left sums leaves a remainder that rounds past the last filled leaf
+    tree = SumTree(4)
+    tree.update(np.arange(3), [0.11751813128725193, 0.2611819940200839, 0.6175113408910031])
+    indices, priorities = tree.find([np.nextafter(tree.total, 0)])
+    assert (indices[0], priorities[0]) == (2, 0.6175113408910031)
+
+    rng = np.random.default_rng(0)
+    for _ in range(2000):
+        tree = SumTree(8)
+        filled = int(rng.integers(1, 8))
+        tree.update(np.arange(filled), rng.uniform(0.01, 1.0, filled))
+        # The largest value sample_batch draws, plus a spread below it
+        values = np.append(rng.uniform(0.0, tree.total, 16), np.nextafter(tree.total, 0))
+        indices, priorities = tree.find(values)
+        assert indices.max() < filled
+        assert priorities.min() > 0
+
+
+def test_prioritized_weights_are_normalised_importance_weights():
+    buffer = PrioritizedReplayBuffer(buffer_size=10, batch_size=6, alpha=1.0, beta_start=0.5,
+                                     beta_steps=10, epsilon=0.0, seed=0)
+    buffer.add_batch(*transitions(0, 6))
+    buffer.update_priorities(np.arange(6), [1.0, 1.0, 2.0, 2.0, 4.0, 4.0])
+    beta = buffer.beta
+    batch, indices, weights = buffer.sample_batch()
+
+    assert indices.max() < len(buffer)
+    probabilities = buffer.tree.tree[indices + buffer.tree.capacity] / buffer.tree.total
+    expected = (len(buffer) * probabilities) ** -beta
+    np.testing.assert_allclose(weights, expected / expected.max(), rtol=1e-6)
+    assert weights.dtype == np.float32 and weights.max() == 1.0
+    # Rarely drawn transitions get the largest correction
+    assert weights[np.argmin(probabilities)] == 1.0
+    assert buffer.sample_batch()[0][0].shape == (6, STATE_SIZE)
+    assert buffer.beta > beta
@@ -4,18 +4,19 @@ This module implements user simulation and hybrid reward calculation for event r
 """
 
 from config import *
-from Event_Ranking_Environment import EventRecommendationEnv
+from Event_Ranking_Environment import EventContext
 
 
 class SimulatedUserFeedback:
-    def __init__(self, user, events_df, preference_drift=0.1, analytics=None):
+    def __init__(self, user, events_df, preference_drift=0.1, analytics=None, context=None):
         # Make a deep copy of the user data to prevent warnings and potential issues
         self.user = user.copy() if isinstance(user, pd.Series) else user
         self.preference_drift = preference_drift
         self.events_df = events_df
         self.interaction_history = []
         self.analytics = analytics
-        self.env = EventRecommendationEnv(events_df, user)
+        # Shared with the reward system when one owns it; the simulator itself doesn't score events
+        self.context = context
 
         # Handle Preferred Events
         if isinstance(self.user['Preferred Events'], str):
@@ -187,9 +188,9 @@ class SimulatedUserFeedback:
 
 
 class HybridRewardSystem:
-    def __init__(self, user, events_df):
-        self.env = EventRecommendationEnv(events_df, user)
-        self.simulated_user = SimulatedUserFeedback(user, events_df)
+    def __init__(self, user, events_df, context=None):
+        self.context = context if context is not None else EventContext(events_df, user)
+        self.simulated_user = SimulatedUserFeedback(user, events_df, context=self.context)
         self.user_id = user['User ID']
 
         # Base weights for personalized vs interaction rewards
@@ -264,7 +265,7 @@ class HybridRewardSystem:
         current_weights = self.get_adjusted_weights()
 
         # Get personalized reward using environment with adjusted weights
-        personalized_reward, reward_info = self.env.calculate_reward(event)
+        personalized_reward, reward_info = self.context.calculate_reward(event)
 
         # Get interaction reward and update weights
         interactions = self.simulated_user.simulate_interaction(event)
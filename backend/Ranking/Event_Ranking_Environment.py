@@ -2,26 +2,47 @@ from scipy.cluster.hierarchy import weighted
 
 from config import *
 
-class EventRecommendationEnv:
+# Columns summarised per event type, in the order of the type_stats array's second axis
+STAT_COLUMNS = {
+    'price_stats': 'Price ($)',
+    'distance_stats': 'Distance (km)',
+    'popularity_stats': 'Popularity',
+    'time_stats': 'Time Until Event (hrs)',
+}
+STAT_FIELDS = ('mean', 'min', 'max', 'std')
+
+# Field scores behind the reward, and the weights of those that count towards it
+REWARD_SCORES = ('event_type', 'distance', 'time', 'popularity', 'price')
+REWARD_WEIGHTS = {
+    'event_type': 0.40,  # Most important
+    'distance': 0.25,  # Second most important
+    'price': 0.15,  # Third most important
+    'time': 0.20,  # Equal to price
+}
+REWARD_COMPONENTS = tuple(REWARD_WEIGHTS)
+
+class EventContext:
     """
-    Environment for event recommendation reinforcement learning.
+    Immutable per-user view of an event set: the filtered events, their
+    statistics and every event's precomputed features, states and rewards.
+
+    Building one is the expensive part of setting up an environment, so the
+    recommender, its reward system and the simulated user share a single
+    context; episode state lives in EventRecommendationEnv. Treat the events
+    frame as read-only too, since every holder of the context sees it.
 
     Attributes:
         events (pd.DataFrame): Event data
         user (pd.Series): User preferences
-        current_event_index (int): Current position in event list
-        done (bool): Episode completion status
         max_events (int): Total number of available events
+        features (np.ndarray): (n_events, 5) precomputed get_event_features rows
+        rewards (np.ndarray): (n_events,) precomputed rewards
     """
-    def __init__(self, events_df, user, analytics=None):
-        debug_print(f"Initializing EventRecommendationEnv with {len(events_df)} events")
+    def __init__(self, events_df, user):
+        debug_print(f"Initializing EventContext with {len(events_df)} events")
         self.events = events_df.reset_index(drop=True)  # DataFrame containing the event data
         self.user = user  # User preferences (from users.csv)
-        self.current_event_index = 0  # Track which event we are recommending
-        self.done = False  # Whether the episode is over
         self.max_events = len(events_df)  # Total number of events available
-        self.analytics = analytics
-        debug_print(f"Analytics object initialized: {self.analytics is not None}")
 
         # Convert 'Date/Time' to timestamp for filtering
         current_time = get_timestamp()
@@ -72,6 +93,12 @@ class EventRecommendationEnv:
         debug_print(f"Preferred events: {self.preferred_set}")
         debug_print(f"Undesirable events: {self.undesirable_set}")
 
+        # The event set is fixed for the context's lifetime, so score every event once up front
+        self.precompute_event_arrays()
+        for array in (self.features, self.states, self.rewards, self.reward_scores, self.reward_components,
+                      self.type_stats, self.event_type_codes):
+            array.flags.writeable = False
+
 
     def filter_invalid_events(self, events):
         """Remove past events from consideration."""
@@ -93,7 +120,10 @@ class EventRecommendationEnv:
         if self.events['Date/Time'].dt.tz is None:
             self.events['Date/Time'] = self.events['Date/Time'].dt.tz_localize('UTC')
 
-        self.current_time = get_current_time()
+        self.current_time = pd.Timestamp(get_current_time())
+        # Event times were made UTC-aware above; a naive clock reading is UTC too
+        if self.current_time.tzinfo is None:
+            self.current_time = self.current_time.tz_localize('UTC')
 
         # Compute 'Time Until Event' in hours
         self.events['Time Until Event (hrs)'] = (self.events['Date/Time'] - self.current_time).dt.total_seconds() / 3600.0
@@ -104,67 +134,37 @@ class EventRecommendationEnv:
         # Calculate max popularity for use in scoring popularity
         self.max_popularity = self.events['Popularity'].max()
 
-        # Precompute cached statistics for each event type
-        self.event_type_stats_cache = {}
-        for event_type in self.events['Event Type'].unique():
-            if pd.notna(event_type):
-                event_data = self.events[self.events['Event Type'] == event_type]
-
-                # Cache stats for price, distance, popularity, and time until event
-                self.event_type_stats_cache[event_type] = {
-                    'price_stats': {
-                        'mean': event_data['Price ($)'].mean(),
-                        'min': event_data['Price ($)'].min(),
-                        'max': event_data['Price ($)'].max(),
-                        'std': event_data['Price ($)'].std() or 1e-5
-                    },
-                    'distance_stats': {
-                        'mean': event_data['Distance (km)'].mean(),
-                        'min': event_data['Distance (km)'].min(),
-                        'max': event_data['Distance (km)'].max(),
-                        'std': event_data['Distance (km)'].std() or 1e-5
-                    },
-                    'popularity_stats': {
-                        'mean': event_data['Popularity'].mean(),
-                        'min': event_data['Popularity'].min(),
-                        'max': event_data['Popularity'].max(),
-                        'std': event_data['Popularity'].std() or 1e-5
-                    },
-                    'time_stats': {
-                        'mean': event_data['Time Until Event (hrs)'].mean(),
-                        'min': event_data['Time Until Event (hrs)'].min(),
-                        'max': event_data['Time Until Event (hrs)'].max(),
-                        'std': event_data['Time Until Event (hrs)'].std() or 1e-5
-                    }
-                }
-
-        # Global fallback stats
-        self.global_stats = {
-            'price_stats': {
-                'mean': self.events['Price ($)'].mean(),
-                'min': self.events['Price ($)'].min(),
-                'max': self.events['Price ($)'].max(),
-                'std': self.events['Price ($)'].std() or 1e-5
-            },
-            'distance_stats': {
-                'mean': self.events['Distance (km)'].mean(),
-                'min': self.events['Distance (km)'].min(),
-                'max': self.events['Distance (km)'].max(),
-                'std': self.events['Distance (km)'].std() or 1e-5
-            },
-            'popularity_stats': {
-                'mean': self.events['Popularity'].mean(),
-                'min': self.events['Popularity'].min(),
-                'max': self.events['Popularity'].max(),
-                'std': self.events['Popularity'].std() or 1e-5
-            },
-            'time_stats': {
-                'mean': self.events['Time Until Event (hrs)'].mean(),
-                'min': self.events['Time Until Event (hrs)'].min(),
-                'max': self.events['Time Until Event (hrs)'].max(),
-                'std': self.events['Time Until Event (hrs)'].std() or 1e-5
+        # Integer code per event type; missing types get -1 until mapped to the global row below
+        codes, self.event_type_names = pd.factorize(self.events['Event Type'])
+        n_types = len(self.event_type_names)
+        self.event_type_codes = np.where(codes < 0, n_types, codes)
+
+        # One groupby over every type plus the same reductions over all events, as
+        # (n_types + 1, columns, fields) with the global row last
+        stat_frame = self.events[list(STAT_COLUMNS.values())]
+        grouped = stat_frame[codes >= 0].groupby(codes[codes >= 0])
+        per_type = np.stack([
+            getattr(grouped, field)().reindex(range(n_types)).to_numpy(dtype=np.float64)
+            for field in STAT_FIELDS
+        ], axis=-1)
+        overall = np.stack([getattr(stat_frame, field)().to_numpy(dtype=np.float64) for field in STAT_FIELDS], axis=-1)
+        stats = np.concatenate([per_type, overall[np.newaxis]])
+        # A zero spread would divide by zero downstream
+        std = STAT_FIELDS.index('std')
+        stats[..., std] = np.where(stats[..., std] == 0, 1e-5, stats[..., std])
+        self.type_stats = stats
+
+        # Dict views of the same numbers for callers that look stats up by name
+        def stats_dict(row):
+            return {
+                stat: {field: row[i, j] for j, field in enumerate(STAT_FIELDS)}
+                for i, stat in enumerate(STAT_COLUMNS)
             }
+
+        self.event_type_stats_cache = {
+            event_type: stats_dict(stats[code]) for code, event_type in enumerate(self.event_type_names)
         }
+        self.global_stats = stats_dict(stats[n_types])
 
     def process_user_preferences(self):
         """Process and store user preferences for efficient access."""
@@ -191,123 +191,85 @@ class EventRecommendationEnv:
         debug_print(f"Preferred events: {self.user_preferred_events}")
         debug_print(f"Undesirable events: {self.user_undesirable_events}")
 
-    def reset(self):
-        """Reset the environment and return the first event's features."""
-        self.current_event_index = 0
-        self.done = False
-        return self.get_event_features(self.current_event_index)
-
-    def step(self, action):
-        """Take an action (recommend an event) and return the next state, reward, and done flag."""
-        if action >= len(self.events):
-            self.done = True
-            return np.zeros(self.observation_space), -1, True
-
-        event = self.events.iloc[action]
-        reward, reward_info = self.calculate_reward(event)  # Now getting both reward and info
-
-        # Store the components
-        self.last_reward_components = reward_info['components']  # This contains the detailed components
-
-        # Track analytics if available
-        if hasattr(self, 'analytics') and self.analytics is not None:
-            # Create state data dictionary
-            state_data = {
-                'current_event_index': self.current_event_index,
-                'action_taken': action,
-                'event_id': event['Event ID'],
-                'event_type': event['Event Type'],
-                'reward_components': self.last_reward_components,
-                'features': self.get_event_features(self.current_event_index)
-            }
-
-            # Track the state transition in analytics
-            self.analytics.track_environment_state(state_data, action, reward, self.done)
-
-        # Early termination for very bad recommendations
-        if reward < -0.8:  # Normalized threshold
-            self.done = True
-            return np.zeros(self.observation_space), reward, True
-
-        # Only log steps occasionally to reduce output
-        if random.random() < 0.01:  # 1% chance to log
-            debug_print(f"Step taken - Action: {action}, Reward: {reward:.2f}")
-
-        self.current_event_index += 1
-
-        if self.current_event_index >= self.max_events:
-            self.done = True
-            return np.zeros(self.observation_space), reward, True
+    def precompute_event_arrays(self):
+        """
+        Score every event once so stepping the environment is array indexing.
+
+        Builds:
+            features (np.ndarray): (n_events, 5) float32, the rows get_event_features returns
+            states (np.ndarray): (n_events, 5) float32, the rows get_state returns
+            rewards (np.ndarray): (n_events,) reward for recommending each event
+            reward_scores (np.ndarray): (n_events, len(REWARD_SCORES)) raw field scores
+            reward_components (np.ndarray): (n_events, len(REWARD_COMPONENTS)) weighted scores summing to rewards
+        """
+        events = self.events
+        n_events = len(events)
+        price = events['Price ($)'].to_numpy(dtype=np.float64)
+        popularity = events['Popularity'].to_numpy(dtype=np.float64)
+        distance = events['Distance (km)'].to_numpy(dtype=np.float64)
+        hours = events['Time Until Event (hrs)'].to_numpy(dtype=np.float64)
+
+        # Per-type fallbacks for missing values; missing types index the global row
+        means = self.type_stats[self.event_type_codes, :, STAT_FIELDS.index('mean')]
+
+        def fallback_means(stat):
+            return means[:, list(STAT_COLUMNS).index(stat)]
+
+        type_scores = [self.score_event_type({'Event Type': t}) for t in self.event_type_names]
+        type_score = np.array(type_scores + [-50], dtype=np.float64)[self.event_type_codes]
+
+        distance_filled = np.where(np.isnan(distance), fallback_means('distance_stats'), distance)
+        hours_filled = np.where(np.isnan(hours) | (hours < 0), fallback_means('time_stats'), hours)
+        popularity_filled = np.where(np.isnan(popularity), fallback_means('popularity_stats'), popularity)
+        price_filled = np.where(np.isnan(price), fallback_means('price_stats'), price)
+
+        features = np.column_stack([
+            type_score,
+            self.score_minimize_array(distance_filled, 0, self.max_distance * 2),
+            self.score_minimize_array(hours_filled, 0, self.max_time_difference),
+            self.score_popularity_array(popularity_filled),
+            self.score_price_array(price_filled),
+        ])
+
+        # Out-of-range price or crowd size replaces the whole feature row (price checked first)
+        if self.user['Price Range'] != 'irrelevant':
+            over_budget = ~np.isnan(price) & (price > self.get_price_range(self.user['Price Range'])['max'])
         else:
-            next_state = self.get_event_features(self.current_event_index)
-
-        return next_state, reward, self.done
+            over_budget = np.zeros(n_events, dtype=bool)
+        if self.user['Preferred Crowd Size'] != 'irrelevant':
+            pop_range = self.get_popularity_range(self.user['Preferred Crowd Size'])
+            wrong_crowd = ~np.isnan(popularity) & ((popularity < pop_range['min']) | (popularity > pop_range['max']))
+        else:
+            wrong_crowd = np.zeros(n_events, dtype=bool)
+        features[wrong_crowd] = -0.5
+        features[over_budget] = -1
+        self.features = features.astype(np.float32)
+
+        # The same scores calculate_reward takes per event, in REWARD_SCORES order
+        scores = np.column_stack([
+            type_score,
+            self.score_distance_array(distance),
+            self.score_time_array(hours),
+            self.score_popularity_array(popularity),
+            self.score_price_array(price),
+        ])
+        self.reward_scores = scores
+        weights = np.array(list(REWARD_WEIGHTS.values()))
+        self.reward_components = scores[:, [REWARD_SCORES.index(c) for c in REWARD_COMPONENTS]] * weights
+        self.rewards = self.reward_components.sum(axis=1)
+
+        state_columns = [REWARD_SCORES.index(c) for c in ('popularity', 'price', 'distance', 'time', 'event_type')]
+        self.states = np.nan_to_num(scores[:, state_columns] / 100,
+                                    nan=0.0, posinf=1.0, neginf=-1.0).astype(np.float32)
+        debug_print(f"Precomputed features and rewards for {n_events} events")
 
     def get_event_features(self, event_index):
         """Extract field scores for the event at the given index."""
         try:
-            event = self.events.iloc[event_index]
-            features = []
-
-            # Get cached stats for the event type, fallback to global stats if necessary
-            event_type = event['Event Type']
-            cached_stats = self.event_type_stats_cache.get(event_type, self.global_stats) if pd.notna(
-                event_type) else self.global_stats
-
-            # Apply strict filtering for price and popularity first
-            price = event['Price ($)']
-            popularity = event['Popularity']
-
-            # Strong penalties for out-of-range values
-            if not pd.isna(price) and self.user['Price Range'] != 'irrelevant':
-                price_range = self.get_price_range(self.user['Price Range'])
-                if price > price_range['max']:
-                    features = [-1] * 5  # Strong penalty
-                    return np.array(features, dtype=np.float32)
-
-            if not pd.isna(popularity) and self.user['Preferred Crowd Size'] != 'irrelevant':
-                pop_range = self.get_popularity_range(self.user['Preferred Crowd Size'])
-                if popularity < pop_range['min'] or popularity > pop_range['max']:
-                    features = [-.50] * 5  # Moderate penalty
-                    return np.array(features, dtype=np.float32)
-
-            # 1. Event Type Score (using fallback)
-            event_type_score = self.score_event_type(event)
-            features.append(event_type_score)
-
-            # 2. Distance Score (use cached mean if missing)
-            distance = event['Distance (km)']
-            distance = distance if not pd.isna(distance) else cached_stats['distance_stats']['mean']
-            distance_score = self.score_minimize(distance, 0, self.max_distance * 2)
-            features.append(distance_score)
-
-            # 3. Time Score (fallback to mean time if missing or event in the past)
-            time_until_event = event['Time Until Event (hrs)']
-            time_until_event = time_until_event if not pd.isna(time_until_event) and time_until_event >= 0 else \
-            cached_stats['time_stats']['mean']
-            time_score = self.score_minimize(time_until_event, 0, self.max_time_difference)
-            features.append(time_score)
-
-            # 4. Popularity Score (use cached popularity mean if missing)
-            popularity = event['Popularity']
-            popularity = popularity if not pd.isna(popularity) else cached_stats['popularity_stats']['mean']
-            popularity_score = self.score_popularity(popularity)
-            features.append(popularity_score)
-
-            # 5. Price Score (use cached mean price if missing)
-            price = event['Price ($)']
-            price = price if not pd.isna(price) else cached_stats['price_stats']['mean']
-            price_score = self.score_price_relative(price, event_type)
-            features.append(price_score)
-
-            feature_vector = np.array(features, dtype=np.float32)
-            debug_print(f"Extracted features for event {event_index}: {feature_vector}")
-            debug_print(f"get_event_features output - index: {event_index}, shape: {feature_vector}")
-            return feature_vector
-
-        except Exception as e:
-            logging.error(f"Error extracting features for event {event_index}: {str(e)}")
-            return np.zeros(6, dtype=np.float32)  # Return zero vector on error
+            return self.features[event_index].copy()
+        except IndexError:
+            logging.error(f"Error extracting features for event {event_index}: index out of range")
+            return np.zeros(self.observation_space, dtype=np.float32)  # Return zero vector on error
 
     # Scoring Functions
     def score_event_type(self, event):
@@ -471,6 +433,61 @@ class EventRecommendationEnv:
                 return 0.0
             return -1.0  # More than 30% above
 
+    # Array versions of the scoring functions, used to precompute every event at once
+    @staticmethod
+    def score_minimize_array(values, best_value, worst_value):
+        """score_minimize over an array."""
+        normalized = (values - best_value) / (worst_value - best_value)
+        return np.where(values <= best_value, 1.0,
+                        np.where(values >= worst_value, -1.0, np.exp(-5 * normalized)))
+
+    def score_distance_array(self, distances):
+        """score_distance over an array."""
+        max_distance = self.user['Max Distance (km)']
+        within = 1 - distances / max_distance
+        over = np.maximum(-1, -(distances - max_distance) / max_distance)
+        return np.where(np.isnan(distances), 0.0, np.where(distances <= max_distance, within, over))
+
+    @staticmethod
+    def score_time_array(hours):
+        """score_time over an array of hours until each event."""
+        max_preferred_time = 336
+        within = 1 - hours / max_preferred_time
+        over = np.maximum(-.50, -.25 * (hours - max_preferred_time) / max_preferred_time)
+        scores = np.where(hours <= max_preferred_time, within, over)
+        return np.where(np.isnan(hours) | (hours < 0), -1.0, scores)
+
+    def score_popularity_array(self, popularity):
+        """score_popularity over an array."""
+        crowd_pref = self.user['Preferred Crowd Size']
+        if crowd_pref == 'irrelevant':
+            return np.zeros(len(popularity))
+        pop_range = self.get_popularity_range(crowd_pref)
+        min_pop, max_pop = pop_range['min'], pop_range['max']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            below = np.where((min_pop - popularity) / min_pop <= 0.3, 0.5, -1.0)
+            above = np.where((popularity - max_pop) / max_pop <= 0.3, 0.5, -1.0) if crowd_pref != 'Large' else 1.0
+        scores = np.where(popularity < min_pop, below, np.where(popularity > max_pop, above, 1.0))
+        return np.where(np.isnan(popularity), 0.0, scores)
+
+    def score_price_array(self, prices):
+        """score_price_relative over an array."""
+        user_price_pref = self.user['Price Range']
+        if user_price_pref == 'irrelevant':
+            scores = np.zeros(len(prices))
+        else:
+            price_range = self.get_price_range(user_price_pref)
+            min_price, max_price = price_range['min'], price_range['max']
+            with np.errstate(divide='ignore', invalid='ignore'):
+                below = np.where((min_price - prices) / min_price <= 0.3, 0.5, 0.0)
+                if max_price == float('inf'):
+                    above = np.zeros(len(prices))
+                else:
+                    above = np.where((prices - max_price) / max_price <= 0.3, 0.0, -1.0)
+            scores = np.where(prices < min_price, below, np.where(prices > max_price, above, 1.0))
+        scores = np.where(prices == 0, 1.0, scores)
+        return np.where(np.isnan(prices), 0.0, scores)
+
     def score_minimize(self, value, best_value, worst_value):
         """Score a value where lower is better."""
         if value <= best_value:
@@ -505,14 +522,37 @@ class EventRecommendationEnv:
 
     def calculate_reward(self, event):
         """Compute the total reward as the weighted average of individual field scores."""
-        # Extract feature scores with weights
-        weights = {
-            'event_type': 0.40,  # Most important
-            'distance': 0.25,  # Second most important
-            'price': 0.15,  # Third most important
-            'time': 0.20,  # Equal to price
+        reward_info = self._reward_info(event)
+        return reward_info['total'], reward_info
+
+    def calculate_rewards(self, indices):
+        """
+        Batched calculate_reward for events by index, e.g. a policy's whole ranking.
+
+        Args:
+            indices (np.ndarray): Event indices into self.events
+
+        Returns:
+            tuple: rewards (n,) and the (n, len(REWARD_COMPONENTS)) weighted components
+                they sum, columns in REWARD_COMPONENTS order
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return self.rewards[indices], self.reward_components[indices]
+
+    def reward_info(self, index):
+        """calculate_reward's info dict for the event at `index`, from the precomputed arrays."""
+        return {
+            'total': self.rewards[index],
+            'components': dict(zip(REWARD_COMPONENTS, self.reward_components[index].tolist())),
+            'weights': dict(REWARD_WEIGHTS),
+            'scores': dict(zip(REWARD_SCORES, self.reward_scores[index].tolist())),
         }
 
+    def _reward_info(self, event):
+        """Weighted reward and its components for one event."""
+        # Extract feature scores with weights
+        weights = dict(REWARD_WEIGHTS)
+
         scores = {
             'event_type': self.score_event_type(event),
             'distance': self.score_distance(event['Distance (km)']),
@@ -531,17 +571,10 @@ class EventRecommendationEnv:
         reward_info = {
             'total': weighted_reward,
             'components': weighted_components,
-            'weights': weights
+            'weights': weights,
+            'scores': scores
         }
 
-        # Debug print to verify data
-        debug_print(f"Sending reward info to analytics: {reward_info}")
-
-        # Call analytics
-        if hasattr(self, 'analytics') and self.analytics is not None:
-            self.analytics.track_reward_calculation(event, reward_info)
-
-
         if DEBUG_MODE:
             debug_print(f"\nReward breakdown for event {event['Event ID']}:")
             debug_print("\nRaw Scores:")
@@ -552,6 +585,114 @@ class EventRecommendationEnv:
                 debug_print(f"{k}: {weighted_components[k]:.2f}")
             debug_print(f"\nFinal normalized reward: {weighted_reward:.2f}")
 
+        return reward_info
+
+    def get_popularity_range(self, crowd_size):
+        """Get popularity range with case-insensitive lookup."""
+        if pd.isna(crowd_size):
+            return POPULARITY_RANGES['irrelevant']
+        return POPULARITY_RANGES[crowd_size.title()]  # Convert to Title Case
+
+    def get_price_range(self, price_pref):
+        """Get price range with exact match."""
+        if pd.isna(price_pref):
+            return PRICE_RANGES['irrelevant']
+        return PRICE_RANGES[price_pref] # $ signs need exact match
+
+
+
+
+class EventRecommendationEnv:
+    """
+    Environment for event recommendation reinforcement learning.
+
+    Holds only the episode cursor; events, statistics and scoring come from a
+    shared EventContext, and attribute lookups that miss fall through to it.
+
+    Attributes:
+        context (EventContext): Shared events and precomputed scores
+        analytics (TrainingAnalytics): Optional analytics sink
+        current_event_index (int): Current position in event list
+        order (np.ndarray): Event index visited at each position of the episode
+        done (bool): Episode completion status
+    """
+    def __init__(self, events_df, user, analytics=None, context=None, order=None):
+        self.context = context if context is not None else EventContext(events_df, user)
+        self.analytics = analytics
+        debug_print(f"Analytics object initialized: {self.analytics is not None}")
+        self.current_event_index = 0  # Track which event we are recommending
+        self.done = False  # Whether the episode is over
+        self.order = np.arange(self.context.max_events) if order is None else np.asarray(order)
+        self.max_events = len(self.order)  # Episode length cap
+
+    def __getattr__(self, name):
+        # Only called for attributes the environment itself doesn't have
+        if name == 'context':
+            raise AttributeError(name)
+        return getattr(self.context, name)
+
+    def reset(self):
+        """Reset the environment and return the first event's features."""
+        self.current_event_index = 0
+        self.done = False
+        return self.get_event_features(self.order[self.current_event_index])
+
+    def step(self, action):
+        """Take an action (recommend an event) and return the next state, reward, and done flag."""
+        if action >= len(self.events):
+            self.done = True
+            return np.zeros(self.observation_space), -1, True
+
+        reward = self.rewards[action]
+        reward_info = self.reward_info(action)
+
+        # Store the components
+        self.last_reward_components = reward_info['components']  # This contains the detailed components
+
+        # Track analytics if available
+        if hasattr(self, 'analytics') and self.analytics is not None:
+            event = self.events.iloc[action]
+            self.analytics.track_reward_calculation(event, reward_info)
+            # Create state data dictionary
+            state_data = {
+                'current_event_index': self.current_event_index,
+                'action_taken': action,
+                'event_id': event['Event ID'],
+                'event_type': event['Event Type'],
+                'reward_components': self.last_reward_components,
+                'features': self.get_event_features(self.order[self.current_event_index])
+            }
+
+            # Track the state transition in analytics
+            self.analytics.track_environment_state(state_data, action, reward, self.done)
+
+        # Early termination for very bad recommendations
+        if reward < -0.8:  # Normalized threshold
+            self.done = True
+            return np.zeros(self.observation_space), reward, True
+
+        # Only log steps occasionally to reduce output
+        if random.random() < 0.01:  # 1% chance to log
+            debug_print(f"Step taken - Action: {action}, Reward: {reward:.2f}")
+
+        self.current_event_index += 1
+
+        if self.current_event_index >= self.max_events:
+            self.done = True
+            return np.zeros(self.observation_space), reward, True
+        else:
+            next_state = self.get_event_features(self.order[self.current_event_index])
+
+        return next_state, reward, self.done
+
+    def calculate_reward(self, event):
+        """Compute the total reward as the weighted average of individual field scores."""
+        weighted_reward, reward_info = self.context.calculate_reward(event)
+
+        # Call analytics
+        if hasattr(self, 'analytics') and self.analytics is not None:
+            self.analytics.track_reward_calculation(event, reward_info)
+
         return weighted_reward, reward_info
 
     def analyze_recommendation(self, event):
@@ -570,45 +711,11 @@ class EventRecommendationEnv:
 
     def get_state(self):
         """Get normalized state representation."""
-        try:
-            # Get current event using current_event_index
-            if self.current_event_index >= len(self.events):
-                logging.warning("Current event index out of bounds")
-                return np.zeros(5, dtype=np.float32)
-
-            current_event = self.events.iloc[self.current_event_index]
-
-            state = np.array([
-                self.score_popularity(current_event['Popularity']) / 100,  # Normalize to [-1, 1]
-                self.score_price_relative(current_event['Price ($)'],
-                                          current_event['Event Type']) / 100,
-                self.score_distance(current_event['Distance (km)']) / 100,
-                self.score_time(pd.to_datetime(current_event['Date/Time'])) / 100,
-                self.score_event_type(current_event) / 100,
-            ], dtype=np.float32)
-
-            # Replace any NaN values with 0
-            state = np.nan_to_num(state, nan=0.0, posinf=1.0, neginf=-1.0)
-            debug_print(f"Environment state shape: {state.shape}")  # Debug print
-
-            return state
-
-        except Exception as e:
-            logging.error(f"Error in get_state: {str(e)}")
-            return np.zeros(5, dtype=np.float32)  # Return zero state on error
-
-    def get_popularity_range(self, crowd_size):
-        """Get popularity range with case-insensitive lookup."""
-        if pd.isna(crowd_size):
-            return POPULARITY_RANGES['irrelevant']
-        return POPULARITY_RANGES[crowd_size.title()]  # Convert to Title Case
-
-    def get_price_range(self, price_pref):
-        """Get price range with exact match."""
-        if pd.isna(price_pref):
-            return PRICE_RANGES['irrelevant']
-        return PRICE_RANGES[price_pref] # $ signs need exact match
-
+        # Get current event using current_event_index
+        if self.current_event_index >= len(self.events):
+            logging.warning("Current event index out of bounds")
+            return np.zeros(5, dtype=np.float32)
+        return self.states[self.order[self.current_event_index]].copy()
 
     def get_next_model_folder(self):
         """Create and get the next available model folder number."""
@@ -635,3 +742,143 @@ class EventRecommendationEnv:
         return model_folder
 
 
+
+
+class VectorizedEventRecommendationEnv:
+    """
+    B independent EventRecommendationEnv episodes advanced in lockstep.
+
+    States come back as one (B, observation_space) float32 array so the agent
+    can evaluate every episode with a single batched forward. Episodes that
+    finish are restarted by reset_done, which keeps the batch full.
+
+    When every episode shares one EventContext and none feeds analytics, a
+    step is scored with one calculate_rewards call and the episode positions
+    are tracked here rather than in the individual environments.
+
+    Attributes:
+        envs (list): The underlying single-episode environments
+        num_envs (int): Batch size B
+        context (EventContext): The shared context, or None if steps go through each env
+    """
+    def __init__(self, envs):
+        self.envs = list(envs)
+        self.num_envs = len(self.envs)
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = min(len(env.events) for env in self.envs)
+        self.episode_rewards = np.zeros(self.num_envs, dtype=np.float64)
+        self.episode_lengths = np.zeros(self.num_envs, dtype=np.int64)
+
+        self.context = None
+        if (len({id(env.context) for env in self.envs}) == 1
+                and len({env.max_events for env in self.envs}) == 1
+                and all(env.analytics is None for env in self.envs)):
+            self.context = self.envs[0].context
+            self.orders = np.stack([env.order for env in self.envs])
+            self.positions = np.zeros(self.num_envs, dtype=np.int64)
+
+    @classmethod
+    def from_users(cls, events_df, users, analytics=None, context=None):
+        """One episode per user, all over the same events.
+
+        Scores, filtering and statistics depend on the user, so different users
+        can't share an EventContext and such a batch is stepped env by env.
+        Repeats of the same user object share one context, and `context` is
+        reused for episodes of its own user, so a batch of one user still
+        takes the shared fast path.
+        """
+        contexts = {} if context is None else {id(context.user): context}
+        envs = []
+        for user in users:
+            if id(user) not in contexts:
+                contexts[id(user)] = EventContext(events_df, user)
+            envs.append(EventRecommendationEnv(events_df, user, analytics, context=contexts[id(user)]))
+        return cls(envs)
+
+    @classmethod
+    def shuffled(cls, events_df, user, num_envs, seed=None, analytics=None, context=None):
+        """`num_envs` episodes for one user, each walking the events in a different order.
+
+        The episodes share one EventContext, so an action means the same event in every episode.
+        """
+        context = context if context is not None else EventContext(events_df, user)
+        rng = np.random.default_rng(seed)
+        return cls(
+            EventRecommendationEnv(events_df, user, analytics, context=context,
+                                   order=rng.permutation(len(context.events))[:context.max_events])
+            for _ in range(num_envs)
+        )
+
+    def reset(self):
+        """Reset every episode and return the stacked initial states."""
+        self.episode_rewards[:] = 0
+        self.episode_lengths[:] = 0
+        if self.context is not None:
+            self.positions[:] = 0
+        return np.stack([env.reset() for env in self.envs]).astype(np.float32, copy=False)
+
+    def step(self, actions):
+        """
+        Apply one action per episode.
+
+        Args:
+            actions (np.ndarray): (B,) event indices
+
+        Returns:
+            tuple: next states (B, observation_space), rewards (B,), done mask (B,).
+                Finished episodes report the zero terminal state, as EventRecommendationEnv does.
+        """
+        actions = np.asarray(actions)
+        if self.context is not None:
+            next_states, rewards, dones = self._step_shared(actions)
+        else:
+            next_states, rewards, dones = self._step_each(actions)
+        self.episode_rewards += rewards
+        self.episode_lengths += 1
+        return next_states, rewards, dones
+
+    def _step_each(self, actions):
+        next_states = np.zeros((self.num_envs, self.observation_space), dtype=np.float32)
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        for i, (env, action) in enumerate(zip(self.envs, actions.tolist())):
+            next_state, reward, done = env.step(action)
+            next_states[i] = next_state
+            rewards[i] = reward
+            dones[i] = done
+        return next_states, rewards, dones
+
+    def _step_shared(self, actions):
+        valid = actions < len(self.context.events)
+        rewards = np.full(self.num_envs, -1.0)
+        rewards[valid] = self.context.calculate_rewards(actions[valid])[0]
+
+        # Same termination rules as EventRecommendationEnv.step
+        self.positions += 1
+        dones = ~valid | (rewards < -0.8) | (self.positions >= self.orders.shape[1])
+        next_states = np.zeros((self.num_envs, self.observation_space), dtype=np.float32)
+        live = ~dones
+        next_states[live] = self.context.features[self.orders[live, self.positions[live]]]
+        return next_states, rewards.astype(np.float32), dones
+
+    def reset_done(self, states, dones):
+        """
+        Restart finished episodes in place.
+
+        Args:
+            states (np.ndarray): States returned by step
+            dones (np.ndarray): Done mask returned by step
+
+        Returns:
+            tuple: states with finished rows replaced by fresh initial states,
+                and the (rewards, lengths) of the episodes that finished
+        """
+        finished = np.flatnonzero(dones)
+        results = (self.episode_rewards[finished].copy(), self.episode_lengths[finished].copy())
+        for i in finished.tolist():
+            states[i] = self.envs[i].reset()
+        if self.context is not None:
+            self.positions[finished] = 0
+        self.episode_rewards[finished] = 0
+        self.episode_lengths[finished] = 0
+        return states, results
@@ -9,6 +9,10 @@ from config import *
 import sys
 sys.path.append('/app') 
 from quicksort import quick_sort
+from logging_setup import EVENT_LOGGER_NAME
+
+logger = logging.getLogger(__name__)
+event_logger = logging.getLogger(EVENT_LOGGER_NAME)
 
 class EventRanking:
     def __init__(self, debug_mode=True, deep_debug=False):
@@ -26,22 +30,17 @@ class EventRanking:
             'Price': 15
         }
 
-        logging.basicConfig(filename='app.log', level=logging.INFO,
-                            format='%(asctime)s - %(levelname)s - %(message)s')
-
     def debug_print(self, message):
         if self.DEBUG_MODE or self.DEEP_DEBUG:
-            print(message)
-            logging.info(message)
+            logger.debug(message)
 
     def deep_print(self, message):
         if self.DEEP_DEBUG:
-            self.debug_print(message)
-            print(message)
+            logger.debug(message)
 
     @staticmethod
     def log_edge_case(event_id, field_name, fallback_value):
-        logging.info(f"Event {event_id} is missing {field_name}. Fallback value used: {fallback_value}")
+        logger.info(f"Event {event_id} is missing {field_name}. Fallback value used: {fallback_value}")
 
     @staticmethod
     def get_current_time():
@@ -70,14 +69,14 @@ class EventRanking:
             }
             self.debug_print(f"Loaded user {user_id}: Preferences={self.user['Preferences']}, Dislikes={self.user['Disliked']}")
         except Exception as e:
-            logging.error(f"Failed to load user {user_id}: {str(e)}")
+            logger.error(f"Failed to load user {user_id}: {str(e)}")
             raise
 
     def load_events(self, events_df):
         self.events_df = events_df.copy()
         self.debug_print("Columns in events_df before processing: " + ", ".join(self.events_df.columns.tolist()))
         if 'start' not in self.events_df.columns:
-            logging.error("The 'start' column is missing from events_df.")
+            logger.error("The 'start' column is missing from events_df.")
             raise KeyError("The 'start' column is missing from events_df.")
         self.events_df['start'] = pd.to_datetime(self.events_df['start'], errors='coerce').dt.tz_localize(None)
 
@@ -212,15 +211,14 @@ class EventRanking:
             breakdown['Price Score'] = f"{round(price_fraction * self.normalized_weights['Price'], 2)}/{self.normalized_weights['Price']} | Price: {event['amount']}"
             breakdown['Raw Score'] = f"{final_score}/100"
             breakdown['Penalized Score'] = f"{penalized_score}/100"
-            event_info = f"Event ID: {event['contentId']} | Final Score: {penalized_score}/100"
-            self.debug_print(event_info)
-            for key, value in breakdown.items():
-                self.debug_print(f"    {key}: {value}")
-            self.debug_print("-" * 50)
+            event_logger.debug(
+                f"Event ID: {event['contentId']} | Final Score: {penalized_score}/100",
+                extra={"content_id": event['contentId'], "breakdown": breakdown}
+            )
             return final_score, penalized_score, breakdown
         return final_score, penalized_score
 
-    def rank_events(self, user):
+    def score_events(self, user):
         event_scores_detailed = []
         event_scores = []
         for index, event in self.events_df.iterrows():
@@ -231,6 +229,9 @@ class EventRanking:
                 raw_score, final_score = self.calculate_score(user, event)
                 event_scores_detailed.append((event['contentId'], raw_score, final_score))
             event_scores.append([event['contentId'], final_score])
+        return event_scores, event_scores_detailed
+
+    def sort_scored_events(self, event_scores, event_scores_detailed):
         quick_sort(event_scores, 0, len(event_scores) - 1)
         event_ids = [event_id for event_id, score in event_scores]
         scores = [score for event_id, score in event_scores]
@@ -244,6 +245,11 @@ class EventRanking:
             ranked_df['Final Score'] = ranked_df['contentId'].map({eid: fs for eid, rs, fs in event_scores_detailed})
         ranked_df = ranked_df.sort_values('Final Score', ascending=False)
         ranked_df = ranked_df.drop(['Raw Score', 'Final Score'], axis=1)
+        return ranked_df
+
+    def rank_events(self, user):
+        event_scores, event_scores_detailed = self.score_events(user)
+        ranked_df = self.sort_scored_events(event_scores, event_scores_detailed)
         return ranked_df, event_scores_detailed
 
     def save_ranked_events(self, user_id, ranked_df, save_dir=None, filename=None):
@@ -252,16 +258,16 @@ class EventRanking:
             output_dir = os.path.join(current_dir, "API", "content")
         else:
             output_dir = save_dir
-        print(f"Attempting to save ranked events to directory: {output_dir}")
+        self.debug_print(f"Attempting to save ranked events to directory: {output_dir}")
         if not os.path.exists(output_dir):
-            print(f"Directory {output_dir} does not exist, creating it.")
+            self.debug_print(f"Directory {output_dir} does not exist, creating it.")
             os.makedirs(output_dir)
         else:
-            print(f"Directory {output_dir} exists.")
+            self.debug_print(f"Directory {output_dir} exists.")
         if filename is None:
             filename = f"{user_id}.csv"
         csv_path = os.path.join(output_dir, filename)
-        print(f"Saving ranked events to file: {csv_path}")
+        self.debug_print(f"Saving ranked events to file: {csv_path}")
         ranked_df.to_csv(csv_path, index=False)
 
     def save_detailed_scores(self, user_id, event_scores_detailed, save_dir=None):
@@ -303,6 +309,9 @@ class EventRanking:
         detailed_df.to_csv(csv_path, index=False)
 
 if __name__ == "__main__":
+    from logging_setup import configure_logging
+    configure_logging(level="DEBUG")
+
     # Initialize the ranking system
     ranker = EventRanking(debug_mode=True)
 
@@ -0,0 +1,98 @@
+# admission.py
+#
+# Per-worker admission control: at most `max_concurrency` ranking requests run
+# at once, up to `max_queue` more wait for a slot, and a waiter that can't start
+# within `queue_timeout` seconds is turned away instead of running late.
+
+import asyncio
+import functools
+import math
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from config import ADMISSION_CONFIG
+from metrics import CallbackGauge, Counter, Histogram
+
+ADMISSION_WAIT = Histogram(
+    "ranking_admission_wait_seconds",
+    "Time ranking requests spent queued before starting.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+)
+ADMISSION_REJECTED = Counter(
+    "ranking_admission_rejected_total",
+    "Ranking requests turned away by admission control.",
+    labelnames=("reason",)
+)
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency=ADMISSION_CONFIG['max_concurrency'],
+                 max_queue=ADMISSION_CONFIG['max_queue'],
+                 queue_timeout=ADMISSION_CONFIG['queue_timeout']):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        # Smoothed time a request holds its slot, used for Retry-After
+        self._service_time = 0.5
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained."""
+        backlog = (self.waiting + self.active) / self.max_concurrency
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _reject(self, status_code: int, reason: str):
+        ADMISSION_REJECTED.labels(reason).inc()
+        raise HTTPException(
+            status_code=status_code,
+            detail=f"Ranking service is overloaded ({reason}), retry later",
+            headers={"Retry-After": str(self.retry_after())}
+        )
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one concurrency slot for the duration of the block, or raise 429/503."""
+        queued_at = time.perf_counter()
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so concurrent arrivals see it as gone
+            await self._semaphore.acquire()
+        elif self.waiting >= self.max_queue:
+            self._reject(429, "queue_full")
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject(503, "queue_timeout")
+            finally:
+                self.waiting -= 1
+        ADMISSION_WAIT.observe(time.perf_counter() - queued_at)
+
+        self.active += 1
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._service_time = 0.8 * self._service_time + 0.2 * (time.perf_counter() - started_at)
+            self._semaphore.release()
+
+    def admit(self, func):
+        """Decorator for async endpoints: run the endpoint inside a slot."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with self.slot():
+                return await func(*args, **kwargs)
+        return wrapper
+
+
+rank_admission = AdmissionController()
+
+CallbackGauge("ranking_admission_queue_depth", "Ranking requests waiting for a slot.",
+              lambda: rank_admission.waiting)
+CallbackGauge("ranking_admission_active", "Ranking requests holding a slot.",
+              lambda: rank_admission.active)
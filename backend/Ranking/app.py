@@ -1,19 +1,60 @@
 import os
-import traceback
-from fastapi import FastAPI, HTTPException, Request
+import io
+import asyncio
+import logging
+import struct
+import threading
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, BackgroundTasks, Query
+from fastapi.responses import Response, StreamingResponse, JSONResponse
 from pydantic import BaseModel, Field
 import pandas as pd
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 from typing import List, Union, Optional, Tuple
 import uvicorn
 import requests
-import tempfile
 from dotenv import load_dotenv
-from services import fetch_user_preferences  # Assuming this exists in services.py
+from services import fetch_user_preferences, close_http_client  # Assuming this exists in services.py
 from RBS import EventRanking  # Assuming this exists in RBS.py
+from session_store import fetch_unranked_session, fetch_unranked_sessions, mark_ranked, upsert_ranked_sessions
+from result_cache import RankedResultCache, LastResultCache, normalize_csv, clock_bucket, cache_key, etag_for, etag_matches
+from event_catalog import EventCatalog
+from shared_catalog import SharedEventCatalog
+from config import SESSION_CONFIG, EVENT_CATALOG_CONFIG, STREAM_CONFIG, WARMUP_CONFIG, SHARED_CATALOG_ENV
+from models import UserPreferences
+from admission import rank_admission
+from warmup import WarmupState, run_warmup, synthetic_session_csv, SYNTHETIC_PRICE_PREFS
+import streaming
+import payload_codec
+from session_schema import REQUIRED_EVENT_COLUMNS, SessionSchemaError, check_columns, validate_session_csv
+import metrics
+import tracing
+from metrics import stage, track_request, CallbackGauge
+from logging_setup import configure_logging
 from supabase import create_client, Client
 
-app = FastAPI(debug=True)
+configure_logging()
+logger = logging.getLogger(__name__)
+
+warmup_state = WarmupState()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background so the machine can answer /ready (503) meanwhile
+    warmup_task = None
+    if WARMUP_CONFIG['enabled']:
+        warmup_task = asyncio.create_task(run_warmup(warmup_state, warmup_steps()))
+    else:
+        warmup_state.ready = True
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    await close_http_client()
+
+
+app = FastAPI(debug=True, lifespan=lifespan)
 
 # Configure CORS for Fly.io and local dev
 origins = [
@@ -41,7 +82,63 @@ load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+_supabase: Optional[Client] = None
+_supabase_lock = threading.Lock()
+
+
+def get_supabase() -> Client:
+    """Supabase client, built on first use (normally during warm-up)."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
+
+# Ranked outputs keyed by (normalized CSV, user profile, clock bucket)
+result_cache = RankedResultCache()
+# Latest ranking per user, so an unchanged re-request can be answered with 304
+last_results = LastResultCache()
+
+def build_event_catalog() -> Optional[EventCatalog]:
+    """Per-process catalog, layered over the shared one when serve.py published it."""
+    if not EVENT_CATALOG_CONFIG['enabled']:
+        return None
+    shared = None
+    shared_path = os.getenv(SHARED_CATALOG_ENV)
+    if shared_path:
+        try:
+            shared = SharedEventCatalog(shared_path)
+            logger.info(f"Attached shared event catalog ({len(shared)} events, {shared.nbytes()} bytes)",
+                        extra={"path": shared_path})
+        except (OSError, ValueError, struct.error) as exc:
+            # Missing, empty or truncated file
+            logger.warning(f"Shared event catalog unavailable, using a private one: {exc}",
+                           extra={"path": shared_path})
+    return EventCatalog(shared=shared)
+
+# Parsed event attributes shared across every user's session
+event_catalog = build_event_catalog()
+
+CallbackGauge("ranking_result_cache_hits_total", "Ranked result cache hits.",
+              lambda: result_cache.hits, type_name="counter")
+CallbackGauge("ranking_result_cache_misses_total", "Ranked result cache misses.",
+              lambda: result_cache.misses, type_name="counter")
+CallbackGauge("ranking_result_cache_hit_ratio", "Ranked result cache hit ratio since start.",
+              lambda: result_cache.stats()["hit_rate"])
+CallbackGauge("ranking_result_cache_bytes", "Size of cached ranked outputs.",
+              lambda: result_cache.stats()["bytes"])
+CallbackGauge("ranking_last_result_users", "Users with a remembered last ranking (for If-None-Match).",
+              lambda: len(last_results))
+if event_catalog is not None:
+    CallbackGauge("ranking_event_catalog_hit_ratio", "Share of session rows resolved from the event catalog.",
+                  lambda: event_catalog.stats()["hit_rate"])
+    CallbackGauge("ranking_event_catalog_events", "Events held in the event catalog.",
+                  lambda: len(event_catalog))
+    CallbackGauge("ranking_event_catalog_shared_events", "Events in the read-only catalog shared by all workers.",
+                  lambda: event_catalog.stats()["shared_events"])
+CallbackGauge("ranking_ready", "1 once startup warm-up has completed.",
+              lambda: 1.0 if warmup_state.ready else 0.0)
 
 
 
@@ -51,15 +148,12 @@ async def catch_exceptions_middleware(request: Request, call_next):
     try:
         return await call_next(request)
     except Exception as e:
-        print("\n=== Error Traceback ===")
-        print(traceback.format_exc())
-        print("=====================\n")
+        logger.exception("Unhandled error", extra={"path": request.url.path})
         raise e
 
 # Define required columns (used in validation)
 required_columns = {
-    'events_df': ['contentId', 'title', 'description', 'location', 'start',
-                  'source', 'type', 'currencyCode', 'amount', 'url', 'distance'],
+    'events_df': REQUIRED_EVENT_COLUMNS,
     'user_df': ['user_id', 'preferred_events', 'undesirable_events',
                 'city', 'latitude', 'longitude', 'max_distance',
                 'price_range', 'preferred_crowd_size', 'age']
@@ -96,6 +190,9 @@ class RankedEvent(Event):
     rank: int
     score: float
 
+class BatchRankRequest(BaseModel):
+    user_ids: List[int]
+
 # Helper functions
 def normalize_event_type(event_type):
     if pd.isna(event_type):
@@ -125,88 +222,362 @@ def validate_input(user_id: int, events_df: pd.DataFrame) -> Tuple[pd.DataFrame,
 
     return events_df, True
 
+def format_user_preferences(user_preferences) -> dict:
+    return {
+        'Preferences': frozenset(
+            normalize_event_type(p.strip())
+            for p in user_preferences.Preferences.split(',')
+            if p.strip()
+        ),
+        'Disliked': frozenset(
+            normalize_event_type(d.strip())
+            for d in user_preferences.Dislikes.split(',')
+            if d.strip()
+        ),
+        'Price Range': user_preferences.PriceRange,
+        'Max Distance': user_preferences.MaxDistance
+    }
+
+def rank_session_frame(formatted_user: dict, normalized_csv: str) -> Tuple[pd.DataFrame, int, str]:
+    """Parse, filter, score and sort one session; returns (ranked_df, events_removed, payload_format).
+
+    The session may be CSV text or a base64/bytea Arrow IPC or Parquet payload
+    (see payload_codec); columnar payloads load without any text parsing.
+    """
+    # Per-event score breakdowns are only built when someone will see them
+    ranker = EventRanking(debug_mode=logger.isEnabledFor(logging.DEBUG))
+    payload_format = payload_codec.detect_format(normalized_csv)
+    with stage("csv_parse", **{"ranking.csv_bytes": len(normalized_csv),
+                               "ranking.payload_format": payload_format}) as span:
+        if payload_format != payload_codec.CSV:
+            events_df = payload_codec.decode_payload(normalized_csv, payload_format)
+            problems = check_columns([str(col) for col in events_df.columns])
+            if problems:
+                raise SessionSchemaError(problems)
+        elif event_catalog is not None:
+            events_df = event_catalog.parse_session(normalized_csv)
+        else:
+            events_df = pd.read_csv(io.StringIO(normalized_csv))
+        ranker.load_events(events_df)
+        span.set_attribute("ranking.event_count", len(events_df))
+    metrics.EVENTS_PER_REQUEST.observe(len(events_df))
+
+    with stage("filter") as span:
+        events_removed = ranker.filter_events()
+        span.set_attribute("ranking.events_removed", int(events_removed))
+    metrics.EVENTS_REMOVED_PER_REQUEST.observe(events_removed)
+    metrics.EVENTS_REMOVED.inc(events_removed)
+
+    with stage("score"):
+        event_scores, event_scores_detailed = ranker.score_events(formatted_user)
+    with stage("sort"):
+        ranked_df = ranker.sort_scored_events(event_scores, event_scores_detailed)
+    return ranked_df, events_removed, payload_format
+
+def session_cache_key(formatted_user: dict, unranked_csv: str) -> Tuple[str, str]:
+    """Normalize a session payload and key it by content, user profile and clock bucket.
+
+    A CSV session's header is validated on the raw text first, so a malformed
+    session is rejected before normalize_csv makes its pass over the body.
+    """
+    if payload_codec.detect_format(unranked_csv) == payload_codec.CSV:
+        with stage("validate"):
+            validate_session_csv(unranked_csv)
+    normalized_csv = normalize_csv(unranked_csv)
+    return normalized_csv, cache_key(normalized_csv, formatted_user, clock_bucket())
+
+def rank_session_csv(formatted_user: dict, unranked_csv: str) -> Tuple[str, int, int]:
+    """Rank one session's CSV and return (ranked_csv, events_processed, events_removed).
+
+    The ranked output is written in the same format as the input payload.
+    """
+    normalized_csv, key = session_cache_key(formatted_user, unranked_csv)
+    return rank_keyed_session(formatted_user, normalized_csv, key)
+
+def rank_keyed_session(formatted_user: dict, normalized_csv: str, key: str) -> Tuple[str, int, int]:
+    """rank_session_csv for a payload that session_cache_key has already normalized and keyed."""
+    cached = result_cache.get(key)
+    tracing.set_attributes(**{"ranking.cache_hit": cached is not None})
+    if cached is not None:
+        return cached
+
+    ranked_df, events_removed, payload_format = rank_session_frame(formatted_user, normalized_csv)
+    with stage("serialize"):
+        ranked = (payload_codec.encode_frame(ranked_df, payload_format), len(ranked_df), events_removed)
+    result_cache.put(key, ranked)
+    return ranked
+
+def store_ranked_frame(user_id: int, key: str, ranked_df: pd.DataFrame, events_removed: int,
+                       payload_format: str = payload_codec.CSV, session_id: Optional[int] = None):
+    """Background task for streamed misses: cache the encoded ranking so repeat views and
+    If-None-Match hit it, and write it to Supabase when a session_id is given (persist=true)."""
+    ranked = (payload_codec.encode_frame(ranked_df, payload_format), len(ranked_df), events_removed)
+    result_cache.put(key, ranked)
+    last_results.put(user_id, etag_for(key), ranked)
+    if session_id is not None:
+        mark_ranked(get_supabase(), session_id, ranked[0])
+
+def stream_ranked_session(formatted_user: dict, session: dict, normalized_csv: str, key: str,
+                          response_format: str, top_k: Optional[int], accept_encoding: Optional[str],
+                          background_tasks: BackgroundTasks, persist: bool) -> StreamingResponse:
+    """Rank a session and stream the top-k events back instead of writing them to Supabase."""
+    cached = result_cache.get(key)
+    tracing.set_attributes(**{"ranking.cache_hit": cached is not None, "ranking.stream_format": response_format})
+    if cached is not None:
+        ranked_csv, events_processed, events_removed = cached
+        cached_format = payload_codec.detect_format(ranked_csv)
+        if cached_format == payload_codec.CSV:
+            pages = streaming.csv_pages(ranked_csv, top_k)
+        else:
+            pages = streaming.frame_pages(payload_codec.decode_payload(ranked_csv, cached_format), top_k)
+        last_results.put(session["userid"], etag_for(key), cached)
+        if persist:
+            background_tasks.add_task(mark_ranked, get_supabase(), session["id"], ranked_csv)
+    else:
+        ranked_df, events_removed, payload_format = rank_session_frame(formatted_user, normalized_csv)
+        events_processed = len(ranked_df)
+        pages = streaming.frame_pages(ranked_df, top_k)
+        # Encoding for the caches runs after the response, so it doesn't delay the first page
+        background_tasks.add_task(store_ranked_frame, session["userid"], key, ranked_df, events_removed,
+                                  payload_format, session["id"] if persist else None)
+
+    encoding = streaming.negotiate_encoding(accept_encoding)
+    headers = {
+        "ETag": etag_for(key),
+        "Vary": "Accept-Encoding",
+        "X-Events-Processed": str(events_processed),
+        "X-Events-Removed": str(events_removed)
+    }
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return StreamingResponse(
+        streaming.encode_stream(pages, response_format, encoding),
+        media_type=streaming.MEDIA_TYPES[response_format],
+        headers=headers,
+        background=background_tasks
+    )
+
+def warmup_steps():
+    """Everything a cold first request would otherwise pay for, in the order it would hit it."""
+    sample_preferences = {
+        "preferences": "concert, sports, comedy",
+        "dislikes": "film",
+        "priceRange": "$$",
+        "maxDistance": 50
+    }
+
+    def build_models():
+        UserPreferences.parse_obj(sample_preferences)
+        BatchRankRequest(user_ids=[1])
+
+    def rank_synthetic_batch():
+        session_csv = normalize_csv(synthetic_session_csv(WARMUP_CONFIG['synthetic_events']))
+        # One pass per price band fills the per-type and per-price scoring caches;
+        # synthetic rankings stay out of the production stage and event histograms
+        with metrics.suppressed():
+            for price_pref in SYNTHETIC_PRICE_PREFS:
+                user = format_user_preferences(UserPreferences.parse_obj({**sample_preferences, "priceRange": price_pref}))
+                ranked_df, _, payload_format = rank_session_frame(user, session_csv)
+                payload_codec.encode_frame(ranked_df, payload_format)
+        # Synthetic events shouldn't occupy the shared catalog
+        if event_catalog is not None:
+            event_catalog.clear()
+
+    return [
+        ("supabase_client", get_supabase),
+        ("pydantic_models", build_models),
+        ("rank_synthetic_batch", rank_synthetic_batch)
+    ]
+
+# Bulk ranking endpoint (declared before /rank-events/{user_id} so "batch" isn't parsed as an id)
+@app.post("/rank-events/batch")
+@track_request("rank_events_batch")
+@rank_admission.admit
+async def rank_events_batch(request: BatchRankRequest) -> dict:
+    logger.info("Batch rank events called", extra={"user_count": len(request.user_ids)})
+    if not request.user_ids:
+        raise HTTPException(status_code=422, detail="user_ids must not be empty")
+    try:
+        # One paginated select for every requested user
+        with stage("batch_supabase_read", **{"ranking.user_count": len(request.user_ids)}) as span:
+            sessions = await run_in_threadpool(fetch_unranked_sessions, get_supabase(), request.user_ids)
+            span.set_attribute("ranking.session_count", len(sessions))
+
+        semaphore = asyncio.Semaphore(SESSION_CONFIG['batch_preference_concurrency'])
+
+        async def fetch_bounded(user_id):
+            async with semaphore:
+                return await fetch_user_preferences(user_id)
+
+        user_ids = list(sessions.keys())
+        with stage("batch_preference_fetch"):
+            preferences = await asyncio.gather(*(fetch_bounded(uid) for uid in user_ids), return_exceptions=True)
+
+        ranked_rows = []
+        failed = {}
+        events_processed = 0
+        for user_id, user_preferences in zip(user_ids, preferences):
+            if isinstance(user_preferences, Exception):
+                failed[user_id] = str(getattr(user_preferences, 'detail', user_preferences))
+                continue
+            row = sessions[user_id]
+            try:
+                with tracing.span("rank_session", **{"user.id": user_id}):
+                    formatted_user = format_user_preferences(user_preferences)
+                    normalized_csv, key = await run_in_threadpool(session_cache_key, formatted_user, row["rankedcsv"])
+                    ranked = await run_in_threadpool(rank_keyed_session, formatted_user, normalized_csv, key)
+                ranked_csv, processed, _ = ranked
+                last_results.put(user_id, etag_for(key), ranked)
+            except Exception as e:
+                logger.warning("Ranking failed for user", extra={"user_id": user_id, "error": str(e)})
+                failed[user_id] = str(e)
+                continue
+            ranked_rows.append({"id": row["id"], "userid": user_id, "rankedcsv": ranked_csv})
+            events_processed += processed
+
+        # One chunked upsert for every ranked session
+        with stage("batch_supabase_write"):
+            written = await run_in_threadpool(upsert_ranked_sessions, get_supabase(), ranked_rows) if ranked_rows else 0
+
+        return {
+            "success": not failed,
+            "message": f"Ranked {written} of {len(request.user_ids)} requested users",
+            "users_ranked": written,
+            "events_processed": events_processed,
+            "users_without_session": sorted(set(request.user_ids) - set(sessions)),
+            "users_failed": failed
+        }
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Batch ranking failed", extra={"user_count": len(request.user_ids)})
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
+
 # Main ranking endpoint
 @app.post("/rank-events/{user_id}")
-async def rank_events(user_id: int) -> dict:
-    print(f"Rank events called with user_id: {user_id}")
+@track_request("rank_events")
+@rank_admission.admit
+async def rank_events(
+    user_id: int,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    response_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|csv)$"),
+    top_k: Optional[int] = Query(None, gt=0, le=STREAM_CONFIG['max_top_k']),
+    persist: bool = False
+):
+    """Rank a user's session.
+
+    By default the ranked CSV is written back to Supabase and only counts are
+    returned. With `?format=ndjson|csv` the top_k ranked events are streamed
+    straight to the caller instead (gzip/br per Accept-Encoding) and the
+    Supabase write is skipped unless `persist=true`, in which case it runs
+    after the response has been sent.
+
+    Every ranking carries an ETag derived from the session content, the user's
+    profile and the clock bucket. The C# backend re-posts unchanged sessions,
+    so If-None-Match is honored on this POST: when it matches the user's last
+    ranking the stored result is reused (and still persisted, unless
+    streaming without persist) and 304 is returned without ranking again.
+    """
+    logger.info("Rank events called", extra={"user_id": user_id})
+    tracing.set_attributes(**{"user.id": user_id})
     try:
         # Fetch user preferences from C# backend
-        user_preferences = await fetch_user_preferences(user_id)
-        print(f"Fetched user preferences: {user_preferences}")
+        with stage("preference_fetch"):
+            user_preferences = await fetch_user_preferences(user_id)
+        logger.debug(f"Fetched user preferences: {user_preferences}", extra={"user_id": user_id})
 
         # Format the user preferences
-        formatted_user = {
-            'Preferences': frozenset(
-                normalize_event_type(p.strip())
-                for p in user_preferences.Preferences.split(',')
-                if p.strip()
-            ),
-            'Disliked': frozenset(
-                normalize_event_type(d.strip())
-                for d in user_preferences.Dislikes.split(',')
-                if d.strip()
-            ),
-            'Price Range': user_preferences.PriceRange,
-            'Max Distance': user_preferences.MaxDistance
-        }
-        print(f"Formatted user preferences: {formatted_user}")
+        formatted_user = format_user_preferences(user_preferences)
+        logger.debug(f"Formatted user preferences: {formatted_user}", extra={"user_id": user_id})
 
         # Fetch unranked CSV from Supabase
-        response = supabase.table("UserSessionData").select("*").eq("userid", user_id).eq("IsRanked", False).execute()
-        if not response.data or len(response.data) == 0:
+        with stage("supabase_read") as span:
+            session = await run_in_threadpool(fetch_unranked_session, get_supabase(), user_id)
+            span.set_attribute("ranking.session_found", session is not None)
+        if session is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No unranked events found for user {user_id} in UserSessionData"
             )
 
-        # Get the unranked CSV and row ID
-        unranked_csv = response.data[0]["rankedcsv"]
-        row_id = response.data[0]["id"]
-
-        # Write CSV to temporary file (Fly.io's writable dir)
-        with tempfile.NamedTemporaryFile(mode="w", delete=False, suffix=".csv") as temp_file:
-            temp_csv_path = temp_file.name
-            temp_file.write(unranked_csv)
+        normalized_csv, key = await run_in_threadpool(session_cache_key, formatted_user, session["rankedcsv"])
+        etag = etag_for(key)
+        tracing.set_attributes(**{"ranking.etag": etag})
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            last = last_results.get(user_id)
+            if last is not None and last[0] == etag:
+                if response_format is None or persist:
+                    with stage("supabase_write"):
+                        await run_in_threadpool(mark_ranked, get_supabase(), session["id"], last[1][0])
+                metrics.NOT_MODIFIED.inc()
+                tracing.set_attributes(**{"ranking.not_modified": True})
+                return Response(status_code=304, headers={"ETag": etag})
+
+        if response_format is not None:
+            return await run_in_threadpool(stream_ranked_session, formatted_user, session, normalized_csv, key,
+                                           response_format, top_k, request.headers.get("accept-encoding"),
+                                           background_tasks, persist)
 
         # Load and rank events
-        ranker = EventRanking(debug_mode=True)
-        events_df = pd.read_csv(temp_csv_path, encoding='utf-8-sig')
-        ranker.load_events(events_df)
-        events_removed = ranker.filter_events()
-
-        result = ranker.rank_events(formatted_user)
-        ranked_df = result[0]
-
-       # Save ranked events to temp file
-        output_path = tempfile.gettempdir()
-        ranked_csv_path = f"{output_path}/ranked_events_user_{user_id}.csv"
-        ranker.save_ranked_events(user_id, ranked_df, output_path, filename=f"ranked_events_user_{user_id}.csv")
-
-        # Read the ranked CSV back into a string
-        with open(ranked_csv_path, "r") as f:
-            ranked_csv = f.read()
+        # CPU-bound; keep it off the event loop so probes and queued requests stay responsive
+        ranked = await run_in_threadpool(rank_keyed_session, formatted_user, normalized_csv, key)
+        ranked_csv, events_processed, events_removed = ranked
+        last_results.put(user_id, etag, ranked)
+        response.headers["ETag"] = etag
 
         # Update the row in Supabase with the ranked CSV and set IsRanked = true
-        supabase.table("UserSessionData").update({
-            "rankedcsv": ranked_csv,
-            "IsRanked": True
-        }).eq("id", row_id).execute()
+        with stage("supabase_write"):
+            await run_in_threadpool(mark_ranked, get_supabase(), session["id"], ranked_csv)
 
+        tracing.set_attributes(**{"ranking.events_processed": events_processed})
+        logger.info("Ranked events", extra={
+            "user_id": user_id, "events_processed": events_processed, "events_removed": events_removed
+        })
         return {
             "success": True,
             "message": f"Successfully ranked events for user {user_id}",
-            "events_processed": len(ranked_df),
+            "events_processed": events_processed,
             "events_removed": events_removed
         }
 
+    except HTTPException:
+        # Keep deliberate statuses (404, 503 + Retry-After from the preferences circuit, ...)
+        raise
+    except SessionSchemaError as e:
+        logger.warning("Rejected malformed session", extra={"user_id": user_id, "problems": e.problems})
+        raise HTTPException(
+            status_code=422,
+            detail={"message": f"Malformed session payload for user {user_id}", "problems": e.problems}
+        )
+    except payload_codec.PayloadFormatError as e:
+        logger.warning("Rejected undecodable session", extra={"user_id": user_id, "error": str(e)})
+        raise HTTPException(
+            status_code=422,
+            detail={"message": f"Malformed session payload for user {user_id}", "problems": [str(e)]}
+        )
     except Exception as e:
-        print(f"ERROR: {str(e)}")
-        print(f"Traceback:\n{traceback.format_exc()}")
+        logger.exception("Ranking failed", extra={"user_id": user_id})
         raise HTTPException(
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
 
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(content=metrics.render_latest(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/ready")
+async def ready():
+    """Readiness probe: 503 until startup warm-up has finished."""
+    status_code = 200 if warmup_state.ready else 503
+    return JSONResponse(status_code=status_code, content=warmup_state.as_dict())
+
 # Test endpoints
 @app.get("/test")
 async def test():
@@ -214,7 +585,7 @@ async def test():
 
 @app.get("/")
 async def root():
-    print("Root endpoint called")
+    logger.debug("Root endpoint called")
     return {"message": "API is running"}
 
 if __name__ == "__main__":
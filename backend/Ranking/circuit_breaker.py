@@ -0,0 +1,148 @@
+# circuit_breaker.py
+
+import threading
+import time
+from collections import deque
+
+from config import CIRCUIT_BREAKER_CONFIG
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the dependency while the breaker is open."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker.
+
+    Closed: calls go through and outcomes are recorded over a sliding time
+    window. Once at least `minimum_calls` outcomes are in the window and the
+    failure rate reaches `failure_rate_threshold`, the breaker opens.
+    Open: calls fail fast with CircuitOpenError for `open_seconds`.
+    Half-open: up to `half_open_max_calls` trial calls are let through; if they
+    all succeed the breaker closes, and any failure re-opens it.
+
+    Callers use `before_call()` / `record_success()` / `record_failure()`
+    around the protected call, and `release()` when the call ends without an
+    outcome (cancelled, or an error unrelated to the dependency).
+    """
+
+    def __init__(self, name: str,
+                 failure_rate_threshold=CIRCUIT_BREAKER_CONFIG['failure_rate_threshold'],
+                 minimum_calls=CIRCUIT_BREAKER_CONFIG['minimum_calls'],
+                 window_seconds=CIRCUIT_BREAKER_CONFIG['window_seconds'],
+                 open_seconds=CIRCUIT_BREAKER_CONFIG['open_seconds'],
+                 half_open_max_calls=CIRCUIT_BREAKER_CONFIG['half_open_max_calls'],
+                 clock=time.monotonic):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.window_seconds = window_seconds
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._outcomes = deque()  # (timestamp, succeeded)
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and self._clock() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+            self._half_open_successes = 0
+        return self._state
+
+    def _trim(self, now):
+        while self._outcomes and now - self._outcomes[0][0] > self.window_seconds:
+            self._outcomes.popleft()
+
+    def _open(self, now):
+        self._state = OPEN
+        self._opened_at = now
+        self._outcomes.clear()
+        self.times_opened += 1
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.open_seconds - (self._clock() - self._opened_at))
+
+    def before_call(self):
+        """Raise CircuitOpenError if the call must not be attempted now."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return
+            if state == HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+                self._half_open_calls += 1
+                return
+            retry_after = max(0.0, self.open_seconds - (self._clock() - self._opened_at)) if state == OPEN else 1.0
+        raise CircuitOpenError(self.name, retry_after)
+
+    def release(self):
+        """Hand back a trial slot taken by before_call() without recording an outcome."""
+        with self._lock:
+            if self._current_state() == HALF_OPEN and self._half_open_calls > 0:
+                self._half_open_calls -= 1
+
+    def record_success(self):
+        with self._lock:
+            now = self._clock()
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                return
+            if state == CLOSED:
+                self._outcomes.append((now, True))
+                self._trim(now)
+
+    def record_failure(self):
+        with self._lock:
+            now = self._clock()
+            state = self._current_state()
+            if state == HALF_OPEN:
+                self._open(now)
+                return
+            if state != CLOSED:
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            if len(self._outcomes) >= self.minimum_calls:
+                failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+                if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                    self._open(now)
+
+    def stats(self) -> dict:
+        with self._lock:
+            state = self._current_state()
+            self._trim(self._clock())
+            calls = len(self._outcomes)
+            failures = sum(1 for _, succeeded in self._outcomes if not succeeded)
+            return {
+                "state": state,
+                "window_calls": calls,
+                "window_failure_rate": failures / calls if calls else 0.0,
+                "times_opened": self.times_opened
+            }
@@ -106,6 +106,112 @@ PENALTY_CONFIG = {
     }
 }
 
+# Supabase session storage
+SESSION_TABLE = "UserSessionData"
+SESSION_CONFIG = {
+    'page_size': int(os.getenv("SESSION_PAGE_SIZE", 500)),
+    'id_chunk_size': 200,
+    'upsert_chunk_size': int(os.getenv("SESSION_UPSERT_CHUNK_SIZE", 100)),
+    'max_retries': 3,
+    'retry_base_delay': 0.5,
+    'batch_preference_concurrency': 16
+}
+
+# Ranked result cache (keyed on session content, user profile and clock bucket)
+RESULT_CACHE_CONFIG = {
+    'max_entries': int(os.getenv("RESULT_CACHE_MAX_ENTRIES", 1024)),
+    'max_bytes': int(os.getenv("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    'clock_bucket_seconds': int(os.getenv("RESULT_CACHE_CLOCK_BUCKET_SECONDS", 300)),
+    # Last ranked result per user, for If-None-Match on repeat requests
+    'last_result_max_users': int(os.getenv("LAST_RESULT_MAX_USERS", 10000))
+}
+
+# Process-wide event catalog shared by all sessions
+EVENT_CATALOG_CONFIG = {
+    'enabled': os.getenv("EVENT_CATALOG_ENABLED", "true").lower() == "true",
+    'max_events': int(os.getenv("EVENT_CATALOG_MAX_EVENTS", 200000)),
+    'initial_capacity': 1024
+}
+
+# Multi-worker mode (serve.py): the parent freezes a read-only event catalog into
+# a file that every worker maps, instead of each worker parsing its own copy
+SHARED_CATALOG_ENV = "RANKING_SHARED_CATALOG_PATH"
+SERVE_CONFIG = {
+    'workers': int(os.getenv("WEB_CONCURRENCY", 1)),
+    'port': int(os.getenv("PORT", 80)),
+    'shared_catalog': os.getenv("SHARED_CATALOG_ENABLED", "true").lower() == "true",
+    # /dev/shm keeps the mapping in RAM; any directory works
+    'shared_catalog_dir': os.getenv("SHARED_CATALOG_DIR", "/dev/shm" if os.path.isdir("/dev/shm") else None),
+    'preload_max_sessions': int(os.getenv("SHARED_CATALOG_PRELOAD_SESSIONS", 2000))
+}
+
+# Opt-in request tracing; spans are exported as OTLP/JSON to a file or an OTLP/HTTP collector
+TRACING_CONFIG = {
+    'enabled': os.getenv("TRACING_ENABLED", "false").lower() == "true",
+    'service_name': os.getenv("TRACING_SERVICE_NAME", "ventaura-ranking"),
+    'sample_ratio': float(os.getenv("TRACING_SAMPLE_RATIO", 1.0)),
+    'file': os.getenv("TRACING_FILE", "traces.jsonl"),
+    'endpoint': os.getenv("TRACING_OTLP_ENDPOINT"),
+    'batch_size': 256,
+    'flush_interval': 2.0,
+    'max_queue_size': 4096
+}
+
+# Streaming response mode for /rank-events (?format=ndjson|csv)
+STREAM_CONFIG = {
+    'page_size': int(os.getenv("STREAM_PAGE_SIZE", 50)),
+    'max_top_k': 10000,
+    'gzip_level': 6,
+    'brotli_quality': 5
+}
+
+# Columnar session payloads (Arrow IPC / Parquet, base64 or bytea hex in rankedcsv)
+PAYLOAD_CONFIG = {
+    # Uncompressed Arrow keeps loading zero-copy; Parquet trades CPU for size
+    'arrow_compression': os.getenv("PAYLOAD_ARROW_COMPRESSION") or None,
+    'parquet_compression': os.getenv("PAYLOAD_PARQUET_COMPRESSION", "zstd")
+}
+
+# Startup warm-up; /ready stays 503 until it finishes
+WARMUP_CONFIG = {
+    'enabled': os.getenv("WARMUP_ENABLED", "true").lower() == "true",
+    'synthetic_events': int(os.getenv("WARMUP_SYNTHETIC_EVENTS", 200)),
+    # A failed step is retried until it succeeds; /ready stays 503 meanwhile
+    'retry_base_delay': float(os.getenv("WARMUP_RETRY_BASE_DELAY", 1.0)),
+    'retry_max_delay': float(os.getenv("WARMUP_RETRY_MAX_DELAY", 30.0))
+}
+
+# Admission control for /rank-events (per worker process)
+ADMISSION_CONFIG = {
+    'max_concurrency': int(os.getenv("ADMISSION_MAX_CONCURRENCY", 4)),
+    'max_queue': int(os.getenv("ADMISSION_MAX_QUEUE", 32)),
+    'queue_timeout': float(os.getenv("ADMISSION_QUEUE_TIMEOUT", 2.0))
+}
+
+# C# backend user-preferences client
+PREFERENCES_CLIENT_CONFIG = {
+    'timeout': float(os.getenv("PREFERENCES_TIMEOUT", 3.0)),
+    'connect_timeout': float(os.getenv("PREFERENCES_CONNECT_TIMEOUT", 1.0)),
+    'max_retries': int(os.getenv("PREFERENCES_MAX_RETRIES", 2)),
+    'retry_base_delay': 0.1,
+    'retry_max_delay': 1.0
+}
+
+CIRCUIT_BREAKER_CONFIG = {
+    'failure_rate_threshold': float(os.getenv("CIRCUIT_FAILURE_RATE_THRESHOLD", 0.5)),
+    'minimum_calls': int(os.getenv("CIRCUIT_MINIMUM_CALLS", 10)),
+    'window_seconds': float(os.getenv("CIRCUIT_WINDOW_SECONDS", 30)),
+    'open_seconds': float(os.getenv("CIRCUIT_OPEN_SECONDS", 15)),
+    'half_open_max_calls': int(os.getenv("CIRCUIT_HALF_OPEN_MAX_CALLS", 3))
+}
+
+# Last good preferences per user, served while the C# backend is unavailable
+STALE_PREFERENCES_CONFIG = {
+    'enabled': os.getenv("STALE_PREFERENCES_ENABLED", "true").lower() == "true",
+    'max_entries': int(os.getenv("STALE_PREFERENCES_MAX_ENTRIES", 10000)),
+    'max_age_seconds': float(os.getenv("STALE_PREFERENCES_MAX_AGE", 3600))
+}
+
 # No events_df needed here - app.py fetches it
 events_df = None
 
@@ -131,12 +237,14 @@ get_current_time = time_handler.get_current_time
 get_timestamp = time_handler.get_timestamp
 CURRENT_TIME = get_current_time()
 
-# Logging setup
-logging.basicConfig(
-    filename='app.log',
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
-)
+# Logging setup (installed once at startup by logging_setup.configure_logging)
+LOGGING_CONFIG = {
+    'level': os.getenv("LOG_LEVEL", "INFO").upper(),
+    'file': os.getenv("LOG_FILE"),
+    'max_bytes': int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+    'backup_count': int(os.getenv("LOG_BACKUP_COUNT", 5)),
+    'event_sample_rate': float(os.getenv("LOG_EVENT_SAMPLE_RATE", 0.01))
+}
 
 # Helper methods
 def debug_print(message, force=False):
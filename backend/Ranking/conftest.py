@@ -0,0 +1,3 @@
+# DQL/ is the separate training project: it has its own `config` module,
+# which would shadow the service's, so its tests are run from DQL/.
+collect_ignore = ["DQL"]
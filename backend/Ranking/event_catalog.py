@@ -0,0 +1,246 @@
+# event_catalog.py
+
+import csv
+import io
+import logging
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+from config import EVENT_CATALOG_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Event attributes that are the same for every user who sees the event
+CATALOG_COLUMNS = ['title', 'description', 'location', 'start', 'source',
+                   'type', 'currencyCode', 'amount', 'url']
+# Per-session attributes: contentId is a row counter assigned by the C# backend
+# and distance depends on the user's location, so neither can be shared
+SESSION_COLUMNS = ['contentId', 'distance']
+
+TEXT_COLUMNS = ['title', 'description', 'location', 'url']
+CODED_COLUMNS = ['source', 'type', 'currencyCode']
+
+
+def event_keys(raw_df: pd.DataFrame) -> np.ndarray:
+    """64-bit content key per row, hashed over the raw catalog fields.
+
+    contentId can't be used as the key because it restarts at 1 in every
+    session, so two users' "event 1" are usually different events.
+    """
+    return pd.util.hash_pandas_object(raw_df[CATALOG_COLUMNS], index=False).to_numpy()
+
+
+def read_header(csv_text: str) -> list:
+    first_line = csv_text.split('\n', 1)[0]
+    return next(csv.reader([first_line]), [])
+
+
+class EventCatalog:
+    """Process-wide store of parsed, type-coded event attributes.
+
+    Numeric columns live in numpy arrays, low-cardinality text columns are
+    stored as int32 codes into a shared vocabulary and free-text columns hold
+    interned strings, so overlapping sessions share one copy of each event.
+    A session is resolved to an array of catalog rows plus its own contentId
+    and distance columns.
+
+    In multi-worker mode `shared` is a read-only SharedEventCatalog mapped by
+    every worker; events found there are never copied into this process and
+    only events missing from it are added locally.
+    """
+
+    def __init__(self, max_events=EVENT_CATALOG_CONFIG['max_events'],
+                 initial_capacity=EVENT_CATALOG_CONFIG['initial_capacity'], shared=None):
+        self.max_events = max_events
+        self.shared = shared
+        self._initial_capacity = initial_capacity
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.resets = 0
+        self._reset_storage()
+
+    def _reset_storage(self):
+        capacity = self._initial_capacity
+        self._index = {}
+        self._size = 0
+        self._start = np.full(capacity, np.datetime64('NaT'), dtype='datetime64[ns]')
+        self._amount = np.full(capacity, np.nan, dtype=np.float64)
+        self._text = {col: np.empty(capacity, dtype=object) for col in TEXT_COLUMNS}
+        self._codes = {col: np.zeros(capacity, dtype=np.int32) for col in CODED_COLUMNS}
+        # Code 0 is reserved for missing values
+        self._vocab = {col: [np.nan] for col in CODED_COLUMNS}
+        self._vocab_index = {col: {} for col in CODED_COLUMNS}
+        self._vocab_arrays = {col: np.array([np.nan], dtype=object) for col in CODED_COLUMNS}
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self, needed):
+        capacity = len(self._amount)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+
+        def grown(array, fill):
+            out = np.full(new_capacity, fill, dtype=array.dtype)
+            out[:capacity] = array
+            return out
+
+        self._start = grown(self._start, np.datetime64('NaT'))
+        self._amount = grown(self._amount, np.nan)
+        self._text = {col: grown(arr, None) for col, arr in self._text.items()}
+        self._codes = {col: grown(arr, 0) for col, arr in self._codes.items()}
+
+    def _encode(self, col, values):
+        vocab, vocab_index = self._vocab[col], self._vocab_index[col]
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if pd.isna(value):
+                codes[i] = 0
+                continue
+            code = vocab_index.get(value)
+            if code is None:
+                code = len(vocab)
+                vocab.append(sys.intern(value))
+                vocab_index[value] = code
+            codes[i] = code
+        if len(vocab) != len(self._vocab_arrays[col]):
+            self._vocab_arrays[col] = np.array(vocab, dtype=object)
+        return codes
+
+    def _add(self, raw_df: pd.DataFrame, keys: np.ndarray) -> np.ndarray:
+        """Parse and append rows that aren't in the catalog yet; returns their row ids."""
+        unique_keys, first_pos, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        new_rows = raw_df.iloc[first_pos]
+        start, end = self._size, self._size + len(unique_keys)
+        self._grow(end)
+
+        start_times = pd.to_datetime(new_rows['start'], errors='coerce')
+        if getattr(start_times.dt, 'tz', None) is not None:
+            start_times = start_times.dt.tz_localize(None)
+        self._start[start:end] = start_times.to_numpy(dtype='datetime64[ns]')
+        self._amount[start:end] = pd.to_numeric(new_rows['amount'], errors='coerce').to_numpy(dtype=np.float64)
+        for col in TEXT_COLUMNS:
+            self._text[col][start:end] = [
+                value if pd.isna(value) else sys.intern(value) for value in new_rows[col].tolist()
+            ]
+        for col in CODED_COLUMNS:
+            self._codes[col][start:end] = self._encode(col, new_rows[col].tolist())
+
+        row_ids = np.arange(start, end, dtype=np.int64)
+        for key, row_id in zip(unique_keys.tolist(), row_ids.tolist()):
+            self._index[key] = row_id
+        self._size = end
+        return row_ids[inverse]
+
+    def _take(self, rows: np.ndarray) -> dict:
+        columns = {
+            'start': self._start[rows],
+            'amount': self._amount[rows],
+        }
+        for col in TEXT_COLUMNS:
+            columns[col] = self._text[col][rows]
+        for col in CODED_COLUMNS:
+            columns[col] = self._vocab_arrays[col][self._codes[col][rows]]
+        return columns
+
+    def _resolve_local(self, raw_df: pd.DataFrame, keys: np.ndarray) -> dict:
+        with self._lock:
+            rows = np.fromiter((self._index.get(key, -1) for key in keys.tolist()),
+                               dtype=np.int64, count=len(keys))
+            missing = np.flatnonzero(rows < 0)
+            if self._size + len(missing) > self.max_events:
+                # Events churn daily, so start a fresh generation rather than tracking recency
+                logger.info(f"Event catalog full ({self._size} events), resetting")
+                self._reset_storage()
+                self.resets += 1
+                missing = np.arange(len(rows))
+            self.hits += len(rows) - len(missing)
+            self.misses += len(missing)
+            if len(missing):
+                rows[missing] = self._add(raw_df.iloc[missing], keys[missing])
+            return self._take(rows)
+
+    def resolve(self, raw_df: pd.DataFrame) -> pd.DataFrame:
+        """Turn a string-typed session frame into a typed one backed by the catalog."""
+        keys = event_keys(raw_df)
+        shared_rows = self.shared.lookup(keys) if self.shared is not None else None
+        if shared_rows is None or not (shared_rows >= 0).any():
+            columns = self._resolve_local(raw_df, keys)
+        else:
+            in_shared = shared_rows >= 0
+            local = np.flatnonzero(~in_shared)
+            with self._lock:
+                self.hits += len(keys) - len(local)
+                self.shared_hits += len(keys) - len(local)
+            columns = self.shared.take(shared_rows[in_shared])
+            if len(local):
+                local_columns = self._resolve_local(raw_df.iloc[local], keys[local])
+                for col, shared_values in columns.items():
+                    merged = np.empty(len(keys), dtype=shared_values.dtype)
+                    merged[in_shared] = shared_values
+                    merged[local] = local_columns[col]
+                    columns[col] = merged
+
+        columns['contentId'] = pd.to_numeric(raw_df['contentId'], errors='coerce').to_numpy()
+        columns['distance'] = pd.to_numeric(raw_df['distance'], errors='coerce').to_numpy()
+        return pd.DataFrame({col: columns[col] for col in raw_df.columns})
+
+    def parse_session(self, csv_text: str) -> pd.DataFrame:
+        """Parse a session CSV, resolving shared event attributes through the catalog.
+
+        Sessions whose header doesn't match the standard column set are parsed
+        normally and bypass the catalog.
+        """
+        header = read_header(csv_text)
+        if sorted(header) != sorted(CATALOG_COLUMNS + SESSION_COLUMNS):
+            return pd.read_csv(io.StringIO(csv_text))
+        raw_df = pd.read_csv(io.StringIO(csv_text), dtype=str)
+        return self.resolve(raw_df)
+
+    def clear(self):
+        """Drop every locally cached event and reset the counters; the shared catalog is untouched."""
+        with self._lock:
+            self._reset_storage()
+            self.hits = self.misses = self.resets = self.shared_hits = 0
+
+    def snapshot(self) -> dict:
+        """Copies of the local catalog's keys, columns and vocabularies, in row order."""
+        with self._lock:
+            size = self._size
+            keys = np.empty(size, dtype=np.uint64)
+            for key, row_id in self._index.items():
+                keys[row_id] = key
+            return {
+                'keys': keys,
+                'start': self._start[:size].copy(),
+                'amount': self._amount[:size].copy(),
+                'text': {col: arr[:size].copy() for col, arr in self._text.items()},
+                'codes': {col: arr[:size].copy() for col, arr in self._codes.items()},
+                'vocab': {col: list(vocab) for col, vocab in self._vocab.items()}
+            }
+
+    def nbytes(self) -> int:
+        arrays = [self._start, self._amount] + list(self._codes.values()) + list(self._text.values())
+        return sum(array.nbytes for array in arrays)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "events": self._size,
+                "max_events": self.max_events,
+                "array_bytes": self.nbytes(),
+                "shared_events": len(self.shared) if self.shared is not None else 0,
+                "shared_bytes": self.shared.nbytes() if self.shared is not None else 0,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "resets": self.resets,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
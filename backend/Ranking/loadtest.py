@@ -0,0 +1,280 @@
+# loadtest.py
+#
+# Reproducible load test for /rank-events that runs entirely in-process:
+# UserSessionData is an in-memory fake of the Supabase query builder, the C#
+# /api/users/{id} endpoint is an httpx.MockTransport, and requests go straight
+# to the ASGI app. Nothing touches Fly.io or Supabase.
+#
+#   python loadtest.py --events 100 1000 10000 --requests 200 --concurrency 8
+#   python loadtest.py --events 100000 --requests 5 --concurrency 1 --json
+
+import argparse
+import asyncio
+import copy
+import json
+import random
+import statistics
+import threading
+import time
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+import app
+import services
+from config import RESULT_CACHE_CONFIG, SESSION_TABLE
+from result_cache import LastResultCache, RankedResultCache
+from warmup import run_warmup, synthetic_session_csv
+
+
+class _FakeQuery:
+    """Supports the query-builder calls session_store makes: filters, order, range, limit."""
+
+    def __init__(self, store, table, action, payload=None, on_conflict=None):
+        self._store = store
+        self._table = table
+        self._action = action
+        self._payload = payload
+        self._on_conflict = on_conflict
+        self._filters = []
+        self._order = None
+        self._range = None
+        self._limit = None
+
+    def select(self, *columns):
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self._filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def order(self, column, desc=False):
+        self._order = (column, desc)
+        return self
+
+    def range(self, start, end):
+        self._range = (start, end)
+        return self
+
+    def limit(self, count):
+        self._limit = count
+        return self
+
+    def _matching(self, rows):
+        matched = [row for row in rows if all(f(row) for f in self._filters)]
+        if self._order is not None:
+            column, desc = self._order
+            matched.sort(key=lambda row: row.get(column), reverse=desc)
+        if self._range is not None:
+            matched = matched[self._range[0]:self._range[1] + 1]
+        if self._limit is not None:
+            matched = matched[:self._limit]
+        return matched
+
+    def execute(self):
+        if self._store.latency:
+            time.sleep(self._store.latency)
+        with self._store.lock:
+            rows = self._store.tables.setdefault(self._table, [])
+            if self._action == "select":
+                data = [copy.copy(row) for row in self._matching(rows)]
+            elif self._action == "update":
+                data = []
+                for row in self._matching(rows):
+                    self._store.writes += 1
+                    if not self._store.sticky:
+                        row.update(self._payload)
+                    data.append(copy.copy(row))
+            else:  # upsert
+                by_key = {row[self._on_conflict]: row for row in rows}
+                data = []
+                for new_row in self._payload:
+                    self._store.writes += 1
+                    existing = by_key.get(new_row[self._on_conflict])
+                    if existing is None:
+                        rows.append(dict(new_row))
+                    elif not self._store.sticky:
+                        existing.update(new_row)
+                    data.append(dict(new_row))
+        return SimpleNamespace(data=data)
+
+
+class _FakeTable:
+    def __init__(self, store, name):
+        self._store = store
+        self._name = name
+
+    def select(self, *columns):
+        return _FakeQuery(self._store, self._name, "select")
+
+    def update(self, values):
+        return _FakeQuery(self._store, self._name, "update", payload=values)
+
+    def upsert(self, rows, on_conflict="id"):
+        return _FakeQuery(self._store, self._name, "upsert", payload=rows, on_conflict=on_conflict)
+
+
+class FakeSupabase:
+    """In-memory stand-in for the Supabase client.
+
+    With `sticky=True` writes are counted but rows stay unranked, so the same
+    sessions can be ranked over and over during a load test.
+    """
+
+    def __init__(self, latency: float = 0.0, sticky: bool = True):
+        self.latency = latency
+        self.sticky = sticky
+        self.tables: Dict[str, List[dict]] = {}
+        self.lock = threading.Lock()
+        self.writes = 0
+
+    def table(self, name):
+        return _FakeTable(self, name)
+
+    def seed_sessions(self, sessions: Dict[int, str]):
+        rows = self.tables.setdefault(SESSION_TABLE, [])
+        for row_id, (user_id, csv_text) in enumerate(sessions.items(), start=len(rows) + 1):
+            rows.append({"id": row_id, "userid": user_id, "rankedcsv": csv_text, "IsRanked": False})
+
+
+def fake_users_transport(latency: float = 0.0) -> httpx.MockTransport:
+    """MockTransport answering the C# backend's GET /api/users/{id}."""
+    price_ranges = ['$', '$$', '$$$']
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        parts = request.url.path.rstrip('/').split('/')
+        if len(parts) < 4 or parts[-2] != 'users' or not parts[-1].isdigit():
+            return httpx.Response(404, json={"error": "not found"})
+        user_id = int(parts[-1])
+        return httpx.Response(200, json={
+            "preferences": "concert, sports, comedy" if user_id % 2 else "film, art, food",
+            "dislikes": "hockey" if user_id % 3 else "",
+            "priceRange": price_ranges[user_id % len(price_ranges)],
+            "maxDistance": 25 + (user_id % 4) * 25
+        })
+
+    return httpx.MockTransport(handler)
+
+
+def percentile(values, q) -> float:
+    return float(np.percentile(values, q)) if values else float('nan')
+
+
+@asynccontextmanager
+async def patched_app(fake_supabase: FakeSupabase, result_cache: bool, backend_latency: float):
+    """Point the app at the fakes for one run; the original globals are put back afterwards."""
+    saved = (app.get_supabase, app.result_cache, app.last_results, services._client)
+    app.get_supabase = lambda: fake_supabase
+    app.result_cache = RankedResultCache(max_entries=RESULT_CACHE_CONFIG['max_entries'] if result_cache else 0)
+    app.last_results = LastResultCache()
+    if app.event_catalog is not None:
+        app.event_catalog.clear()
+    services._client = httpx.AsyncClient(transport=fake_users_transport(backend_latency))
+    try:
+        yield
+    finally:
+        await services.close_http_client()
+        app.get_supabase, app.result_cache, app.last_results, services._client = saved
+        # Synthetic sessions shouldn't outlive the run in the shared catalog
+        if app.event_catalog is not None:
+            app.event_catalog.clear()
+
+
+async def run_load(n_events: int, requests: int, concurrency: int, users: int = 50,
+                   supabase_latency: float = 0.0, backend_latency: float = 0.0,
+                   result_cache: bool = False, stream: Optional[str] = None) -> dict:
+    """Drive POST /rank-events/{user_id} and return a latency/throughput summary."""
+    fake_supabase = FakeSupabase(latency=supabase_latency)
+    header, rows = synthetic_session_csv(n_events).rstrip('\n').split('\n', 1)
+    sessions = {}
+    for user_id in range(1, users + 1):
+        # Per-user row order, so every session hashes differently
+        shuffled = rows.split('\n')
+        random.Random(user_id).shuffle(shuffled)
+        sessions[user_id] = "\n".join([header] + shuffled) + "\n"
+    fake_supabase.seed_sessions(sessions)
+
+    async with patched_app(fake_supabase, result_cache, backend_latency):
+        if not app.warmup_state.ready:
+            await run_warmup(app.warmup_state, app.warmup_steps())
+
+        latencies = []
+        statuses: Dict[int, int] = {}
+        semaphore = asyncio.Semaphore(concurrency)
+        params = {"format": stream} if stream else None
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app),
+                                     base_url="http://loadtest", timeout=None) as client:
+            async def one(i):
+                user_id = (i % users) + 1
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.post(f"/rank-events/{user_id}", params=params)
+                    await response.aread()
+                    latencies.append(time.perf_counter() - start)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(one(i) for i in range(requests)))
+            elapsed = time.perf_counter() - started
+
+    return {
+        "events_per_session": n_events,
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else float('nan'),
+        "statuses": statuses,
+        "supabase_writes": fake_supabase.writes
+    }
+
+
+def format_report(results: List[dict]) -> str:
+    columns = ["events_per_session", "requests", "concurrency", "rps", "p50_ms", "p95_ms", "p99_ms", "mean_ms", "statuses"]
+    headers = ["events", "requests", "conc", "req/s", "p50 ms", "p95 ms", "p99 ms", "mean ms", "statuses"]
+    table = [headers] + [[str(result[col]) for col in columns] for result in results]
+    widths = [max(len(row[i]) for row in table) for i in range(len(headers))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test for /rank-events")
+    parser.add_argument("--events", type=int, nargs="+", default=[100, 1000, 10000],
+                        help="events per session; one run per value (up to 100000)")
+    parser.add_argument("--requests", type=int, default=100, help="requests per run")
+    parser.add_argument("--concurrency", type=int, default=4, help="requests in flight at once")
+    parser.add_argument("--users", type=int, default=50, help="distinct users/sessions to cycle through")
+    parser.add_argument("--supabase-latency", type=float, default=0.0, help="seconds added to each fake Supabase call")
+    parser.add_argument("--backend-latency", type=float, default=0.0, help="seconds added to each fake C# call")
+    parser.add_argument("--result-cache", action="store_true", help="keep the ranked result cache enabled")
+    parser.add_argument("--stream", choices=["ndjson", "csv"], help="use the streaming response mode")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    async def run_all():
+        # One event loop for every run; the app's asyncio primitives bind to the first loop they see
+        return [await run_load(n_events, args.requests, args.concurrency, users=args.users,
+                               supabase_latency=args.supabase_latency, backend_latency=args.backend_latency,
+                               result_cache=args.result_cache, stream=args.stream)
+                for n_events in args.events]
+
+    results = asyncio.run(run_all())
+    print(json.dumps(results, indent=2) if args.json else format_report(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+# metrics.py
+#
+# Minimal Prometheus text-format metrics (exposition format 0.0.4) so the
+# ranking service can be scraped without pulling in prometheus_client.
+
+import contextvars
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Tuple
+
+import tracing
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EVENT_COUNT_BUCKETS = (0, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+# Cleared by suppressed() so warm-up traffic stays out of the production series
+_recording = contextvars.ContextVar("metrics_recording", default=True)
+
+
+@contextmanager
+def suppressed():
+    """Drop counter and histogram updates made in this context (and threads started from it)."""
+    token = _recording.set(False)
+    try:
+        yield
+    finally:
+        _recording.reset(token)
+
+
+def _format_value(value) -> str:
+    value = float(value)
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labelnames, labelvalues, extra=()) -> str:
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    type_name = "untyped"
+    # Unlabelled metrics are exported as 0 before their first update
+    _eager_default = True
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if self._eager_default and not self.labelnames:
+            self.labels()
+        with _registry_lock:
+            _registry.append(self)
+
+    def labels(self, *labelvalues):
+        labelvalues = tuple(str(v) for v in labelvalues)
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        with self._lock:
+            child = self._children.get(labelvalues)
+            if child is None:
+                child = self._new_child()
+                self._children[labelvalues] = child
+            return child
+
+    def _default(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; call labels() first")
+        return self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self):
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labelvalues, extra, value in self._samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, labelvalues, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1.0):
+        if _recording.get():
+            self._add(amount)
+
+    def _add(self, amount):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in children:
+            yield "", labelvalues, (), child.value
+
+
+class _GaugeChild(_CounterChild):
+    # Gauges track current state, so they are never suppressed
+    def inc(self, amount=1.0):
+        self._add(amount)
+
+    def dec(self, amount=1.0):
+        self._add(-amount)
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+    @contextmanager
+    def track_inprogress(self):
+        self.inc()
+        try:
+            yield
+        finally:
+            self.dec()
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def inc(self, amount=1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default().dec(amount)
+
+    def set(self, value):
+        self._default().set(value)
+
+    def track_inprogress(self):
+        return self._default().track_inprogress()
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in children:
+            yield "", labelvalues, (), child.value
+
+
+class CallbackGauge(_Metric):
+    """Gauge (or counter, via type_name) whose value is read from a callable at scrape time."""
+    _eager_default = False
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], float], type_name="gauge"):
+        super().__init__(name, documentation)
+        self.callback = callback
+        self.type_name = type_name
+
+    def _samples(self):
+        yield "", (), (), float(self.callback())
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        if not _recording.get():
+            return
+        with self._lock:
+            self.sum += value
+            self.count += 1
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.counts[i] += 1
+                    break
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def time(self):
+        return self._default().time()
+
+    def _samples(self):
+        with self._lock:
+            children = list(self._children.items())
+        for labelvalues, child in children:
+            with child._lock:
+                counts, total, count = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield "_bucket", labelvalues, (("le", _format_value(bound)),), cumulative
+            yield "_sum", labelvalues, (), total
+            yield "_count", labelvalues, (), count
+
+
+def render_latest() -> str:
+    with _registry_lock:
+        metrics = list(_registry)
+    return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+# Ranking service metrics
+STAGE_LATENCY = Histogram(
+    "ranking_stage_duration_seconds",
+    "Time spent in each stage of /rank-events.",
+    labelnames=("stage",)
+)
+REQUEST_LATENCY = Histogram(
+    "ranking_request_duration_seconds",
+    "End-to-end ranking request latency.",
+    labelnames=("endpoint", "outcome")
+)
+EVENTS_PER_REQUEST = Histogram(
+    "ranking_events_per_request",
+    "Events in the session CSV before filtering.",
+    buckets=EVENT_COUNT_BUCKETS
+)
+EVENTS_REMOVED_PER_REQUEST = Histogram(
+    "ranking_events_removed_per_request",
+    "Events removed by the filter stage.",
+    buckets=EVENT_COUNT_BUCKETS
+)
+EVENTS_REMOVED = Counter(
+    "ranking_events_removed_total",
+    "Total events removed by the filter stage."
+)
+NOT_MODIFIED = Counter(
+    "ranking_not_modified_total",
+    "Ranking requests answered with 304 Not Modified."
+)
+IN_FLIGHT = Gauge(
+    "ranking_requests_in_flight",
+    "Ranking requests currently being processed.",
+    labelnames=("endpoint",)
+)
+
+
+@contextmanager
+def stage(name: str, **attributes):
+    """Time one stage of the ranking pipeline and trace it as a span.
+
+    `with stage("csv_parse") as span: ...`; keyword arguments become span attributes.
+    """
+    # Under suppressed() no labelled series is created, not even an empty one
+    timer = STAGE_LATENCY.labels(name).time() if _recording.get() else nullcontext()
+    with timer, tracing.span(name, **attributes) as span:
+        yield span
+
+
+def track_request(endpoint: str):
+    """Decorator for async endpoints: in-flight gauge, latency by outcome and a root span."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            outcome = "error"
+            with IN_FLIGHT.labels(endpoint).track_inprogress(), \
+                    tracing.span(endpoint, kind=tracing.SPAN_KIND_SERVER):
+                try:
+                    result = await func(*args, **kwargs)
+                    outcome = "success"
+                    return result
+                except Exception as exc:
+                    status_code = getattr(exc, "status_code", None)
+                    if status_code is not None:
+                        outcome = str(status_code)
+                    raise
+                finally:
+                    REQUEST_LATENCY.labels(endpoint, outcome).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
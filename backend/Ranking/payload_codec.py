@@ -0,0 +1,108 @@
+# payload_codec.py
+#
+# Session payloads in UserSessionData.rankedcsv may be CSV text or a columnar
+# Arrow IPC / Parquet payload, base64-encoded (text column) or as a Postgres
+# bytea hex literal ("\x..."). Columnar payloads skip the CSV text parse and
+# type inference entirely. pyarrow is only needed for the columnar formats.
+
+import base64
+import binascii
+import io
+
+import pandas as pd
+
+from config import PAYLOAD_CONFIG
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+CSV = 'csv'
+ARROW = 'arrow'
+PARQUET = 'parquet'
+
+# Leading magic bytes: "ARROW1" (IPC file), 0xFFFFFFFF continuation marker (IPC stream), "PAR1" (Parquet)
+_MAGIC = (
+    (b"ARROW1", ARROW),
+    (b"\xff\xff\xff\xff", ARROW),
+    (b"PAR1", PARQUET),
+)
+
+
+class PayloadFormatError(ValueError):
+    """The session payload itself is malformed (bad encoding or unreadable columnar data)."""
+
+
+def detect_format(payload: str) -> str:
+    """Classify a rankedcsv value as 'csv', 'arrow' or 'parquet' from its leading bytes."""
+    try:
+        if payload.startswith("\\x"):
+            head = bytes.fromhex(payload[2:14])
+        else:
+            head = base64.b64decode(payload[:8], validate=True)
+    except (ValueError, binascii.Error):
+        return CSV
+    for magic, fmt in _MAGIC:
+        if head.startswith(magic):
+            return fmt
+    return CSV
+
+
+def _payload_bytes(payload: str) -> bytes:
+    if payload.startswith("\\x"):
+        try:
+            return bytes.fromhex(payload[2:])
+        except ValueError as exc:
+            raise PayloadFormatError(f"Invalid hex session payload: {exc}") from exc
+    try:
+        return base64.b64decode(payload, validate=False)
+    except binascii.Error as exc:
+        raise PayloadFormatError(f"Invalid base64 session payload: {exc}") from exc
+
+
+def _require_pyarrow(fmt: str):
+    # A deployment problem rather than bad input, so not a PayloadFormatError
+    if pa is None:
+        raise RuntimeError(f"{fmt} session payloads need pyarrow, which is not installed")
+
+
+def decode_payload(payload: str, fmt: str) -> pd.DataFrame:
+    """Load an Arrow IPC or Parquet payload into a DataFrame.
+
+    Arrow buffers are wrapped without copying, and numeric columns without
+    nulls are handed to pandas without another copy where pyarrow allows it.
+    """
+    _require_pyarrow(fmt)
+    raw = _payload_bytes(payload)
+    buffer = pa.py_buffer(raw)
+    try:
+        if fmt == ARROW:
+            if raw[:6] == b"ARROW1":
+                table = pa_ipc.open_file(buffer).read_all()
+            else:
+                table = pa_ipc.open_stream(buffer).read_all()
+        else:
+            table = pq.read_table(pa.BufferReader(buffer))
+    except pa.ArrowException as exc:
+        raise PayloadFormatError(f"Unreadable {fmt} session payload: {exc}") from exc
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+
+def encode_frame(df: pd.DataFrame, fmt: str) -> str:
+    """Serialize a ranked frame back into the format the session arrived in (base64 for binary)."""
+    if fmt == CSV:
+        return df.to_csv(index=False)
+    _require_pyarrow(fmt)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = io.BytesIO()
+    if fmt == ARROW:
+        options = pa_ipc.IpcWriteOptions(compression=PAYLOAD_CONFIG['arrow_compression'])
+        with pa_ipc.new_file(sink, table.schema, options=options) as writer:
+            writer.write_table(table)
+    else:
+        pq.write_table(table, sink, compression=PAYLOAD_CONFIG['parquet_compression'])
+    return base64.b64encode(sink.getvalue()).decode('ascii')
+
@@ -0,0 +1,175 @@
+# result_cache.py
+
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from config import RESULT_CACHE_CONFIG
+
+
+def normalize_csv(csv_text: str) -> str:
+    """Canonicalize CSV text so byte-level noise doesn't defeat the cache.
+
+    Drops a leading BOM, unifies line endings between records, strips
+    trailing whitespace at the end of each record and removes trailing blank
+    lines. Text inside a quoted field, line breaks included, is left as is,
+    so payloads that differ only there keep different keys. The normalized
+    text is also what gets parsed, so a hit and a miss always see the same input.
+    """
+    pieces = re.split(r'(\r\n|\r|\n)', csv_text.lstrip('\ufeff'))
+    out = []
+    in_quotes = False
+    for line, ending in zip(pieces[::2], pieces[1::2] + ['']):
+        # A doubled quote inside a field toggles twice, so the parity is still right
+        in_quotes ^= line.count('"') % 2 == 1
+        if in_quotes:
+            out.append(line + ending)
+        else:
+            out.append(line.rstrip() + '\n')
+    text = ''.join(out)
+    # An unterminated quote runs to the end, so there are no blank lines to drop
+    return text if in_quotes else text.rstrip('\n')
+
+
+def profile_fingerprint(formatted_user: dict) -> str:
+    """Stable text form of a formatted user profile (see app.format_user_preferences)."""
+    return "|".join([
+        ",".join(sorted(str(p) for p in formatted_user['Preferences'])),
+        ",".join(sorted(str(d) for d in formatted_user['Disliked'])),
+        str(formatted_user['Price Range']),
+        str(formatted_user['Max Distance'])
+    ])
+
+
+def clock_bucket(now: Optional[float] = None,
+                 bucket_seconds: int = RESULT_CACHE_CONFIG['clock_bucket_seconds']) -> int:
+    """Time scores drift with the clock, so results are only reused within one bucket."""
+    if now is None:
+        now = time.time()
+    return int(now // bucket_seconds)
+
+
+def cache_key(normalized_csv: str, formatted_user: dict, bucket: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(normalized_csv.encode('utf-8'))
+    digest.update(b'\x00')
+    digest.update(profile_fingerprint(formatted_user).encode('utf-8'))
+    digest.update(b'\x00')
+    digest.update(str(bucket).encode('ascii'))
+    return digest.hexdigest()
+
+
+def etag_for(key: str) -> str:
+    """Strong ETag for a ranking; the cache key already covers session, profile and clock bucket."""
+    return f'"{key}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match comparison (weak comparison, as RFC 9110 specifies for this header)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class RankedResultCache:
+    """Bounded LRU of ranked outputs, capped both by entry count and total size.
+
+    Values are (ranked_csv, events_processed, events_removed) tuples; the size
+    of an entry is the length of its ranked CSV.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_CONFIG['max_entries'],
+                 max_bytes=RESULT_CACHE_CONFIG['max_bytes']):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Tuple[str, int, int]]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Tuple[str, int, int]):
+        size = len(value[0])
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._sizes[key]
+                self._entries.move_to_end(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0
+            }
+
+
+class LastResultCache:
+    """Most recent (etag, ranked result) per user, bounded by number of users (LRU)."""
+
+    def __init__(self, max_users=RESULT_CACHE_CONFIG['last_result_max_users']):
+        self.max_users = max_users
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id: int) -> Optional[Tuple[str, Tuple[str, int, int]]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                self._entries.move_to_end(user_id)
+            return entry
+
+    def put(self, user_id: int, etag: str, ranked: Tuple[str, int, int]):
+        with self._lock:
+            self._entries[user_id] = (etag, ranked)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
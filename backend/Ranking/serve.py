@@ -0,0 +1,82 @@
+# serve.py
+#
+# Pre-fork launcher. With WEB_CONCURRENCY > 1 the parent builds the event
+# catalog once from the unranked sessions in Supabase, freezes it into a
+# file (shared_catalog.py) and starts uvicorn workers that map it read-only,
+# so adding workers doesn't multiply the catalog's memory. Each worker still
+# keeps a small private catalog for events that arrive after start-up.
+#
+#   WEB_CONCURRENCY=4 python serve.py
+
+import logging
+import os
+import tempfile
+
+import uvicorn
+from dotenv import load_dotenv
+from supabase import create_client
+
+from config import SERVE_CONFIG, SHARED_CATALOG_ENV, EVENT_CATALOG_CONFIG
+from event_catalog import EventCatalog
+from logging_setup import configure_logging
+from result_cache import normalize_csv
+from session_schema import SessionSchemaError, validate_session_csv
+from session_store import iter_unranked_sessions
+from shared_catalog import write_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def preload_catalog(client, max_sessions: int = SERVE_CONFIG['preload_max_sessions']) -> EventCatalog:
+    """Parse the events of up to `max_sessions` pending sessions into one catalog."""
+    # Capped by the loop below instead, since a reset midway would throw away what was parsed
+    catalog = EventCatalog(max_events=float('inf'))
+    sessions = skipped = 0
+    for row in iter_unranked_sessions(client, max_sessions):
+        csv_text = normalize_csv(row.get("rankedcsv") or "")
+        try:
+            validate_session_csv(csv_text)
+            catalog.parse_session(csv_text)
+            sessions += 1
+        except (SessionSchemaError, ValueError) as exc:
+            skipped += 1
+            logger.debug(f"Skipping session {row.get('id')} in catalog preload: {exc}")
+        if len(catalog) >= EVENT_CATALOG_CONFIG['max_events']:
+            break
+    logger.info(f"Preloaded {len(catalog)} events from {sessions} sessions ({skipped} skipped)")
+    return catalog
+
+
+def publish_catalog(catalog: EventCatalog, directory=SERVE_CONFIG['shared_catalog_dir']) -> str:
+    """Write the frozen catalog where workers can map it; returns the file path."""
+    fd, path = tempfile.mkstemp(prefix="ranking-catalog-", suffix=".bin", dir=directory)
+    os.close(fd)
+    size = write_catalog(catalog, path)
+    logger.info(f"Published shared event catalog: {len(catalog)} events, {size} bytes", extra={"path": path})
+    return path
+
+
+def main():
+    load_dotenv()
+    configure_logging()
+    workers = SERVE_CONFIG['workers']
+    shared_path = None
+    if workers > 1 and SERVE_CONFIG['shared_catalog'] and EVENT_CATALOG_CONFIG['enabled']:
+        try:
+            client = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+            shared_path = publish_catalog(preload_catalog(client))
+            # Workers are spawned, so they inherit this through the environment
+            os.environ[SHARED_CATALOG_ENV] = shared_path
+        except Exception as exc:
+            # Workers can still rank with private catalogs
+            logger.warning(f"Shared event catalog preload failed, starting without it: {exc}")
+
+    try:
+        uvicorn.run("app:app", host="0.0.0.0", port=SERVE_CONFIG['port'], workers=workers)
+    finally:
+        if shared_path is not None:
+            os.unlink(shared_path)
+
+
+if __name__ == "__main__":
+    main()
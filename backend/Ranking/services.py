@@ -1,30 +1,177 @@
 # services.py
 
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
 import httpx
 from models import UserPreferences
 from fastapi import HTTPException
 import os
+import tracing
+from circuit_breaker import CircuitBreaker, CircuitOpenError, STATE_VALUES
+from config import PREFERENCES_CLIENT_CONFIG, STALE_PREFERENCES_CONFIG
+from metrics import CallbackGauge, Counter
+
+logger = logging.getLogger(__name__)
 
 C_SHARP_BACKEND_URL = os.getenv("C_SHARP_BACKEND_URL", "https://ventaura-backend-rayfould.fly.dev")
-async def fetch_user_preferences(user_id: int) -> UserPreferences:
-    url = f"{C_SHARP_BACKEND_URL}/api/users/{user_id}"
-    async with httpx.AsyncClient() as client:
+
+PREFERENCE_RETRIES = Counter(
+    "ranking_preference_fetch_retries_total",
+    "Retried GETs to the C# backend user endpoint."
+)
+PREFERENCE_FALLBACKS = Counter(
+    "ranking_preference_fetch_fallbacks_total",
+    "Preference fetches answered from the stale cache or failed fast, by reason.",
+    labelnames=("result",)
+)
+
+preferences_breaker = CircuitBreaker("csharp_user_preferences")
+CallbackGauge("ranking_preference_circuit_state", "C# backend circuit state (0=closed, 1=half-open, 2=open).",
+              lambda: STATE_VALUES[preferences_breaker.state])
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"HTTP {response.status_code}")
+        self.response = response
+
+
+class StalePreferencesCache:
+    """Last good preferences per user, kept to answer while the backend is unavailable."""
+
+    def __init__(self, max_entries=STALE_PREFERENCES_CONFIG['max_entries'],
+                 max_age=STALE_PREFERENCES_CONFIG['max_age_seconds']):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, user_id: int, preferences: UserPreferences):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic(), preferences)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, user_id: int) -> Optional[UserPreferences]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or time.monotonic() - entry[0] > self.max_age:
+                return None
+            return entry[1]
+
+
+stale_preferences = StalePreferencesCache()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client so connections to the C# backend are pooled across requests."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=httpx.Timeout(
+            PREFERENCES_CLIENT_CONFIG['timeout'],
+            connect=PREFERENCES_CLIENT_CONFIG['connect_timeout']
+        ))
+    return _client
+
+
+async def close_http_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _retry_delay(attempt: int) -> float:
+    # Full jitter: uniform in [0, base * 2^attempt], capped
+    cap = min(PREFERENCES_CLIENT_CONFIG['retry_max_delay'],
+              PREFERENCES_CLIENT_CONFIG['retry_base_delay'] * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+async def _get_with_retries(url: str, user_id: int) -> httpx.Response:
+    """GET with bounded, jittered retries on transport errors and 5xx/429 responses.
+
+    Each attempt passes through the circuit breaker, so a failing backend
+    stops receiving retries as soon as the breaker opens.
+    """
+    max_retries = PREFERENCES_CLIENT_CONFIG['max_retries']
+    attempt = 0
+    while True:
+        preferences_breaker.before_call()
         try:
-            response = await client.get(url, timeout=10.0)
-            response.raise_for_status()
-            data = response.json()
-            print(f"Raw JSON response: {data}")
-            preferences = UserPreferences.parse_obj(data)
+            response = await get_http_client().get(url, headers=tracing.traceparent_headers())
+            if response.status_code >= 500 or response.status_code == 429:
+                raise _RetryableStatus(response)
+        except (httpx.RequestError, _RetryableStatus) as exc:
+            preferences_breaker.record_failure()
+            if attempt >= max_retries:
+                raise
+            delay = _retry_delay(attempt)
+            attempt += 1
+            PREFERENCE_RETRIES.inc()
+            logger.warning(f"Preference fetch failed ({exc!r}), retry {attempt}/{max_retries} in {delay:.2f}s",
+                           extra={"user_id": user_id})
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            # Cancelled, or failed in a way that says nothing about the backend:
+            # don't let a half-open trial slot leak
+            preferences_breaker.release()
+            raise
+        # 4xx other than 429 means the backend is healthy; the request itself was bad
+        preferences_breaker.record_success()
+        return response
+
+
+def _stale_or_raise(user_id: int, exc: HTTPException) -> UserPreferences:
+    if STALE_PREFERENCES_CONFIG['enabled']:
+        preferences = stale_preferences.get(user_id)
+        if preferences is not None:
+            PREFERENCE_FALLBACKS.labels("stale").inc()
+            logger.warning("Serving stale preferences", extra={"user_id": user_id, "reason": exc.detail})
             return preferences
-        except httpx.RequestError as exc:
-            print(f"An error occurred while requesting {exc.request.url!r}.")
-            raise HTTPException(status_code=503, detail="Service Unavailable: Unable to reach User service.")
-        except httpx.HTTPStatusError as exc:
-            print(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}.")
-            if exc.response.status_code == 404:
-                raise HTTPException(status_code=404, detail="User not found.")
-            else:
-                raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
-        except Exception as exc:
-            print(f"Unexpected error: {exc}")
-            raise HTTPException(status_code=500, detail="Internal Server Error: Unexpected error while fetching user data.")
\ No newline at end of file
+    PREFERENCE_FALLBACKS.labels("failed").inc()
+    raise exc
+
+
+async def fetch_user_preferences(user_id: int) -> UserPreferences:
+    url = f"{C_SHARP_BACKEND_URL}/api/users/{user_id}"
+    try:
+        response = await _get_with_retries(url, user_id)
+        response.raise_for_status()
+        data = response.json()
+        logger.debug(f"Raw JSON response: {data}", extra={"user_id": user_id})
+        preferences = UserPreferences.parse_obj(data)
+        stale_preferences.put(user_id, preferences)
+        return preferences
+    except CircuitOpenError as exc:
+        logger.warning(str(exc), extra={"user_id": user_id})
+        return _stale_or_raise(user_id, HTTPException(
+            status_code=503,
+            detail="Service Unavailable: User service circuit is open.",
+            headers={"Retry-After": str(max(1, round(exc.retry_after)))}
+        ))
+    except httpx.RequestError as exc:
+        logger.warning(f"An error occurred while requesting {exc.request.url!r}.", extra={"user_id": user_id})
+        return _stale_or_raise(user_id, HTTPException(status_code=503, detail="Service Unavailable: Unable to reach User service."))
+    except _RetryableStatus as exc:
+        logger.warning(f"Error response {exc.response.status_code} while requesting {url!r}.", extra={"user_id": user_id})
+        return _stale_or_raise(user_id, HTTPException(status_code=exc.response.status_code, detail=exc.response.text))
+    except httpx.HTTPStatusError as exc:
+        logger.warning(f"Error response {exc.response.status_code} while requesting {exc.request.url!r}.", extra={"user_id": user_id})
+        if exc.response.status_code == 404:
+            raise HTTPException(status_code=404, detail="User not found.")
+        else:
+            raise HTTPException(status_code=exc.response.status_code, detail=exc.response.text)
+    except Exception as exc:
+        logger.exception(f"Unexpected error: {exc}", extra={"user_id": user_id})
+        raise HTTPException(status_code=500, detail="Internal Server Error: Unexpected error while fetching user data.")
@@ -0,0 +1,82 @@
+# session_schema.py
+#
+# Header-only validation of session payloads. Runs on the raw text, before
+# normalization and any DataFrame, so a malformed session is rejected without
+# paying for a pass over the body.
+
+import csv
+from collections import Counter
+from itertools import islice
+from typing import List
+
+REQUIRED_EVENT_COLUMNS = ['contentId', 'title', 'description', 'location', 'start',
+                          'source', 'type', 'currencyCode', 'amount', 'url', 'distance']
+
+
+def _iter_lines(text: str, start: int = 0):
+    """Yield lines lazily so only the start of a large payload is ever touched."""
+    while start < len(text):
+        end = text.find('\n', start)
+        if end == -1:
+            yield text[start:]
+            return
+        yield text[start:end + 1]
+        start = end + 1
+
+
+def _record_lines(text: str):
+    """_iter_lines with normalize_csv's cleanup (leading BOM, CRLF, trailing whitespace
+    outside quoted fields), so a raw payload validates exactly like its normalized form."""
+    in_quotes = False
+    for line in _iter_lines(text, start=1 if text.startswith('\ufeff') else 0):
+        in_quotes ^= line.count('"') % 2 == 1
+        yield line if in_quotes else line.rstrip() + '\n'
+
+
+class SessionSchemaError(ValueError):
+    """A session payload that can't be ranked; `problems` lists every issue found."""
+
+    def __init__(self, problems: List[str]):
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+def check_columns(columns: List[str]) -> List[str]:
+    """Problems with a session's column names (missing, duplicated or blank)."""
+    problems = []
+    counts = Counter(columns)
+    missing = [col for col in REQUIRED_EVENT_COLUMNS if col not in counts]
+    if missing:
+        problems.append(f"missing required columns: {', '.join(missing)}")
+    duplicated = sorted(col for col, count in counts.items() if count > 1)
+    if duplicated:
+        problems.append(f"duplicated columns: {', '.join(duplicated)}")
+    blank = [str(i + 1) for i, col in enumerate(columns) if not col.strip()]
+    if blank:
+        problems.append(f"blank column names at positions: {', '.join(blank)}")
+    near_misses = sorted(col for col in counts
+                         if col not in REQUIRED_EVENT_COLUMNS
+                         and col.strip().lower() in {req.lower() for req in missing})
+    if near_misses:
+        problems.append(f"column names are case- and whitespace-sensitive: got {', '.join(near_misses)}")
+    return problems
+
+
+def validate_session_csv(csv_text: str) -> List[str]:
+    """Validate a session CSV from its header and first record only; returns the header.
+
+    Raises:
+        SessionSchemaError: with one message per problem found
+    """
+    if not csv_text or csv_text.isspace():
+        raise SessionSchemaError(["session payload is empty"])
+
+    # csv.reader, not split('\n'), so quoted fields containing newlines are handled
+    records = list(islice(csv.reader(_record_lines(csv_text)), 2))
+    header = records[0]
+    problems = check_columns(header)
+    if len(records) > 1 and len(records[1]) != len(header):
+        problems.append(f"first event has {len(records[1])} fields but the header has {len(header)} columns")
+    if problems:
+        raise SessionSchemaError(problems)
+    return header
@@ -0,0 +1,129 @@
+# session_store.py
+
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config import SESSION_TABLE, SESSION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+def _chunked(items: List, size: int) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _execute_with_retry(build_query, max_retries: int = SESSION_CONFIG['max_retries']):
+    """Execute a Supabase query, retrying with jittered exponential backoff.
+
+    `build_query` must return a fresh query builder on every call, since
+    builders cannot be re-executed once they have failed mid-request.
+    """
+    attempt = 0
+    while True:
+        try:
+            return build_query().execute()
+        except Exception as exc:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            delay = SESSION_CONFIG['retry_base_delay'] * (2 ** (attempt - 1))
+            delay *= random.uniform(0.5, 1.5)
+            logger.warning(f"Supabase request failed ({exc}), retry {attempt}/{max_retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+
+def fetch_unranked_session(client, user_id: int) -> Optional[dict]:
+    """Return the unranked UserSessionData row for one user, or None."""
+    response = _execute_with_retry(
+        lambda: client.table(SESSION_TABLE).select("*").eq("userid", user_id).eq("IsRanked", False)
+    )
+    if not response.data:
+        return None
+    return response.data[0]
+
+
+def fetch_unranked_sessions(client, user_ids: Iterable[int],
+                            page_size: int = SESSION_CONFIG['page_size']) -> Dict[int, dict]:
+    """Fetch the unranked rows for many users with as few round trips as possible.
+
+    User ids are sent in `in_` filters of bounded size (to keep the request URL
+    short) and each filter is paginated with `range`. When a user has more than
+    one unranked row the first one by id is kept, matching the single-user path.
+
+    Returns:
+        dict: user id -> UserSessionData row
+    """
+    unique_ids = sorted(set(int(uid) for uid in user_ids))
+    sessions: Dict[int, dict] = {}
+    for id_chunk in _chunked(unique_ids, SESSION_CONFIG['id_chunk_size']):
+        offset = 0
+        while True:
+            response = _execute_with_retry(
+                lambda: client.table(SESSION_TABLE).select("*")
+                .in_("userid", id_chunk).eq("IsRanked", False)
+                .order("id").range(offset, offset + page_size - 1)
+            )
+            rows = response.data or []
+            for row in rows:
+                sessions.setdefault(row["userid"], row)
+            if len(rows) < page_size:
+                break
+            offset += page_size
+    logger.info(f"Fetched {len(sessions)} unranked sessions for {len(unique_ids)} users")
+    return sessions
+
+
+def iter_unranked_sessions(client, limit: int,
+                           page_size: int = SESSION_CONFIG['page_size']) -> Iterable[dict]:
+    """Yield up to `limit` unranked UserSessionData rows across all users, oldest first."""
+    offset = 0
+    while offset < limit:
+        end = min(offset + page_size, limit) - 1
+        response = _execute_with_retry(
+            lambda: client.table(SESSION_TABLE).select("*").eq("IsRanked", False)
+            .order("id").range(offset, end)
+        )
+        rows = response.data or []
+        yield from rows
+        if len(rows) < end - offset + 1:
+            return
+        offset = end + 1
+
+
+def mark_ranked(client, row_id: int, ranked_csv: str):
+    """Store the ranked CSV for a single row and flag it as ranked."""
+    return _execute_with_retry(
+        lambda: client.table(SESSION_TABLE).update({
+            "rankedcsv": ranked_csv,
+            "IsRanked": True
+        }).eq("id", row_id)
+    )
+
+
+def upsert_ranked_sessions(client, rows: List[dict],
+                           chunk_size: int = SESSION_CONFIG['upsert_chunk_size']) -> int:
+    """Write many ranked results back in chunked upserts.
+
+    Each row needs `id`, `userid` and `rankedcsv`; `IsRanked` is set here.
+    `userid` is included because an upsert is an insert-or-update and the
+    insert half must satisfy the table's not-null constraints.
+
+    Returns:
+        int: number of rows written
+    """
+    payload = [{
+        "id": row["id"],
+        "userid": row["userid"],
+        "rankedcsv": row["rankedcsv"],
+        "IsRanked": True
+    } for row in rows]
+
+    written = 0
+    for chunk in _chunked(payload, chunk_size):
+        _execute_with_retry(lambda: client.table(SESSION_TABLE).upsert(chunk, on_conflict="id"))
+        written += len(chunk)
+    logger.info(f"Upserted {written} ranked sessions in chunks of {chunk_size}")
+    return written
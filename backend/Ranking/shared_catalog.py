@@ -0,0 +1,142 @@
+# shared_catalog.py
+#
+# Read-only event catalog stored in one file that several processes map.
+# serve.py builds it in the parent before forking uvicorn workers; each
+# worker maps the file read-only, so the pages are shared through the page
+# cache and N workers don't hold N copies.
+#
+# Layout: 8-byte little-endian header length, a JSON header (row count,
+# vocabularies and array locations), then 64-byte aligned arrays. Keys are
+# sorted so lookups are a single searchsorted. Free text is stored as one
+# UTF-8 blob per column with int64 offsets and a null mask.
+
+import json
+import mmap
+import os
+import struct
+from typing import Dict
+
+import numpy as np
+
+from event_catalog import CODED_COLUMNS, TEXT_COLUMNS
+
+_ALIGN = 64
+_LENGTH = struct.Struct('<Q')
+
+
+def _frozen_arrays(snapshot: dict) -> Dict[str, np.ndarray]:
+    order = np.argsort(snapshot['keys'], kind='stable')
+    arrays = {
+        'keys': snapshot['keys'][order].astype(np.uint64),
+        'start': snapshot['start'][order].astype('datetime64[ns]').view(np.int64),
+        'amount': snapshot['amount'][order].astype(np.float64),
+    }
+    for col in CODED_COLUMNS:
+        arrays[f'code:{col}'] = snapshot['codes'][col][order].astype(np.int32)
+    for col in TEXT_COLUMNS:
+        values = snapshot['text'][col][order]
+        null = np.array([not isinstance(value, str) for value in values], dtype=np.bool_)
+        encoded = [b'' if is_null else value.encode('utf-8') for value, is_null in zip(values, null)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(chunk) for chunk in encoded], out=offsets[1:])
+        arrays[f'null:{col}'] = null
+        arrays[f'offsets:{col}'] = offsets
+        arrays[f'blob:{col}'] = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    return arrays
+
+
+def write_catalog(catalog, path: str) -> int:
+    """Freeze an EventCatalog into a shareable file; returns its size in bytes."""
+    snapshot = catalog.snapshot()
+    arrays = _frozen_arrays(snapshot)
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({
+        'events': len(arrays['keys']),
+        # Code 0 is the missing-value slot in EventCatalog's vocabularies
+        'vocab': {col: snapshot['vocab'][col][1:] for col in CODED_COLUMNS},
+        'arrays': layout
+    }).encode('utf-8')
+    data_start = -(-(_LENGTH.size + len(header)) // _ALIGN) * _ALIGN
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_LENGTH.pack(len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name][0])
+            f.write(array.tobytes())
+        f.truncate(data_start + offset)
+        size = f.tell()
+    # Workers never see a half-written file
+    os.replace(tmp_path, path)
+    return size
+
+
+class SharedEventCatalog:
+    """Read-only view over a catalog file written by write_catalog.
+
+    Every array is a zero-copy numpy view into the mapping; only the columns
+    of the rows a session actually uses are materialised per request.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (header_length,) = _LENGTH.unpack_from(self._mmap, 0)
+        header = json.loads(self._mmap[_LENGTH.size:_LENGTH.size + header_length])
+        data_start = -(-(_LENGTH.size + header_length) // _ALIGN) * _ALIGN
+
+        self._arrays = {
+            name: np.frombuffer(self._mmap, dtype=np.dtype(dtype), count=count, offset=data_start + offset)
+            for name, (offset, dtype, count) in header['arrays'].items()
+        }
+        self.keys = self._arrays['keys']
+        self._vocab_arrays = {
+            col: np.array([np.nan] + header['vocab'][col], dtype=object) for col in CODED_COLUMNS
+        }
+
+    def __len__(self):
+        return len(self.keys)
+
+    def nbytes(self) -> int:
+        return len(self._mmap)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Row of each key in the shared catalog, or -1 where it isn't present."""
+        if not len(self.keys):
+            return np.full(len(keys), -1, dtype=np.int64)
+        positions = np.searchsorted(self.keys, keys)
+        clipped = np.minimum(positions, len(self.keys) - 1)
+        return np.where(self.keys[clipped] == keys, clipped, -1).astype(np.int64)
+
+    def _text_column(self, col: str, rows: np.ndarray) -> np.ndarray:
+        null, offsets, blob = (self._arrays[f'null:{col}'], self._arrays[f'offsets:{col}'],
+                               self._arrays[f'blob:{col}'])
+        out = np.empty(len(rows), dtype=object)
+        for i, row in enumerate(rows.tolist()):
+            out[i] = np.nan if null[row] else blob[offsets[row]:offsets[row + 1]].tobytes().decode('utf-8')
+        return out
+
+    def take(self, rows: np.ndarray) -> dict:
+        """Columns for the given rows, in the same shape as EventCatalog._take."""
+        columns = {
+            'start': self._arrays['start'][rows].view('datetime64[ns]'),
+            'amount': self._arrays['amount'][rows],
+        }
+        for col in TEXT_COLUMNS:
+            columns[col] = self._text_column(col, rows)
+        for col in CODED_COLUMNS:
+            columns[col] = self._vocab_arrays[col][self._arrays[f'code:{col}'][rows]]
+        return columns
+
+    def close(self):
+        # Views into the mapping must be gone before it can be closed
+        self._arrays = {}
+        self.keys = np.empty(0, dtype=np.uint64)
+        self._mmap.close()
@@ -0,0 +1,137 @@
+# streaming.py
+#
+# Page-by-page serialization of ranked events for the streaming response mode,
+# with optional gzip/brotli compression flushed after every page.
+
+import io
+import zlib
+from typing import Iterable, Iterator, Optional
+
+import pandas as pd
+
+from config import STREAM_CONFIG
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MEDIA_TYPES = {
+    'ndjson': "application/x-ndjson",
+    'csv': "text/csv; charset=utf-8"
+}
+
+
+def supported_encodings() -> list:
+    """Content codings we can produce, most preferred first."""
+    return (['br'] if brotli is not None else []) + ['gzip']
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick a content coding from an Accept-Encoding header, or None for identity."""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    best, best_q = None, 0.0
+    for encoding in supported_encodings():
+        q = accepted.get(encoding, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _GzipStream:
+    def __init__(self, level=STREAM_CONFIG['gzip_level']):
+        # wbits=31 writes a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        # Sync flush so the client can decode each page as soon as it arrives
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliStream:
+    def __init__(self, quality=STREAM_CONFIG['brotli_quality']):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def _compressor(encoding: Optional[str]):
+    if encoding == 'gzip':
+        return _GzipStream()
+    if encoding == 'br':
+        return _BrotliStream()
+    return None
+
+
+def serialize_page(page: pd.DataFrame, fmt: str, first: bool) -> bytes:
+    if fmt == 'csv':
+        return page.to_csv(index=False, header=first).encode('utf-8')
+    if page.empty:
+        return b""
+    return page.to_json(orient='records', lines=True, date_format='iso', date_unit='s').rstrip('\n').encode('utf-8') + b"\n"
+
+
+def frame_pages(ranked_df: pd.DataFrame, top_k: Optional[int] = None,
+                page_size: int = STREAM_CONFIG['page_size']) -> Iterator[pd.DataFrame]:
+    """Slice an already-ranked frame into pages of at most `page_size` rows."""
+    if top_k is not None:
+        ranked_df = ranked_df.head(top_k)
+    if ranked_df.empty:
+        yield ranked_df
+        return
+    for start in range(0, len(ranked_df), page_size):
+        yield ranked_df.iloc[start:start + page_size]
+
+
+def csv_pages(ranked_csv: str, top_k: Optional[int] = None,
+              page_size: int = STREAM_CONFIG['page_size']) -> Iterator[pd.DataFrame]:
+    """Read a ranked CSV back in pages, stopping after `top_k` rows.
+
+    Pages are parsed lazily, so only the rows that are actually sent get parsed.
+    """
+    reader = pd.read_csv(io.StringIO(ranked_csv), parse_dates=['start'],
+                         nrows=top_k, chunksize=page_size)
+    empty = True
+    for page in reader:
+        empty = False
+        yield page
+    if empty:
+        yield pd.read_csv(io.StringIO(ranked_csv), nrows=0)
+
+
+def encode_stream(pages: Iterable[pd.DataFrame], fmt: str, encoding: Optional[str] = None) -> Iterator[bytes]:
+    """Serialize (and optionally compress) pages one at a time.
+
+    Each page is yielded as soon as it's serialized, so the first page reaches
+    the client before later pages have been touched.
+    """
+    compressor = _compressor(encoding)
+    first = True
+    for page in pages:
+        chunk = serialize_page(page, fmt, first)
+        first = False
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+    if compressor is not None:
+        yield compressor.finish()
@@ -0,0 +1,48 @@
+import asyncio
+
+from fastapi import HTTPException
+
+from admission import AdmissionController
+
+
+async def hold(controller, seconds, results):
+    try:
+        async with controller.slot():
+            await asyncio.sleep(seconds)
+        results.append(200)
+    except HTTPException as exc:
+        assert int(exc.headers["Retry-After"]) >= 1
+        results.append(exc.status_code)
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=1, queue_timeout=5)
+        results = []
+        await asyncio.gather(*(hold(controller, 0.05, results) for _ in range(3)))
+        return results
+
+    assert sorted(asyncio.run(scenario())) == [200, 200, 429]
+
+
+def test_queue_deadline_is_rejected_with_503():
+    async def scenario():
+        controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout=0.05)
+        results = []
+        await asyncio.gather(hold(controller, 0.3, results), hold(controller, 0, results))
+        return results, controller
+
+    results, controller = asyncio.run(scenario())
+    assert sorted(results) == [200, 503]
+    assert controller.active == 0 and controller.waiting == 0
+
+
+def test_admit_decorator_passes_results_through():
+    controller = AdmissionController(max_concurrency=2, max_queue=0, queue_timeout=1)
+
+    @controller.admit
+    async def endpoint(user_id: int):
+        return {"user_id": user_id}
+
+    assert asyncio.run(endpoint(user_id=7)) == {"user_id": 7}
+    assert controller.active == 0
@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import services
+from circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_half_opens_and_closes():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_rate_threshold=0.5, minimum_calls=4,
+                             window_seconds=10, open_seconds=5, half_open_max_calls=2, clock=clock)
+    for succeeded in (True, False, True, False):
+        breaker.before_call()
+        breaker.record_success() if succeeded else breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 5
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()
+    breaker.before_call()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only two trial calls
+    breaker.record_success()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_failure_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", minimum_calls=1, open_seconds=5, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.times_opened == 2
+
+
+def test_preferences_retry_then_serve_stale(monkeypatch):
+    """5xx responses are retried; once the breaker opens, cached preferences are served"""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if len(calls) == 1:
+            return httpx.Response(200, json={"preferences": "concert", "dislikes": "",
+                                             "priceRange": "$$", "maxDistance": 50})
+        return httpx.Response(502, text="bad gateway")
+
+    async def scenario():
+        services._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            first = await services.fetch_user_preferences(11)
+            with pytest.raises(HTTPException) as failed:
+                await services.fetch_user_preferences(12)
+            stale = await services.fetch_user_preferences(11)
+            return first, failed.value, stale
+        finally:
+            await services.close_http_client()
+
+    monkeypatch.setattr(services, "preferences_breaker",
+                        CircuitBreaker("test", minimum_calls=3, failure_rate_threshold=0.5))
+    monkeypatch.setitem(services.PREFERENCES_CLIENT_CONFIG, 'retry_base_delay', 0.001)
+    first, failed, stale = asyncio.run(scenario())
+
+    assert failed.status_code == 503 and "Retry-After" in failed.headers
+    assert len(calls) == 3  # one success, then retries until the breaker opened
+    assert stale.Preferences == first.Preferences == "concert"
+
+
+def test_cancelled_half_open_trial_gives_its_slot_back(monkeypatch):
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", minimum_calls=1, open_seconds=5, half_open_max_calls=1, clock=clock)
+    breaker.record_failure()
+    clock.now += 5
+    monkeypatch.setattr(services, "preferences_breaker", breaker)
+
+    async def scenario():
+        in_flight = asyncio.Event()
+
+        async def handler(request):
+            in_flight.set()
+            await asyncio.sleep(60)
+
+        services._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            trial = asyncio.create_task(services.fetch_user_preferences(11))
+            await in_flight.wait()
+            with pytest.raises(CircuitOpenError):
+                breaker.before_call()  # the only trial slot is taken
+            trial.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await trial
+        finally:
+            await services.close_http_client()
+
+    asyncio.run(scenario())
+    assert breaker.state == HALF_OPEN
+    breaker.before_call()  # the cancelled trial's slot is free again
+    breaker.record_success()
+    assert breaker.state == CLOSED
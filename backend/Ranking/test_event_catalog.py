@@ -0,0 +1,50 @@
+import io
+
+import pandas as pd
+
+from event_catalog import EventCatalog
+
+
+session_csv = """contentId,title,description,location,start,source,type,currencyCode,amount,url,distance
+1,Boston Bruins vs. Chicago Blackhawks,event,Unknown Address,2030-04-10 19:00:00,Ticketmaster,Hockey,USD,75.0,https://www.ticketmaster.com/event/1,4.08
+2,Dog Walking Club,Coffee and a dog walk,"The Bluffs of Kildaire, Cary, NC",2030-01-25 10:00:00,Host,Pets,N/A,0,253 675 8912,0
+"""
+
+
+def test_parse_session_matches_read_csv():
+    """Catalog-backed parsing yields the same values as a plain read_csv"""
+    catalog = EventCatalog()
+    parsed = catalog.parse_session(session_csv)
+
+    expected = pd.read_csv(io.StringIO(session_csv))
+    expected['start'] = pd.to_datetime(expected['start'])
+    pd.testing.assert_frame_equal(parsed, expected, check_dtype=False)
+
+
+def test_events_are_shared_across_sessions():
+    """Same events under different contentIds and distances resolve to one catalog entry"""
+    catalog = EventCatalog()
+    catalog.parse_session(session_csv)
+
+    other_user = pd.read_csv(io.StringIO(session_csv), dtype=str)
+    other_user['contentId'] = ['7', '8']
+    other_user['distance'] = ['12.5', '3.0']
+    parsed = catalog.parse_session(other_user.to_csv(index=False))
+
+    assert len(catalog) == 2
+    assert catalog.stats()["hits"] == 2
+    assert parsed['contentId'].tolist() == [7, 8]
+    assert parsed['distance'].tolist() == [12.5, 3.0]
+    assert parsed['title'].iloc[1] == "Dog Walking Club"
+
+
+def test_catalog_resets_when_full():
+    """A full catalog starts a new generation instead of growing without bound"""
+    catalog = EventCatalog(max_events=3)
+    catalog.parse_session(session_csv)
+    changed = session_csv.replace("Dog Walking Club", "Cat Club").replace("Chicago", "Boston")
+    parsed = catalog.parse_session(changed)
+
+    assert catalog.stats()["resets"] == 1
+    assert len(catalog) == 2
+    assert parsed['title'].iloc[1] == "Cat Club"
@@ -0,0 +1,27 @@
+import asyncio
+
+import app
+import services
+from loadtest import FakeSupabase, format_report, run_load
+from session_store import fetch_unranked_sessions, upsert_ranked_sessions
+
+
+def test_fake_supabase_supports_session_store_queries():
+    fake = FakeSupabase(sticky=False)
+    fake.seed_sessions({1: "a", 2: "b", 3: "c"})
+    sessions = fetch_unranked_sessions(fake, [1, 3, 4], page_size=1)
+    assert sorted(sessions) == [1, 3]
+
+    upsert_ranked_sessions(fake, [{"id": 1, "userid": 1, "rankedcsv": "ranked"}])
+    assert sorted(fetch_unranked_sessions(fake, [1, 2, 3])) == [2, 3]
+
+
+def test_load_run_reports_latency_percentiles():
+    originals = (app.get_supabase, app.result_cache, app.last_results, services._client)
+    result = asyncio.run(run_load(n_events=30, requests=6, concurrency=2, users=3))
+    assert result["statuses"] == {200: 6}
+    assert result["supabase_writes"] == 6
+    assert result["p50_ms"] <= result["p95_ms"] <= result["p99_ms"]
+    assert "req/s" in format_report([result])
+    # The fakes are only installed for the duration of the run
+    assert (app.get_supabase, app.result_cache, app.last_results, services._client) == originals
@@ -0,0 +1,74 @@
+import json
+import logging
+import random
+
+import pytest
+
+import logging_setup
+from logging_setup import EVENT_LOGGER_NAME, JsonFormatter, SamplingFilter, configure_logging, shutdown_logging
+
+
+@pytest.fixture
+def root_logger():
+    """Fresh configure_logging state; the earlier handlers and listener are put back afterwards."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    # Importing app already configured logging
+    previous = logging_setup._listener
+    if previous is not None:
+        previous.stop()
+        logging_setup._listener = None
+    yield root
+    shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+    if previous is not None:
+        previous.start()
+        logging_setup._listener = previous
+
+
+def make_record(name=EVENT_LOGGER_NAME, level=logging.DEBUG, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, "scored %s", ("event",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_promotes_extra_fields():
+    entry = json.loads(JsonFormatter().format(make_record(level=logging.INFO, user_id=7, score=0.5, _private=1)))
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == EVENT_LOGGER_NAME
+    assert entry["msg"] == "scored event"
+    assert entry["ts"].endswith("+00:00")
+    assert (entry["user_id"], entry["score"]) == (7, 0.5)
+    assert "_private" not in entry and "args" not in entry
+
+
+def test_sampling_only_thins_debug_records_from_the_event_logger(monkeypatch):
+    monkeypatch.setattr(logging_setup, "random", random.Random(0))
+    sampler = SamplingFilter(rate=0.1)
+    kept = sum(sampler.filter(make_record()) for _ in range(10000))
+    assert 800 < kept < 1200
+
+    assert sampler.filter(make_record(level=logging.INFO))
+    assert sampler.filter(make_record(name="ranking.other"))
+    assert not SamplingFilter(rate=0).filter(make_record())
+
+
+def test_queued_records_reach_the_file_and_listener_stops(root_logger, tmp_path):
+    log_file = tmp_path / "ranking.log"
+    configure_logging(level=logging.INFO, log_file=str(log_file))
+    listener = logging_setup._listener
+    assert listener is not None
+    configure_logging(level=logging.INFO, log_file=str(log_file))  # second call is a no-op
+    assert logging_setup._listener is listener
+
+    logging.getLogger("ranking.test").info("ranked", extra={"events": 3})
+    shutdown_logging()
+
+    assert logging_setup._listener is None
+    assert listener._thread is None
+    entries = [json.loads(line) for line in log_file.read_text().splitlines()]
+    assert [(entry["msg"], entry["events"]) for entry in entries] == [("ranked", 3)]
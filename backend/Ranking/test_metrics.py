@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import metrics
+from metrics import Counter, Gauge, Histogram, render_latest, track_request
+
+
+def sample_lines(text, name):
+    return [line for line in text.splitlines() if line.startswith(name)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_histogram_seconds", "Test histogram.", labelnames=("stage",),
+                          buckets=(0.1, 1, 0.5))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.5):
+        histogram.labels("parse").observe(value)
+
+    text = render_latest()
+    assert "# HELP test_histogram_seconds Test histogram.\n# TYPE test_histogram_seconds histogram" in text
+    assert sample_lines(text, "test_histogram_seconds") == [
+        'test_histogram_seconds_bucket{stage="parse",le="0.1"} 2',
+        'test_histogram_seconds_bucket{stage="parse",le="0.5"} 3',
+        'test_histogram_seconds_bucket{stage="parse",le="1"} 4',
+        'test_histogram_seconds_bucket{stage="parse",le="+Inf"} 5',
+        'test_histogram_seconds_sum{stage="parse"} 3.65',
+        'test_histogram_seconds_count{stage="parse"} 5',
+    ]
+    assert text.endswith("\n")
+
+
+def test_label_values_are_escaped():
+    counter = Counter("test_escaped_total", "Escaping.", labelnames=("path",))
+    counter.labels('C:\\tmp "a"\nb').inc(2)
+    assert sample_lines(render_latest(), "test_escaped_total") == [
+        'test_escaped_total{path="C:\\\\tmp \\"a\\"\\nb"} 2'
+    ]
+
+
+def test_unlabelled_metrics_export_zero_and_labelled_ones_need_labels():
+    Gauge("test_idle_gauge", "Idle.")
+    assert sample_lines(render_latest(), "test_idle_gauge") == ["test_idle_gauge 0"]
+    with pytest.raises(ValueError):
+        Counter("test_labelled_total", "Labelled.", labelnames=("kind",)).inc()
+
+
+def test_track_request_labels_outcomes(monkeypatch):
+    latency = Histogram("test_request_seconds", "Requests.", labelnames=("endpoint", "outcome"))
+    monkeypatch.setattr(metrics, "REQUEST_LATENCY", latency)
+
+    @track_request("/test")
+    async def endpoint(kind):
+        if kind == "http":
+            raise HTTPException(status_code=422)
+        if kind == "crash":
+            raise RuntimeError("boom")
+        return "ok"
+
+    assert asyncio.run(endpoint("ok")) == "ok"
+    for kind in ("http", "crash"):
+        with pytest.raises(Exception):
+            asyncio.run(endpoint(kind))
+
+    counts = sample_lines(render_latest(), "test_request_seconds_count")
+    assert counts == [
+        'test_request_seconds_count{endpoint="/test",outcome="success"} 1',
+        'test_request_seconds_count{endpoint="/test",outcome="422"} 1',
+        'test_request_seconds_count{endpoint="/test",outcome="error"} 1',
+    ]
+    assert 'ranking_requests_in_flight{endpoint="/test"} 0' in render_latest()
@@ -0,0 +1,97 @@
+import asyncio
+import base64
+import io
+
+import pandas as pd
+import pytest
+
+import app
+from payload_codec import ARROW, CSV, PARQUET, PayloadFormatError, decode_payload, detect_format, encode_frame
+
+pytest.importorskip("pyarrow")
+
+
+session_csv = """contentId,title,description,location,start,source,type,currencyCode,amount,url,distance
+1,Boston Bruins vs. Chicago Blackhawks,event,Unknown Address,2030-04-10 19:00:00,Ticketmaster,Hockey,USD,75.0,https://www.ticketmaster.com/event/1,4.08
+2,Dog Walking Club,Coffee and a dog walk,"The Bluffs of Kildaire, Cary, NC",2030-01-25 10:00:00,Host,Pets,,,253 675 8912,0.0
+"""
+
+
+def session_frame():
+    df = pd.read_csv(io.StringIO(session_csv))
+    df['start'] = pd.to_datetime(df['start'])
+    return df
+
+
+@pytest.mark.parametrize("fmt", [ARROW, PARQUET])
+def test_columnar_round_trip(fmt):
+    """Arrow and Parquet payloads are detected and load back to the same frame"""
+    payload = encode_frame(session_frame(), fmt)
+    assert detect_format(payload) == fmt
+
+    events_df = decode_payload(payload, fmt)
+    pd.testing.assert_frame_equal(events_df, session_frame(), check_dtype=False)
+
+
+def test_bytea_hex_payload():
+    """Postgres bytea hex literals are accepted as well as base64"""
+    raw = base64.b64decode(encode_frame(session_frame(), PARQUET))
+    payload = "\\x" + raw.hex()
+    assert detect_format(payload) == PARQUET
+    events_df = decode_payload(payload, PARQUET)
+    assert events_df['title'].tolist() == session_frame()['title'].tolist()
+
+
+test_user = {
+    'Preferences': frozenset(['hockey', 'pets']),
+    'Disliked': frozenset(['film']),
+    'Price Range': '$$',
+    'Max Distance': 50
+}
+
+
+@pytest.mark.parametrize("fmt", [ARROW, PARQUET])
+def test_columnar_sessions_rank_like_csv(fmt):
+    """The service ranks a columnar payload exactly as it ranks the same session sent as CSV"""
+    assert detect_format(session_csv) == CSV
+    csv_ranked, csv_removed, csv_format = app.rank_session_frame(test_user, session_csv)
+    ranked, removed, payload_format = app.rank_session_frame(test_user, encode_frame(session_frame(), fmt))
+
+    assert (csv_format, payload_format) == (CSV, fmt)
+    assert removed == csv_removed
+    assert ranked['contentId'].tolist() == csv_ranked['contentId'].tolist()
+
+
+@pytest.mark.parametrize("payload", [
+    "\\x504152310000zz",  # PAR1 magic, then not hex
+    "UEFSMQAAA",  # PAR1 magic in base64 with broken padding
+    base64.b64encode(b"PAR1" + b"\0" * 32).decode('ascii'),  # decodes, but isn't Parquet
+])
+def test_undecodable_payload_is_a_client_error(payload, monkeypatch):
+    """Bad base64/hex or unreadable columnar data is rejected with 422, like a bad CSV header"""
+    import httpx
+    import services
+    from loadtest import FakeSupabase, fake_users_transport
+    from result_cache import LastResultCache, RankedResultCache
+
+    with pytest.raises(PayloadFormatError):
+        decode_payload(payload, detect_format(payload))
+
+    fake = FakeSupabase()
+    fake.seed_sessions({1: payload})
+    monkeypatch.setattr(app, "get_supabase", lambda: fake)
+    monkeypatch.setattr(app, "result_cache", RankedResultCache())
+    monkeypatch.setattr(app, "last_results", LastResultCache())
+
+    async def post():
+        services._client = httpx.AsyncClient(transport=fake_users_transport())
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+                return await client.post("/rank-events/1")
+        finally:
+            await services.close_http_client()
+
+    response = asyncio.run(post())
+    assert response.status_code == 422
+    assert response.json()["detail"]["message"] == "Malformed session payload for user 1"
+    assert fake.writes == 0
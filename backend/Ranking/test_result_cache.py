@@ -0,0 +1,128 @@
+import asyncio
+
+import httpx
+import pytest
+
+import app
+import services
+from loadtest import FakeSupabase, fake_users_transport
+from result_cache import (LastResultCache, RankedResultCache, cache_key, clock_bucket, etag_for,
+                          etag_matches, normalize_csv)
+from warmup import synthetic_session_csv
+
+
+test_user = {
+    'Preferences': frozenset(['hockey', 'music']),
+    'Disliked': frozenset(['film']),
+    'Price Range': '$$',
+    'Max Distance': 20
+}
+
+
+def test_normalized_csv_shares_cache_key():
+    """BOM, CRLF line endings and trailing blank lines hash to the same key"""
+    csv_text = "contentId,type\n1,Hockey\n2,Music\n"
+    noisy_text = "\ufeffcontentId,type\r\n1,Hockey  \r\n2,Music\r\n\r\n"
+
+    bucket = clock_bucket(now=1_700_000_000)
+    assert normalize_csv(csv_text) == normalize_csv(noisy_text)
+    assert cache_key(normalize_csv(csv_text), test_user, bucket) == \
+        cache_key(normalize_csv(noisy_text), test_user, bucket)
+
+
+def test_normalization_leaves_quoted_fields_alone():
+    """Whitespace and line breaks inside a quoted field are data, not noise"""
+    csv_text = 'contentId,description\n1,"two  \nlines"\n2,plain\n'
+    trimmed = 'contentId,description\n1,"two\nlines"\n2,plain\n'
+    assert normalize_csv(csv_text) == 'contentId,description\n1,"two  \nlines"\n2,plain'
+    assert normalize_csv(csv_text) != normalize_csv(trimmed)
+    assert normalize_csv(csv_text.replace('\n', '\r\n')) == \
+        'contentId,description\n1,"two  \r\nlines"\n2,plain'
+
+
+def test_cache_key_depends_on_profile_and_bucket():
+    """A different profile or clock bucket must miss"""
+    csv_text = normalize_csv("contentId,type\n1,Hockey\n")
+    other_user = dict(test_user, **{'Price Range': '$'})
+
+    key = cache_key(csv_text, test_user, 1)
+    assert key != cache_key(csv_text, other_user, 1)
+    assert key != cache_key(csv_text, test_user, 2)
+
+
+def test_lru_respects_entry_and_byte_caps():
+    """Least recently used entries are evicted first under either cap"""
+    cache = RankedResultCache(max_entries=2, max_bytes=10)
+    cache.put("a", ("aaaa", 1, 0))
+    cache.put("b", ("bbbb", 1, 0))
+    assert cache.get("a") is not None  # "b" is now least recently used
+    cache.put("c", ("cccc", 1, 0))
+
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+    cache.put("d", ("dddddddd", 1, 0))  # 8 bytes only fit on their own
+    stats = cache.stats()
+    assert stats["bytes"] <= 10
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 3
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+
+def test_etag_matching():
+    etag = etag_for(cache_key("contentId\n1", test_user, 7))
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches(etag_for(cache_key("contentId\n1", test_user, 8)), etag)
+
+
+def test_last_result_cache_keeps_one_entry_per_user():
+    cache = LastResultCache(max_users=2)
+    cache.put(1, '"a"', ("csv-a", 1, 0))
+    cache.put(1, '"b"', ("csv-b", 1, 0))
+    cache.put(2, '"c"', ("csv-c", 1, 0))
+    cache.get(1)
+    cache.put(3, '"d"', ("csv-d", 1, 0))
+    assert len(cache) == 2
+    assert cache.get(1)[0] == '"b"'
+    assert cache.get(2) is None
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """The app wired to a fake Supabase holding one session for user 1, with empty caches."""
+    fake = FakeSupabase()
+    fake.seed_sessions({1: synthetic_session_csv(30)})
+    monkeypatch.setattr(app, "get_supabase", lambda: fake)
+    monkeypatch.setattr(app, "result_cache", RankedResultCache())
+    monkeypatch.setattr(app, "last_results", LastResultCache())
+    return fake
+
+
+def post_rank_events(requests):
+    """POST /rank-events/1 once per (params, headers) pair, in order."""
+    async def run():
+        services._client = httpx.AsyncClient(transport=fake_users_transport())
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+                return [await client.post("/rank-events/1", params=params, headers=headers)
+                        for params, headers in requests]
+        finally:
+            await services.close_http_client()
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("params", [{}, {"format": "ndjson"}, {"format": "csv", "persist": "true"}])
+def test_repeat_request_with_the_etag_is_not_modified(fake_supabase, params):
+    first, = post_rank_events([(params, {})])
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    repeat, = post_rank_events([(params, {"If-None-Match": etag})])
+    assert repeat.status_code == 304
+    assert repeat.headers["ETag"] == etag
+    # Streaming without persist never writes; otherwise the 304 still marks the session ranked
+    assert fake_supabase.writes == (0 if params.get("format") and not params.get("persist") else 2)
@@ -0,0 +1,61 @@
+import pytest
+
+import app
+from config import SESSION_TABLE
+from result_cache import normalize_csv
+from session_schema import SessionSchemaError, validate_session_csv
+from test_result_cache import fake_supabase, post_rank_events  # noqa: F401 (fixture)
+
+
+header = "contentId,title,description,location,start,source,type,currencyCode,amount,url,distance"
+row = '1,Jazz Night,"Two sets,\nno cover",Unknown Address,2030-04-10 19:00:00,Host,Concert,USD,0,https://x/1,2.5'
+
+
+def problems_for(csv_text):
+    with pytest.raises(SessionSchemaError) as exc_info:
+        validate_session_csv(csv_text)
+    return exc_info.value.problems
+
+
+def test_valid_session_returns_header():
+    """Quoted newlines in the first event don't confuse the field count"""
+    assert validate_session_csv(f"{header}\n{row}\n") == header.split(",")
+    assert validate_session_csv(header) == header.split(",")
+
+
+def test_missing_and_misspelled_columns_are_reported():
+    problems = problems_for(header.replace("type", "Type ").replace(",url", "") + "\n")
+    assert problems == [
+        "missing required columns: type, url",
+        "column names are case- and whitespace-sensitive: got Type ",
+    ]
+
+
+def test_duplicate_columns_and_ragged_rows():
+    problems = problems_for(f"{header},title\n{row}\n")
+    assert "duplicated columns: title" in problems
+    assert "first event has 11 fields but the header has 12 columns" in problems
+
+
+def test_empty_payload():
+    assert problems_for("  \n") == ["session payload is empty"]
+
+
+def test_raw_payload_validates_like_its_normalized_form():
+    """BOM, CRLF and trailing whitespace are normalize_csv's noise, not schema problems"""
+    noisy = f"\ufeff{header}  \r\n{row.replace(chr(10), chr(13) + chr(10))}\r\n\r\n"
+    assert validate_session_csv(noisy) == validate_session_csv(normalize_csv(noisy)) == header.split(",")
+
+    ragged = f"\ufeff{header}\r\n{row},extra  \r\n"
+    assert problems_for(ragged) == problems_for(normalize_csv(ragged))
+
+
+def test_malformed_session_is_rejected_before_normalization(fake_supabase, monkeypatch):
+    normalized = []
+    monkeypatch.setattr(app, "normalize_csv", lambda text: normalized.append(text) or text)
+    fake_supabase.tables[SESSION_TABLE][0]["rankedcsv"] = header.replace(",url", "") + "\n" + (row + "\n") * 500
+
+    response, = post_rank_events([({}, {})])
+    assert response.status_code == 422
+    assert "missing required columns: url" in response.json()["detail"]["problems"]
+    assert normalized == []
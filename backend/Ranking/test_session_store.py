@@ -0,0 +1,87 @@
+import pytest
+
+import session_store
+from config import SESSION_CONFIG
+from loadtest import FakeSupabase
+from session_store import _execute_with_retry, fetch_unranked_sessions, upsert_ranked_sessions
+
+
+class FlakyQuery:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        return self
+
+    def execute(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("connection reset")
+        return "ok"
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(session_store.time, "sleep", delays.append)
+    return delays
+
+
+def recorded_queries(monkeypatch):
+    """Record every query builder session_store executes, then run it."""
+    queries = []
+
+    def execute(build_query, max_retries=SESSION_CONFIG['max_retries']):
+        query = build_query()
+        queries.append(query)
+        return query.execute()
+
+    monkeypatch.setattr(session_store, "_execute_with_retry", execute)
+    return queries
+
+
+def test_retry_backs_off_with_jitter_until_success(sleeps):
+    query = FlakyQuery(failures=2)
+    assert _execute_with_retry(query, max_retries=3) == "ok"
+    assert query.calls == 3
+
+    base = SESSION_CONFIG['retry_base_delay']
+    assert len(sleeps) == 2
+    for attempt, delay in enumerate(sleeps):
+        assert 0.5 * base * 2 ** attempt <= delay <= 1.5 * base * 2 ** attempt
+
+
+def test_retry_gives_up_after_max_retries(sleeps):
+    query = FlakyQuery(failures=10)
+    with pytest.raises(ConnectionError):
+        _execute_with_retry(query, max_retries=2)
+    assert query.calls == 3
+    assert len(sleeps) == 2
+
+
+def test_fetch_paginates_each_id_chunk(monkeypatch):
+    fake = FakeSupabase()
+    fake.seed_sessions({user_id: f"session {user_id}" for user_id in range(1, 8)})
+    # A second, newer unranked row for user 2 must not replace the first
+    fake.tables[session_store.SESSION_TABLE].append({"id": 99, "userid": 2, "rankedcsv": "newer", "IsRanked": False})
+    monkeypatch.setitem(SESSION_CONFIG, 'id_chunk_size', 3)
+    queries = recorded_queries(monkeypatch)
+
+    sessions = fetch_unranked_sessions(fake, [7, 1, 2, 3, 4, 5, 6, 2], page_size=2)
+
+    assert sorted(sessions) == [1, 2, 3, 4, 5, 6, 7]
+    assert sessions[2]["rankedcsv"] == "session 2"
+    # ids [1, 2, 3] hold 4 rows: pages (0, 1), (2, 3), then an empty (4, 5); [4, 5, 6] -> (0, 1), (2, 3); [7] -> (0, 1)
+    assert [query._range for query in queries] == [(0, 1), (2, 3), (4, 5), (0, 1), (2, 3), (0, 1)]
+
+
+def test_upsert_writes_in_chunks(monkeypatch):
+    fake = FakeSupabase(sticky=False)
+    queries = recorded_queries(monkeypatch)
+    rows = [{"id": i, "userid": i, "rankedcsv": f"ranked {i}"} for i in range(1, 6)]
+
+    assert upsert_ranked_sessions(fake, rows, chunk_size=2) == 5
+    assert [len(query._payload) for query in queries] == [2, 2, 1]
+    assert all(row["IsRanked"] for query in queries for row in query._payload)
+    assert len(fake.tables[session_store.SESSION_TABLE]) == 5
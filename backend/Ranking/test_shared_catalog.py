@@ -0,0 +1,66 @@
+import io
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import app
+from config import EVENT_CATALOG_CONFIG, SHARED_CATALOG_ENV
+
+from event_catalog import EventCatalog
+from shared_catalog import SharedEventCatalog, write_catalog
+from test_event_catalog import session_csv
+
+
+def shared_from(csv_text, path):
+    builder = EventCatalog()
+    builder.parse_session(csv_text)
+    write_catalog(builder, str(path))
+    return SharedEventCatalog(str(path))
+
+
+def test_shared_and_local_events_merge(tmp_path):
+    """Known events come from the mapped file, new ones from the worker's own catalog"""
+    shared = shared_from(session_csv, tmp_path / "catalog.bin")
+    catalog = EventCatalog(shared=shared)
+    extra = "3,Open Mic,,Cafe,2030-02-01 20:00:00,Host,Comedy,,,,1.5\n"
+    parsed = catalog.parse_session(session_csv + extra)
+
+    expected = pd.read_csv(io.StringIO(session_csv + extra))
+    expected['start'] = pd.to_datetime(expected['start'])
+    pd.testing.assert_frame_equal(parsed, expected, check_dtype=False)
+    stats = catalog.stats()
+    assert (stats["shared_events"], stats["shared_hits"], stats["events"]) == (2, 2, 1)
+    shared.close()
+
+
+def _titles_in_child(path, queue):
+    shared = SharedEventCatalog(path)
+    queue.put(list(shared.take(shared.lookup(shared.keys))['title']))
+
+
+def test_spawned_worker_reads_the_same_catalog(tmp_path):
+    path = tmp_path / "catalog.bin"
+    shared = shared_from(session_csv, path)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    worker = context.Process(target=_titles_in_child, args=(str(path), queue))
+    worker.start()
+    titles = queue.get(timeout=30)
+    worker.join()
+    assert sorted(titles) == ["Boston Bruins vs. Chicago Blackhawks", "Dog Walking Club"]
+    assert sorted(shared.take(shared.lookup(shared.keys))['title']) == sorted(titles)
+
+
+@pytest.mark.parametrize("keep_bytes", [0, 4, 100, -64 * 3])
+def test_corrupt_shared_catalog_falls_back_to_a_private_one(tmp_path, monkeypatch, keep_bytes):
+    """Empty, truncated-header and truncated-array files are ignored, not fatal at import"""
+    path = tmp_path / "catalog.bin"
+    shared_from(session_csv, path).close()
+    path.write_bytes(path.read_bytes()[:keep_bytes])
+    monkeypatch.setitem(EVENT_CATALOG_CONFIG, 'enabled', True)
+    monkeypatch.setenv(SHARED_CATALOG_ENV, str(path))
+
+    catalog = app.build_event_catalog()
+    assert catalog is not None
+    assert catalog.stats()["shared_events"] == 0
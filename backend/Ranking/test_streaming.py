@@ -0,0 +1,75 @@
+import gzip
+import io
+import json
+
+import pandas as pd
+import pytest
+
+import app
+from streaming import csv_pages, encode_stream, frame_pages, negotiate_encoding
+from test_result_cache import fake_supabase, post_rank_events  # noqa: F401 (fixture)
+
+
+ranked_csv = """contentId,title,start,amount,distance
+3,Jazz Night,2030-04-10 19:00:00,25.0,1.5
+1,"Trivia, Round 2",2030-04-11 20:00:00,,3.0
+2,Dog Walking Club,2030-04-12 10:00:00,0.0,0.0
+"""
+
+
+def test_negotiate_encoding():
+    assert negotiate_encoding(None) is None
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("gzip, deflate") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+
+
+def test_gzip_csv_stream_matches_full_csv():
+    """Paged, sync-flushed gzip output decodes to the same bytes as a single to_csv"""
+    ranked_df = pd.read_csv(io.StringIO(ranked_csv), parse_dates=['start'])
+    chunks = list(encode_stream(frame_pages(ranked_df, page_size=1), 'csv', 'gzip'))
+
+    assert len(chunks) == 4
+    assert gzip.decompress(b"".join(chunks)).decode() == ranked_df.to_csv(index=False)
+
+
+def test_cached_and_fresh_pages_serialize_identically():
+    """Streaming from a cached CSV gives the same top-k records as streaming the ranked frame"""
+    ranked_df = pd.read_csv(io.StringIO(ranked_csv), parse_dates=['start'])
+    fresh = b"".join(encode_stream(frame_pages(ranked_df, top_k=2), 'ndjson'))
+    cached = b"".join(encode_stream(csv_pages(ranked_csv, top_k=2, page_size=1), 'ndjson'))
+
+    assert fresh == cached
+    records = [json.loads(line) for line in fresh.decode().splitlines()]
+    assert [r['contentId'] for r in records] == [3, 1]
+    assert records[1]['amount'] is None
+
+
+def test_brotli_stream_decodes_to_full_csv():
+    """br is preferred when offered, and sync-flushed pages decode to the whole CSV"""
+    brotli = pytest.importorskip("brotli")
+    assert negotiate_encoding("gzip, br") == "br"
+
+    ranked_df = pd.read_csv(io.StringIO(ranked_csv), parse_dates=['start'])
+    chunks = list(encode_stream(frame_pages(ranked_df, page_size=1), 'csv', 'br'))
+    assert brotli.decompress(b"".join(chunks)).decode() == ranked_df.to_csv(index=False)
+
+
+def test_repeat_streamed_views_are_served_from_the_result_cache(fake_supabase, monkeypatch):
+    """A streamed miss fills the result cache after the response, so the next view skips parsing and scoring"""
+    rankings = []
+    rank_session_frame = app.rank_session_frame
+
+    def counting_rank_session_frame(*args):
+        rankings.append(args)
+        return rank_session_frame(*args)
+
+    monkeypatch.setattr(app, "rank_session_frame", counting_rank_session_frame)
+
+    params = {"format": "ndjson", "top_k": 5}
+    first, repeat = post_rank_events([(params, {}), (params, {})])
+
+    assert len(rankings) == 1
+    assert app.result_cache.hits == 1
+    assert repeat.content == first.content and len(first.content.splitlines()) == 5
+    assert fake_supabase.writes == 0
@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from tracing import NOOP_SPAN, STATUS_ERROR, SpanExporter, Tracer, traceparent_headers
+
+
+def exported_spans(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            for resource in json.loads(line)["resourceSpans"]:
+                for scope in resource["scopeSpans"]:
+                    spans.extend(scope["spans"])
+    return {span["name"]: span for span in spans}
+
+
+def test_spans_are_exported_as_otlp_json(tmp_path):
+    """Child spans share the trace id, point at their parent and carry typed attributes"""
+    path = tmp_path / "traces.jsonl"
+    exporter = SpanExporter("ranking-test", file_path=str(path))
+    tracer = Tracer(exporter)
+
+    with tracer.span("rank_events", **{"user.id": 42}):
+        with tracer.span("score") as span:
+            span.set_attribute("ranking.cache_hit", False)
+    with pytest.raises(ValueError):
+        with tracer.span("supabase_write"):
+            raise ValueError("boom")
+    exporter.shutdown()
+
+    spans = exported_spans(path)
+    assert spans["score"]["traceId"] == spans["rank_events"]["traceId"]
+    assert spans["score"]["parentSpanId"] == spans["rank_events"]["spanId"]
+    assert "parentSpanId" not in spans["rank_events"]
+    assert {"key": "user.id", "value": {"intValue": "42"}} in spans["rank_events"]["attributes"]
+    assert {"key": "ranking.cache_hit", "value": {"boolValue": False}} in spans["score"]["attributes"]
+    assert spans["supabase_write"]["status"]["code"] == STATUS_ERROR
+
+
+def test_disabled_and_unsampled_tracing_is_a_noop():
+    """No exporter or a zero sample ratio yields no-op spans and no traceparent"""
+    with Tracer().span("rank_events") as span:
+        assert span is NOOP_SPAN
+
+    exporter = SpanExporter("ranking-test")
+    with Tracer(exporter, sample_ratio=0.0).span("rank_events") as root:
+        with Tracer(exporter).span("score") as child:
+            assert root is NOOP_SPAN and child is NOOP_SPAN
+            assert traceparent_headers() == {}
+    exporter.shutdown()
+    assert exporter.exported == 0
@@ -0,0 +1,85 @@
+import asyncio
+import threading
+
+import httpx
+
+import app
+import metrics
+from config import WARMUP_CONFIG
+from warmup import WarmupState, run_warmup
+
+
+class FlakyStep:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("supabase unreachable")
+
+
+def test_failed_step_is_retried_until_ready():
+    state = WarmupState()
+    step = FlakyStep(failures=2)
+    asyncio.run(run_warmup(state, [("supabase_client", step), ("noop", lambda: None)],
+                           retry_base_delay=0.001, retry_max_delay=0.002))
+
+    assert state.ready
+    assert state.error is None
+    assert step.calls == 3
+    assert state.attempts == {"supabase_client": 3, "noop": 1}
+    assert list(state.steps) == ["supabase_client", "noop"]
+
+
+def test_failing_step_keeps_service_not_ready_and_reports_the_error():
+    async def scenario():
+        state = WarmupState()
+        task = asyncio.create_task(run_warmup(state, [("supabase_client", FlakyStep(failures=1000))],
+                                              retry_base_delay=0.001, retry_max_delay=0.002))
+        while state.attempts.get("supabase_client", 0) < 3:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        return state
+
+    state = asyncio.run(scenario())
+    assert not state.ready
+    assert state.error == "supabase_client: supabase unreachable"
+    assert state.steps == {}
+
+
+def test_ready_flips_from_503_to_200_when_warmup_finishes(monkeypatch):
+    state = WarmupState()
+    monkeypatch.setattr(app, "warmup_state", state)
+    release = threading.Event()
+
+    async def scenario():
+        warmup = asyncio.create_task(run_warmup(state, [("slow_step", lambda: release.wait(5))]))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app.app), base_url="http://test") as client:
+            before = await client.get("/ready")
+            release.set()
+            await warmup
+            after = await client.get("/ready")
+        return before, after
+
+    before, after = asyncio.run(scenario())
+    assert before.status_code == 503
+    assert before.json()["ready"] is False
+    assert after.status_code == 200
+    assert after.json()["ready"] is True
+    assert after.json()["attempts"] == {"slow_step": 1}
+
+
+def test_synthetic_ranking_stays_out_of_production_metrics(monkeypatch):
+    monkeypatch.setitem(WARMUP_CONFIG, 'synthetic_events', 20)
+    steps = dict(app.warmup_steps())
+    production = ("ranking_stage_duration_seconds", "ranking_events_per_request",
+                  "ranking_events_removed_per_request", "ranking_events_removed_total")
+
+    def production_samples():
+        return [line for line in metrics.render_latest().splitlines() if line.startswith(production)]
+
+    before = production_samples()
+    steps["rank_synthetic_batch"]()
+    assert production_samples() == before
@@ -0,0 +1,275 @@
+# tracing.py
+#
+# Lightweight request tracing. Spans follow the OpenTelemetry data model and
+# are exported as OTLP/JSON, either appended to a local JSON-lines file or
+# POSTed to an OTLP/HTTP collector (`{endpoint}/v1/traces`), so they can be
+# loaded into Jaeger/Tempo without adding the OpenTelemetry SDK as a dependency.
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+import httpx
+
+from config import TRACING_CONFIG
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _attribute_value(value) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _attributes(attributes: dict) -> list:
+    return [{"key": key, "value": _attribute_value(value)} for key, value in attributes.items()]
+
+
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_span_id",
+                 "start_ns", "end_ns", "attributes", "status_code", "status_message")
+
+    def __init__(self, name, trace_id, parent_span_id=None, kind=SPAN_KIND_INTERNAL, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_span_id = parent_span_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = dict(attributes or {})
+        self.status_code = STATUS_UNSET
+        self.status_message = ""
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict):
+        self.attributes.update(attributes)
+
+    def record_error(self, exc: BaseException):
+        self.status_code = STATUS_ERROR
+        self.status_message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self) -> dict:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": self.status_code}
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Returned when tracing is off or the trace wasn't sampled; every call is a no-op."""
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_error(self, exc):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class SpanExporter:
+    """Batches finished spans on a background thread and writes them as OTLP/JSON.
+
+    The request path only enqueues; when the queue is full spans are dropped
+    and counted rather than blocking the request.
+    """
+
+    def __init__(self, service_name, file_path=None, endpoint=None,
+                 batch_size=TRACING_CONFIG['batch_size'],
+                 flush_interval=TRACING_CONFIG['flush_interval'],
+                 max_queue_size=TRACING_CONFIG['max_queue_size']):
+        self.service_name = service_name
+        self.file_path = file_path
+        self.endpoint = endpoint.rstrip("/") + "/v1/traces" if endpoint else None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.exported = 0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def submit(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, first=None) -> list:
+        batch = [first] if first is not None else []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            self._export(self._drain(first))
+
+    def payload(self, spans: list) -> dict:
+        return {
+            "resourceSpans": [{
+                "resource": {"attributes": _attributes({"service.name": self.service_name})},
+                "scopeSpans": [{
+                    "scope": {"name": "ventaura.ranking"},
+                    "spans": [span.to_otlp() for span in spans]
+                }]
+            }]
+        }
+
+    def _export(self, spans: list):
+        if not spans:
+            return
+        body = json.dumps(self.payload(spans))
+        try:
+            if self.endpoint:
+                httpx.post(self.endpoint, content=body,
+                           headers={"Content-Type": "application/json"}, timeout=5.0)
+            if self.file_path:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    f.write(body + "\n")
+            self.exported += len(spans)
+        except Exception as exc:
+            self.dropped += len(spans)
+            logger.warning(f"Failed to export {len(spans)} spans: {exc}")
+
+    def shutdown(self):
+        """Stop the background thread and export whatever is still queued."""
+        self._stop.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        while True:
+            batch = self._drain()
+            if not batch:
+                break
+            self._export(batch)
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_ratio=1.0):
+        self.exporter = exporter
+        self.sample_ratio = sample_ratio
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name, kind=SPAN_KIND_INTERNAL, **attributes):
+        """Open a child of the current span (or a new root span); yields the span."""
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            # Inside an unsampled trace
+            yield NOOP_SPAN
+            return
+        if parent is None:
+            if random.random() >= self.sample_ratio:
+                token = _current_span.set(NOOP_SPAN)
+                try:
+                    yield NOOP_SPAN
+                finally:
+                    _current_span.reset(token)
+                return
+            current = Span(name, f"{random.getrandbits(128):032x}", kind=kind, attributes=attributes)
+        else:
+            current = Span(name, parent.trace_id, parent.span_id, kind=kind, attributes=attributes)
+
+        token = _current_span.set(current)
+        try:
+            yield current
+            if current.status_code == STATUS_UNSET:
+                current.status_code = STATUS_OK
+        except BaseException as exc:
+            current.record_error(exc)
+            raise
+        finally:
+            _current_span.reset(token)
+            current.end_ns = time.time_ns()
+            self.exporter.submit(current)
+
+
+def _build_tracer() -> Tracer:
+    if not TRACING_CONFIG['enabled']:
+        return Tracer()
+    file_path = None if TRACING_CONFIG['endpoint'] else TRACING_CONFIG['file']
+    exporter = SpanExporter(TRACING_CONFIG['service_name'], file_path=file_path,
+                            endpoint=TRACING_CONFIG['endpoint'])
+    atexit.register(exporter.shutdown)
+    logger.info(f"Tracing enabled, exporting to {TRACING_CONFIG['endpoint'] or os.path.abspath(file_path)}")
+    return Tracer(exporter, TRACING_CONFIG['sample_ratio'])
+
+
+tracer = _build_tracer()
+
+
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    return tracer.span(name, kind=kind, **attributes)
+
+
+def current_span():
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_attributes(**attributes):
+    """Add attributes to the active span, if there is one."""
+    current_span().set_attributes(attributes)
+
+
+def traceparent_headers() -> dict:
+    """W3C trace context for outgoing calls, so downstream spans join this trace."""
+    current = _current_span.get()
+    if current is None or current is NOOP_SPAN:
+        return {}
+    return {"traceparent": f"00-{current.trace_id}-{current.span_id}-01"}
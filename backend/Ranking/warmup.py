@@ -0,0 +1,96 @@
+# warmup.py
+#
+# Startup warm-up for the ranking service. Steps run once, off the event loop,
+# while the app is already accepting connections; /ready reports 503 until
+# every step has completed. A failing step is retried with backoff.
+
+import asyncio
+import logging
+import random
+import time
+from datetime import timedelta
+from typing import Callable, List, Optional, Tuple
+
+import pandas as pd
+
+from config import PRICE_RANGES, WARMUP_CONFIG, get_current_time
+
+logger = logging.getLogger(__name__)
+
+SYNTHETIC_EVENT_TYPES = ['Concert', 'Sports', 'Hockey', 'Baseball', 'Basketball', 'Theater',
+                         'Comedy', 'Festival', 'Film', 'Food', 'Art', 'Pets', 'Music', 'Nightlife']
+SYNTHETIC_PRICE_PREFS = [pref for pref in PRICE_RANGES if pref != 'irrelevant']
+
+
+def synthetic_session_csv(n_events: int) -> str:
+    """A session CSV in the C# backend's column layout, with events spread over the next two weeks."""
+    now = get_current_time()
+    rows = []
+    for i in range(n_events):
+        rows.append({
+            'contentId': i + 1,
+            'title': f"Warm-up event {i + 1}",
+            'description': "event",
+            'location': "Unknown Address",
+            'start': (now + timedelta(hours=2 + (i * 7) % 336)).strftime('%Y-%m-%d %H:%M:%S'),
+            'source': "Ticketmaster" if i % 2 else "Host",
+            'type': SYNTHETIC_EVENT_TYPES[i % len(SYNTHETIC_EVENT_TYPES)],
+            'currencyCode': "USD",
+            'amount': float((i * 13) % 250),
+            'url': f"https://example.com/warmup/{i + 1}",
+            'distance': float((i * 3.7) % 120)
+        })
+    return pd.DataFrame(rows).to_csv(index=False)
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.steps = {}
+        self.attempts = {}
+
+    def as_dict(self) -> dict:
+        return {
+            "ready": self.ready,
+            "error": self.error,
+            "warmup_seconds": self.duration,
+            "steps": self.steps,
+            "attempts": self.attempts
+        }
+
+
+async def run_warmup(state: WarmupState, steps: List[Tuple[str, Callable[[], None]]],
+                     retry_base_delay: Optional[float] = None, retry_max_delay: Optional[float] = None):
+    """Run warm-up steps in order, each in a worker thread so the event loop stays responsive.
+
+    A failing step is recorded in state.error and retried with jittered exponential
+    backoff until it succeeds; the service stays not-ready meanwhile.
+    """
+    if retry_base_delay is None:
+        retry_base_delay = WARMUP_CONFIG['retry_base_delay']
+    if retry_max_delay is None:
+        retry_max_delay = WARMUP_CONFIG['retry_max_delay']
+    state.started_at = time.perf_counter()
+    for name, step in steps:
+        attempt = 0
+        while True:
+            attempt += 1
+            state.attempts[name] = attempt
+            step_start = time.perf_counter()
+            try:
+                await asyncio.to_thread(step)
+                break
+            except Exception as exc:
+                state.error = f"{name}: {exc}"
+                delay = min(retry_base_delay * (2 ** (attempt - 1)), retry_max_delay)
+                delay *= random.uniform(0.5, 1.5)
+                logger.exception(f"Warm-up step {name} failed (attempt {attempt}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+        state.steps[name] = round(time.perf_counter() - step_start, 4)
+    state.duration = round(time.perf_counter() - state.started_at, 4)
+    state.error = None
+    state.ready = True
+    logger.info(f"Warm-up complete in {state.duration}s", extra={"steps": state.steps})